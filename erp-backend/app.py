@@ -33,6 +33,13 @@ from routes.report_card_routes import report_bp as report_card_bp
 from routes.test_attendance_routes import test_attendance_bp
 from routes.config_routes import bp as config_bp
 from routes.document_routes import document_routes
+from routes.admin_routes import bp as admin_bp
+from routes.audit_routes import bp as audit_bp
+from services.profiling_service import SqlProfiler
+from services.metrics_service import MetricsService, TimedQueuePool
+from services.slow_query_service import SlowQueryService
+from services.replica_service import ReplicaService
+from services.response_service import ResponseService
 
 
   
@@ -70,18 +77,44 @@ def create_app():
     DB_PORT = os.getenv("DB_PORT")
     DB_NAME = os.getenv("DB_NAME")
 
-    if DB_HOST:
+    if DATABASE_URL := os.getenv("DATABASE_URL"):
+        app.config["SQLALCHEMY_DATABASE_URI"] = DATABASE_URL
+    elif DB_HOST:
         app.config["SQLALCHEMY_DATABASE_URI"] = (
             f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
         )
     else:
         app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///erp.db"
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
-    app.config["SQLALCHEMY_POOL_SIZE"] = 20  
-    app.config["SQLALCHEMY_MAX_OVERFLOW"] = 20  
-    app.config["SQLALCHEMY_POOL_RECYCLE"] = 300  
-    app.config["SQLALCHEMY_POOL_TIMEOUT"] = 30  
-    app.config["SQLALCHEMY_POOL_PRE_PING"] = True 
+    # Read replica for @read_replica endpoints (reports, listings); unset = everything on the primary
+    replica_url = os.getenv("REPLICA_DATABASE_URL")
+    if not replica_url and (REPLICA_DB_HOST := os.getenv("REPLICA_DB_HOST")):
+        replica_url = (
+            f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{REPLICA_DB_HOST}:{os.getenv('REPLICA_DB_PORT', DB_PORT)}/{DB_NAME}"
+        )
+    if replica_url:
+        app.config["SQLALCHEMY_BINDS"] = {"replica": replica_url}
+    app.config["REPLICA_MAX_LAG_SECONDS"] = float(os.getenv("REPLICA_MAX_LAG_SECONDS", 5))
+    app.config["REPLICA_LAG_CHECK"] = os.getenv("REPLICA_LAG_CHECK", "true").lower() == "true"
+    app.config["REPLICA_CHECK_INTERVAL"] = float(os.getenv("REPLICA_CHECK_INTERVAL", 5))
+    # A user's reads stay on the primary this long after their own write
+    app.config["REPLICA_STICKY_SECONDS"] = int(os.getenv("REPLICA_STICKY_SECONDS", 30))
+    # Flask-SQLAlchemy 3 ignores the old SQLALCHEMY_POOL_* keys; pool settings go through engine options
+    engine_options = {"pool_recycle": 300, "pool_pre_ping": True}
+    if not app.config["SQLALCHEMY_DATABASE_URI"].startswith("sqlite"):
+        engine_options.update(pool_size=20, max_overflow=20, pool_timeout=30, poolclass=TimedQueuePool)
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options
+    # Receipt/admission numbering: "gapless" (lock held until commit) or "gap_tolerant" (short own transaction)
+    app.config["SEQUENCE_ALLOCATION_MODE"] = os.getenv("SEQUENCE_ALLOCATION_MODE", "gapless").lower()
+    # Audit trail: "outbox" (rows inserted in the writing transaction) or "async" (queued after commit)
+    app.config["AUDIT_MODE"] = os.getenv("AUDIT_MODE", "outbox").lower()
+    app.config["AUDIT_QUEUE_SIZE"] = int(os.getenv("AUDIT_QUEUE_SIZE", 10000))
+    app.config["AUDIT_BATCH_SIZE"] = int(os.getenv("AUDIT_BATCH_SIZE", 500))
+    app.config["AUDIT_FLUSH_INTERVAL"] = float(os.getenv("AUDIT_FLUSH_INTERVAL", 1.0))
+    # Audit retention: months kept in audit_logs before moving to compressed archives
+    app.config["AUDIT_RETENTION_MONTHS"] = int(os.getenv("AUDIT_RETENTION_MONTHS", 12))
+    app.config["AUDIT_ARCHIVE_DIR"] = os.getenv("AUDIT_ARCHIVE_DIR", os.path.join(app.instance_path, "audit_archive"))
+    app.config["AUDIT_ARCHIVE_COMPRESSION"] = os.getenv("AUDIT_ARCHIVE_COMPRESSION", "gzip").lower()
     # -----------------------------
     # INIT EXTENSIONS
     # -----------------------------
@@ -107,15 +140,70 @@ def create_app():
         r"/*": {
             "origins": allowed_origins,
             "supports_credentials": True,
-            "allow_headers": ["Content-Type", "Authorization", "X-Branch", "X-Location", "X-Academic-Year", "X-Requested-With"],
+            "allow_headers": ["Content-Type", "Authorization", "X-Branch", "X-Location", "X-Academic-Year", "X-Requested-With", "X-API-Version"],
             "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"]
         }
     })
     db.init_app(app)
     migrate.init_app(app, db)
+    ReplicaService.init_app(app)
 
     limiter.init_app(app)  
-    cache.init_app(app, config={'CACHE_TYPE': 'SimpleCache', 'CACHE_DEFAULT_TIMEOUT': 300})
+    # Cache backend: SimpleCache (per process), FileSystemCache (shared by the workers
+    # of one box) or RedisCache (shared across nodes). Keys carry the DB-backed
+    # versions in cache_versions, so every backend is safe with several workers.
+    cache_type = os.getenv("CACHE_TYPE", "SimpleCache")
+    cache_config = {'CACHE_TYPE': cache_type, 'CACHE_DEFAULT_TIMEOUT': 300}
+    if cache_type == "FileSystemCache":
+        cache_config["CACHE_DIR"] = os.getenv("CACHE_DIR", os.path.join(app.instance_path, "cache"))
+        cache_config["CACHE_THRESHOLD"] = int(os.getenv("CACHE_THRESHOLD", 5000))
+    elif cache_type == "RedisCache":
+        cache_config["CACHE_REDIS_URL"] = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+        cache_config["CACHE_KEY_PREFIX"] = os.getenv("CACHE_KEY_PREFIX", "erp:")
+    cache.init_app(app, config=cache_config)
+    # Reference data is invalidated on write, so it can live much longer than the default
+    app.config["REFERENCE_CACHE_TIMEOUT"] = int(os.getenv("REFERENCE_CACHE_TIMEOUT", 3600))
+    # Seconds an authenticated user stays cached (bounds staleness of user changes on per-process caches)
+    app.config["AUTH_USER_CACHE_TIMEOUT"] = int(os.getenv("AUTH_USER_CACHE_TIMEOUT", 60))
+    # Effective branch sets are keyed by user version, branch version and day (bounds staleness of grant changes on per-process caches)
+    app.config["BRANCH_ACCESS_CACHE_TIMEOUT"] = int(os.getenv("BRANCH_ACCESS_CACHE_TIMEOUT", 300))
+
+    # SQL profiling (opt-in): per-request query counts, DB time, slowest statements, N+1 shapes
+    app.config["SQL_PROFILING"] = os.getenv("SQL_PROFILING", "false").lower() == "true"
+    app.config["SQL_PROFILE_HEADERS"] = os.getenv("SQL_PROFILE_HEADERS", "true" if env_name == "development" else "false").lower() == "true"
+    app.config["SQL_PROFILE_SLOWEST"] = int(os.getenv("SQL_PROFILE_SLOWEST", 5))
+    app.config["SQL_PROFILE_N_PLUS_ONE"] = int(os.getenv("SQL_PROFILE_N_PLUS_ONE", 5))
+    SqlProfiler.init_app(app)
+
+    # Prometheus /metrics; under gunicorn set PROMETHEUS_MULTIPROC_DIR (gunicorn.conf.py does)
+    app.config["METRICS_ENABLED"] = os.getenv("METRICS_ENABLED", "false").lower() == "true"
+    # Bearer token scrapers must send; required in production, since /metrics exposes route and pool telemetry
+    app.config["METRICS_TOKEN"] = os.getenv("METRICS_TOKEN")
+    if env_name == "production" and app.config["METRICS_ENABLED"] and not app.config["METRICS_TOKEN"]:
+        raise RuntimeError("METRICS_TOKEN must be configured when METRICS_ENABLED is true in production.")
+    MetricsService.init_app(app)
+
+    # Slow-query log with background EXPLAIN plans (/api/admin/slow-queries); 0 disables
+    app.config["SLOW_QUERY_MS"] = int(os.getenv("SLOW_QUERY_MS", 500))
+    app.config["SLOW_QUERY_EXPLAIN"] = os.getenv("SLOW_QUERY_EXPLAIN", "true").lower() == "true"
+    app.config["SLOW_QUERY_BUFFER"] = int(os.getenv("SLOW_QUERY_BUFFER", 200))
+    # Full scans are flagged only on tables at least this big
+    app.config["SLOW_QUERY_LARGE_TABLE_ROWS"] = int(os.getenv("SLOW_QUERY_LARGE_TABLE_ROWS", 10000))
+    SlowQueryService.init_app(app)
+
+    # v2 compact responses (X-API-Version: 2 or /api/v2/...), gzip/brotli compression, JSON encoder
+    app.config["COMPRESS_RESPONSES"] = os.getenv("COMPRESS_RESPONSES", "true").lower() == "true"
+    app.config["COMPRESS_MIN_SIZE"] = int(os.getenv("COMPRESS_MIN_SIZE", 1024))
+    app.config["COMPRESS_GZIP_LEVEL"] = int(os.getenv("COMPRESS_GZIP_LEVEL", 6))
+    app.config["COMPRESS_BROTLI_QUALITY"] = int(os.getenv("COMPRESS_BROTLI_QUALITY", 5))
+    # Seconds browsers may reuse /Media photos without revalidating; 0 = always revalidate (304 when unchanged)
+    app.config["MEDIA_MAX_AGE"] = int(os.getenv("MEDIA_MAX_AGE", 0))
+    # JSON encoder: "auto" (orjson when installed), "orjson" or "std"
+    app.config["JSON_PROVIDER"] = os.getenv("JSON_PROVIDER", "auto").lower()
+    app.config["JSON_SORT_KEYS"] = os.getenv("JSON_SORT_KEYS", "true").lower() == "true"
+    # Lists at least this long are streamed in chunks instead of built whole
+    app.config["JSON_STREAM_MIN_ITEMS"] = int(os.getenv("JSON_STREAM_MIN_ITEMS", 1000))
+    ResponseService.init_app(app)
 
 
     # -----------------------------
@@ -140,6 +228,8 @@ def create_app():
     app.register_blueprint(test_attendance_bp)
     app.register_blueprint(config_bp)
     app.register_blueprint(document_routes, url_prefix="/api/documents")
+    app.register_blueprint(admin_bp)
+    app.register_blueprint(audit_bp)
 
     # -----------------------------
     # SERVE UPLOADS (legacy - kept for backward compatibility)
@@ -164,7 +254,14 @@ def create_app():
             basename = os.path.basename(normalized).lower()
             if basename not in {"profile.jpg", "profile.jpeg", "profile.png", "profile.webp"}:
                 return jsonify({"error": "Unauthorized"}), 403
-        return send_from_directory(media_folder, filename)
+        # send_file answers If-None-Match / If-Modified-Since with 304 from the file's mtime and size
+        max_age = app.config["MEDIA_MAX_AGE"]
+        response = send_from_directory(media_folder, filename, max_age=max_age or None)
+        if max_age:
+            # Photos may be reused for max_age seconds, but only by the user's own browser
+            response.cache_control.public = False
+            response.cache_control.private = True
+        return response
 
     # -----------------------------
     # FAVICON FIX
@@ -0,0 +1,231 @@
+"""
+Synthetic school dataset for the benchmark suite.
+
+Built through the ORM models outside any request, so the flush listeners
+keep derived tables (student_fee_balance, fee_collection_daily) in step
+exactly as they are in production, while no audit rows are written.
+"""
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from extensions import db
+from helpers import hash_user_password
+from models import (
+    OrgMaster, Branch, User, ClassMaster, ClassSection, Student, StudentAcademicRecord,
+    FeeType, StudentFee, FeePayment, Attendance, SubjectMaster, TestType, ClassTest,
+    ClassTestSubject, StudentMarks
+)
+
+ACADEMIC_YEAR = "2025-2026"
+NEXT_ACADEMIC_YEAR = "2026-2027"
+YEAR_START = date(2025, 6, 2)
+LOCATION_CODE = "HYD"
+LOCATION_NAME = "Hyderabad"
+ADMIN_USERNAME = "bench_admin"
+ADMIN_PASSWORD = "bench-pass-123"
+
+CLASSES = [str(c) for c in range(1, 11)]
+SECTIONS = ["A", "B"]
+SUBJECTS = ["English", "Mathematics", "Science", "Social", "Urdu"]
+FEE_MONTHS = ["June", "July", "August", "September", "October", "November",
+              "December", "January", "February", "March", "April", "May"]
+FIRST_NAMES = ["Ayaan", "Zara", "Imran", "Fatima", "Rehan", "Sana", "Arif", "Mariam", "Yusuf", "Hiba",
+               "Kabir", "Aisha", "Omar", "Noor", "Faiz", "Iqra", "Hamza", "Safa", "Bilal", "Amna"]
+LAST_NAMES = ["Khan", "Siddiqui", "Qureshi", "Ansari", "Shaikh", "Hussain", "Baig", "Mirza", "Syed", "Farooqui"]
+
+# Rows per commit while loading
+CHUNK = 5000
+
+SCALES = {
+    #          branches, students per branch, attendance days, fee months, tests
+    "small":  dict(branches=2, students_per_branch=500, days=30, fee_months=6, tests=2),
+    "medium": dict(branches=4, students_per_branch=12500, days=120, fee_months=12, tests=3),
+    "large":  dict(branches=8, students_per_branch=25000, days=220, fee_months=12, tests=4),
+}
+
+
+def school_days(count):
+    """First `count` Monday-Saturday dates of the year."""
+    days = []
+    d = YEAR_START
+    while len(days) < count:
+        if d.weekday() != 6:
+            days.append(d)
+        d += timedelta(days=1)
+    return days
+
+
+def _save(objects):
+    for i in range(0, len(objects), CHUNK):
+        db.session.add_all(objects[i:i + CHUNK])
+        db.session.commit()
+
+
+def build_dataset(branches, students_per_branch, days, fee_months, tests, seed=42, log=print):
+    """Populates an empty schema. Returns a dict describing what was built."""
+    rng = random.Random(seed)
+    # Ids and names are read back after every chunk commit; don't reload them row by row
+    db.session().expire_on_commit = False
+
+    db.session.add_all([
+        OrgMaster(master_type="ACADEMIC_YEAR", code=ACADEMIC_YEAR, display_name=ACADEMIC_YEAR),
+        OrgMaster(master_type="ACADEMIC_YEAR", code=NEXT_ACADEMIC_YEAR, display_name=NEXT_ACADEMIC_YEAR),
+        OrgMaster(master_type="LOCATION", code=LOCATION_CODE, display_name=LOCATION_NAME),
+    ])
+    branch_rows = [
+        Branch(branch_code=f"B{i:02d}", branch_name=f"Branch {i:02d}", location_code=LOCATION_CODE)
+        for i in range(1, branches + 1)
+    ]
+    class_rows = [ClassMaster(class_name=c, location=LOCATION_NAME, branch="All") for c in CLASSES]
+    subject_rows = [SubjectMaster(subject_name=s, academic_year=ACADEMIC_YEAR) for s in SUBJECTS]
+    test_rows = [
+        TestType(test_name=f"Test {i}", max_marks=100, display_order=i, academic_year=ACADEMIC_YEAR)
+        for i in range(1, tests + 1)
+    ]
+    db.session.add_all(branch_rows + class_rows + subject_rows + test_rows)
+    db.session.add(User(username=ADMIN_USERNAME, password=hash_user_password(ADMIN_PASSWORD), role="Admin", branch="All"))
+    db.session.commit()
+
+    sections = []
+    for b in branch_rows:
+        for c in class_rows:
+            for s in SECTIONS:
+                sections.append(ClassSection(
+                    class_id=c.id, branch_id=b.id, academic_year=ACADEMIC_YEAR, section_name=s,
+                    student_strength=students_per_branch // (len(CLASSES) * len(SECTIONS)) + 1
+                ))
+    _save(sections)
+
+    fee_types = {}
+    for b in branch_rows:
+        ft = FeeType(feetype="Tuition", branch=b.branch_name, location=LOCATION_NAME, academic_year=ACADEMIC_YEAR)
+        db.session.add(ft)
+        fee_types[b.branch_name] = ft
+    db.session.commit()
+
+    log(f"Students: {branches} x {students_per_branch}")
+    students = []
+    for b in branch_rows:
+        for n in range(students_per_branch):
+            clazz = CLASSES[n % len(CLASSES)]
+            section = SECTIONS[(n // len(CLASSES)) % len(SECTIONS)]
+            students.append(Student(
+                admission_no=f"{b.branch_code}-{n + 1:06d}",
+                first_name=rng.choice(FIRST_NAMES),
+                last_name=rng.choice(LAST_NAMES),
+                gender=rng.choice(["Male", "Female"]),
+                dob=date(2010 + int(clazz) % 8, rng.randint(1, 12), rng.randint(1, 28)),
+                phone=f"9{rng.randint(100000000, 999999999)}",
+                clazz=clazz,
+                section=section,
+                Roll_Number=n // (len(CLASSES) * len(SECTIONS)) + 1,
+                admission_date=YEAR_START,
+                status="Active",
+                branch=b.branch_name,
+                location=LOCATION_NAME,
+                academic_year=ACADEMIC_YEAR,
+            ))
+    _save(students)
+    _save([
+        StudentAcademicRecord(student_id=s.student_id, academic_year=ACADEMIC_YEAR, class_name=s.clazz,
+                              section=s.section, roll_number=s.Roll_Number)
+        for s in students
+    ])
+
+    # Plain tuples from here on; ORM objects are dropped chunk by chunk
+    roster = [(s.student_id, s.branch, s.clazz, s.section) for s in students]
+    del students
+
+    log(f"Fees: {fee_months} months per student, about a third paid")
+    monthly = Decimal("1500.00")
+    pay_days = school_days(max(days, 1))
+    receipt_seq = {}
+    fee_count = payment_count = 0
+    per_chunk = max(CHUNK // fee_months, 1)
+    for i in range(0, len(roster), per_chunk):
+        fees, paid = [], []
+        for student_id, branch, clazz, section in roster[i:i + per_chunk]:
+            for m, month in enumerate(FEE_MONTHS[:fee_months]):
+                is_paid = m < fee_months // 3 and rng.random() < 0.9
+                fee = StudentFee(
+                    student_id=student_id, fee_type_id=fee_types[branch].id, academic_year=ACADEMIC_YEAR,
+                    month=month, monthly_amount=monthly, total_fee=monthly,
+                    paid_amount=monthly if is_paid else 0, due_amount=0 if is_paid else monthly,
+                    concession=0, status="Paid" if is_paid else "Pending"
+                )
+                fees.append(fee)
+                if is_paid:
+                    paid.append((student_id, branch, clazz, section, fee, month))
+        _save(fees)
+
+        payments = []
+        for student_id, branch, clazz, section, fee, month in paid:
+            seq = receipt_seq[branch] = receipt_seq.get(branch, 0) + 1
+            pay_date = rng.choice(pay_days)
+            payments.append(FeePayment(
+                receipt_no=f"R{branch[-2:]}-{seq:07d}", branch=branch, location=LOCATION_NAME,
+                academic_year=ACADEMIC_YEAR, student_id=student_id, class_name=clazz, section=section,
+                student_fee_id=fee.id, installment_name=month, fee_type="Tuition",
+                gross_amount=monthly, concession_amount=0, net_payable=monthly, amount_paid=monthly, due_amount=0,
+                payment_mode=rng.choice(["Cash", "Cash", "UPI"]), payment_date=pay_date,
+                payment_month=pay_date.month, payment_year=pay_date.year, status="A"
+            ))
+        _save(payments)
+        fee_count += len(fees)
+        payment_count += len(payments)
+
+    log(f"Attendance: {days} school days")
+    attendance = []
+    for d in school_days(days):
+        for student_id, branch, _, _ in roster:
+            attendance.append(Attendance(
+                student_id=student_id, date=d, status="Absent" if rng.random() < 0.08 else "Present",
+                branch=branch, location=LOCATION_NAME, academic_year=ACADEMIC_YEAR
+            ))
+            if len(attendance) >= CHUNK:
+                _save(attendance)
+                attendance = []
+    _save(attendance)
+
+    log(f"Marks: {tests} tests x {len(SUBJECTS)} subjects")
+    class_tests = {}
+    for b in branch_rows:
+        for c in class_rows:
+            for order, t in enumerate(test_rows, start=1):
+                ct = ClassTest(academic_year=ACADEMIC_YEAR, branch=b.branch_name, location=LOCATION_NAME,
+                               class_id=c.id, test_id=t.id, test_order=order)
+                db.session.add(ct)
+                class_tests[(b.branch_name, c.class_name, t.id)] = ct
+    db.session.commit()
+    class_tests = {key: ct.id for key, ct in class_tests.items()}
+    _save([
+        ClassTestSubject(class_test_id=ct_id, subject_id=sub.id, max_marks=100, subject_order=i)
+        for ct_id in class_tests.values() for i, sub in enumerate(subject_rows, start=1)
+    ])
+
+    class_ids = {c.class_name: c.id for c in class_rows}
+    marks = []
+    for student_id, branch, clazz, section in roster:
+        for t in test_rows:
+            ct_id = class_tests[(branch, clazz, t.id)]
+            for sub in subject_rows:
+                marks.append(StudentMarks(
+                    student_id=student_id, class_test_id=ct_id, subject_id=sub.id,
+                    marks_obtained=Decimal(rng.randint(25, 100)), academic_year=ACADEMIC_YEAR,
+                    branch=branch, class_id=class_ids[clazz], section=section
+                ))
+        if len(marks) >= CHUNK:
+            _save(marks)
+            marks = []
+    _save(marks)
+
+    db.session().expire_on_commit = True
+    return {
+        "branches": [b.branch_name for b in branch_rows],
+        "students": len(roster),
+        "fees": fee_count,
+        "payments": payment_count,
+        "attendance_days": days,
+        "tests": [t.id for t in test_rows],
+    }
@@ -0,0 +1,191 @@
+"""
+Hot endpoints exercised by run_benchmarks.py.
+
+Each scenario is prepared once against the built dataset (picking the rows
+it will touch) and then called once per iteration through the Flask test
+client. Write scenarios consume fresh rows on every call so repeated
+iterations measure the same work instead of no-op updates.
+"""
+
+from sqlalchemy import select, func
+from extensions import db
+from models import Student, StudentFee, StudentAcademicRecord, ClassTest, SubjectMaster, ClassMaster
+
+from benchmarks.dataset import ACADEMIC_YEAR, NEXT_ACADEMIC_YEAR, CLASSES, SECTIONS, school_days
+
+
+class Scenario:
+    """A named request factory; `prepare` returns the per-iteration callable."""
+
+    name = None
+    writes = False
+
+    def available(self, dialect):
+        return True
+
+    def prepare(self, info, iterations):
+        raise NotImplementedError
+
+
+class StudentList(Scenario):
+    name = "students.list"
+
+    def prepare(self, info, iterations):
+        return lambda client, headers, i: client.get(
+            f"/api/students?class={CLASSES[i % len(CLASSES)]}&section={SECTIONS[i % len(SECTIONS)]}",
+            headers=headers
+        )
+
+
+class StudentSearch(Scenario):
+    name = "students.search"
+
+    def prepare(self, info, iterations):
+        terms = ["Khan", "Zara", "B01-0001", "Ansari", "9"]
+        return lambda client, headers, i: client.get(f"/api/students?search={terms[i % len(terms)]}", headers=headers)
+
+
+class AttendanceGet(Scenario):
+    name = "attendance.get"
+
+    def prepare(self, info, iterations):
+        days = school_days(info["attendance_days"])
+        return lambda client, headers, i: client.get(
+            f"/api/attendance?class={CLASSES[i % len(CLASSES)]}&section=A&date={days[i % len(days)].isoformat()}",
+            headers=headers
+        )
+
+
+class AttendancePost(Scenario):
+    """Marks one class-section for a day past the seeded range, a new day per call."""
+
+    name = "attendance.post"
+    writes = True
+
+    def prepare(self, info, iterations):
+        seeded = school_days(info["attendance_days"])
+        new_days = school_days(info["attendance_days"] + iterations)[len(seeded):]
+        roster = db.session.execute(
+            select(Student.student_id).where(
+                Student.branch == info["branches"][0], Student.clazz == CLASSES[0], Student.section == SECTIONS[0]
+            ).order_by(Student.student_id)
+        ).scalars().all()
+
+        def call(client, headers, i):
+            day = new_days[i].isoformat()
+            return client.post("/api/attendance", headers=headers, json={"attendance": [
+                {"student_id": sid, "date": day, "status": "Present" if n % 12 else "Absent"}
+                for n, sid in enumerate(roster)
+            ]})
+        return call
+
+
+class FeePaymentPost(Scenario):
+    """Pays one pending installment of a different student per call."""
+
+    name = "fees.payment"
+    writes = True
+
+    def prepare(self, info, iterations):
+        first_pending = db.session.execute(
+            select(func.min(StudentFee.id))
+            .where(StudentFee.academic_year == ACADEMIC_YEAR, StudentFee.status == "Pending")
+            .group_by(StudentFee.student_id)
+            .order_by(StudentFee.student_id)
+            .limit(iterations)
+        ).scalars().all()
+        picked = db.session.execute(
+            select(StudentFee.student_id, StudentFee.id, StudentFee.due_amount)
+            .where(StudentFee.id.in_(first_pending))
+            .order_by(StudentFee.student_id)
+        ).all()
+
+        return lambda client, headers, i: client.post("/api/fees/payment", headers=headers, json={
+            "student_id": picked[i][0],
+            "payment_mode": "Cash",
+            "allocations": [{"student_fee_id": picked[i][1], "amount": str(picked[i][2])}]
+        })
+
+
+class FeeReports(Scenario):
+    """Rotates through the daily, monthly, class-wise and due reports."""
+
+    name = "fees.reports"
+
+    def prepare(self, info, iterations):
+        day = school_days(min(info["attendance_days"], 10))[-1]
+        urls = [
+            f"/api/reports/fees/daily?date={day.isoformat()}",
+            f"/api/reports/fees/monthly?month={day.month}&year={day.year}",
+            f"/api/reports/fees/class-wise?class={CLASSES[0]}",
+            "/api/reports/fees/due",
+        ]
+        return lambda client, headers, i: client.get(urls[i % len(urls)], headers=headers)
+
+
+class MarksGrid(Scenario):
+    name = "marks.entry_grid"
+
+    def prepare(self, info, iterations):
+        class_id = db.session.execute(select(ClassMaster.id).where(ClassMaster.class_name == CLASSES[0])).scalar()
+        subjects = db.session.execute(select(SubjectMaster.id).order_by(SubjectMaster.id)).scalars().all()
+        tests = info["tests"]
+        branch = info["branches"][0]
+
+        def call(client, headers, i):
+            return client.get(
+                f"/api/marks/entry/subject?academic_year={ACADEMIC_YEAR}&branch={branch}&class_id={class_id}"
+                f"&section=A&test_id={tests[i % len(tests)]}&subject_id={subjects[i % len(subjects)]}",
+                headers=headers
+            )
+        return call
+
+
+class ReportCard(Scenario):
+    """report_card_routes talks to MySQL directly through mysql.connector."""
+
+    name = "reports.report_card"
+
+    def available(self, dialect):
+        return dialect == "mysql"
+
+    def prepare(self, info, iterations):
+        rows = db.session.execute(
+            select(Student.student_id, ClassTest.test_id)
+            .join(ClassTest, ClassTest.branch == Student.branch)
+            .join(ClassMaster, (ClassMaster.id == ClassTest.class_id) & (ClassMaster.class_name == Student.clazz))
+            .order_by(Student.student_id).limit(max(iterations, 1))
+        ).all()
+        return lambda client, headers, i: client.get(
+            f"/api/report/student?student_id={rows[i % len(rows)][0]}&test_id={rows[i % len(rows)][1]}",
+            headers=headers
+        )
+
+
+class PromoteBulk(Scenario):
+    """Promotes a fresh batch of not yet promoted students into the next year per call."""
+
+    name = "students.promote_bulk"
+    writes = True
+    batch = 25
+
+    def prepare(self, info, iterations):
+        promoted = select(StudentAcademicRecord.student_id).where(StudentAcademicRecord.academic_year == NEXT_ACADEMIC_YEAR)
+        ids = db.session.execute(
+            select(Student.student_id)
+            .where(Student.student_id.not_in(promoted))
+            .order_by(Student.student_id).limit(self.batch * iterations)
+        ).scalars().all()
+
+        return lambda client, headers, i: client.post("/api/students/promote-bulk", headers=headers, json={
+            "student_ids": ids[i * self.batch:(i + 1) * self.batch],
+            "target_year": NEXT_ACADEMIC_YEAR,
+            "target_class": CLASSES[1],
+            "target_section": SECTIONS[0]
+        })
+
+
+SCENARIOS = [
+    StudentList(), StudentSearch(), AttendanceGet(), AttendancePost(), FeePaymentPost(),
+    FeeReports(), MarksGrid(), ReportCard(), PromoteBulk(),
+]
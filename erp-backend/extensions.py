@@ -5,9 +5,10 @@ from flask_caching import Cache
 import os
 from datetime import datetime
 from zoneinfo import ZoneInfo
+from services.replica_service import RoutingSession
 
-# Database
-db = SQLAlchemy()
+# Database; RoutingSession sends @read_replica reads to the "replica" bind when one is configured
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
 # Rate limiter (no app yet; init in app.create_app)
 limiter = Limiter(
@@ -18,9 +19,21 @@ limiter = Limiter(
 # Cache (init in app.create_app)
 cache = Cache()
 
+UTC = ZoneInfo("UTC")
+_local_tz = None
+
+
+def local_timezone():
+    """APP_TIMEZONE as a tzinfo; read from the environment once per process."""
+    global _local_tz
+    if _local_tz is None:
+        _local_tz = ZoneInfo(os.environ.get("APP_TIMEZONE", "UTC"))
+    return _local_tz
+
+
 def get_now():
     """Get current datetime in UTC for database storage."""
-    return datetime.now(ZoneInfo("UTC"))
+    return datetime.now(UTC)
 
 
 def get_today():
@@ -31,9 +44,7 @@ def to_local_time(dt):
     """Convert a datetime (usually from DB) to the configured local timezone."""
     if dt is None:
         return None
-    tz_name = os.environ.get("APP_TIMEZONE", "UTC")
-    tz = ZoneInfo(tz_name)
     if dt.tzinfo is None:
         # If DB returns unaware datetime, we assume it's stored in UTC
-        dt = dt.replace(tzinfo=ZoneInfo("UTC"))
-    return dt.astimezone(tz)
+        dt = dt.replace(tzinfo=UTC)
+    return dt.astimezone(local_timezone())
@@ -1,3 +1,15 @@
+import os
+import shutil
+
+# Prometheus multiprocess mode: every worker writes its samples here and /metrics merges them.
+# Must be set (and emptied of a previous run's samples) before the app is preloaded.
+os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance", "prometheus")
+)
+shutil.rmtree(os.environ["PROMETHEUS_MULTIPROC_DIR"], ignore_errors=True)
+os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
 workers = 2
 threads = 2
 timeout = 120
@@ -17,4 +29,12 @@ capture_output = True
 
 # Performance options
 preload_app = True
-keepalive = 5
\ No newline at end of file
+keepalive = 5
+
+
+def child_exit(server, worker):
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
@@ -7,7 +7,10 @@ from datetime import datetime, date
 import os
 import hmac
 import hashlib
-from models import Branch, OrgMaster, Student, FeeInstallment, StudentFee, User, FeeType
+from models import Student, FeeInstallment, StudentFee, FeeType
+from services.user_cache_service import UserCacheService
+from services.org_registry_service import OrgRegistryService
+from services.replica_service import ReplicaService
 from werkzeug.security import generate_password_hash, check_password_hash
 import smtplib
 from email.message import EmailMessage
@@ -128,8 +131,8 @@ If you did not request this, please ignore this email.
 def get_default_location():
     """Fetch the first active location from DB as default"""
     try:
-        loc = OrgMaster.query.filter_by(master_type='LOCATION', is_active=True).first()
-        return loc.display_name if loc else "Hyderabad" # Fallback only if DB empty
+        loc = OrgRegistryService.default_location()
+        return loc.name if loc else "Hyderabad" # Fallback only if DB empty
     except Exception:
         return "Hyderabad"
 
@@ -150,7 +153,8 @@ def token_required(f):
         
         try:
             data = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=["HS256"])
-            current_user = User.query.filter_by(user_id=data['user_id']).first()
+            # Short-TTL principal cache; the row is only read on a miss
+            current_user = UserCacheService.get(data['user_id'])
             if not current_user:
                  return jsonify({'error': 'User invalid!'}), 401
                  
@@ -166,6 +170,18 @@ def token_required(f):
     
     return decorated
 
+def read_replica(f):
+    """
+    Marks a read-only endpoint: its SELECTs may be served by the read replica.
+    Goes below @token_required so the user's read-your-writes window is known.
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        ReplicaService.route_reads()
+        return f(*args, **kwargs)
+
+    return decorated
+
 def require_academic_year():
     """Helper to enforce academic year validation"""
     if not (year := request.headers.get("X-Academic-Year")):
@@ -177,8 +193,8 @@ def get_branch_query_filter(model_col, val):
     from sqlalchemy import or_
     filters = [model_col == val]
     if val and isinstance(val, str) and val.isdigit():
-        if b := Branch.query.get(int(val)):
-            filters.append(model_col == b.branch_name)
+        if b := OrgRegistryService.branch(int(val)):
+            filters.append(model_col == b.name)
     return or_(*filters)
 
 def normalize_fee_title(title):
@@ -198,6 +214,9 @@ def ensure_student_editable(student_id, academic_year):
     ).first()
 
     if not record:
+        from services.year_archive_service import YearArchiveService
+        if YearArchiveService.is_archived(academic_year):
+            raise StudentRecordLockedError(f"{academic_year} is archived")
         raise ValueError("Student academic record not found")
 
     if record.is_locked:
@@ -371,9 +390,9 @@ def _is_fee_applicable_to_student(student, fee_structure):
         return False
         
     if fee_structure.branch == "All" and fee_structure.location and fee_structure.location not in ["All", "All Locations"]:
-        if s_branch := Branch.query.filter_by(branch_name=student.branch).first():
-            s_loc_master = OrgMaster.query.filter_by(code=s_branch.location_code, master_type='LOCATION').first()
-            s_loc_name = s_loc_master.display_name if s_loc_master else get_default_location()
+        if (s_branch := OrgRegistryService.branch(student.branch)) and s_branch.name == student.branch:
+            s_loc_master = OrgRegistryService.location(s_branch.location_code)
+            s_loc_name = s_loc_master.name if s_loc_master else get_default_location()
             
             if s_loc_name.lower() != fee_structure.location.lower():
                 logger.debug("Skipping fee %s because location %s does not match student location %s", fee_structure.id, fee_structure.location, s_loc_name)
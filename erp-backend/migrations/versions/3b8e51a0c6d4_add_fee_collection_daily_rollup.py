@@ -0,0 +1,77 @@
+"""Add fee_collection_daily rollup
+
+Revision ID: 3b8e51a0c6d4
+Revises: fec7e73e2491
+Create Date: 2026-10-19 11:02:17.530981
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b8e51a0c6d4'
+down_revision = 'fec7e73e2491'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('fee_collection_daily',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('collection_date', sa.Date(), nullable=False),
+        sa.Column('branch', sa.String(length=50), nullable=False),
+        sa.Column('academic_year', sa.String(length=20), nullable=False),
+        sa.Column('class_name', sa.String(length=50), nullable=False),
+        sa.Column('section', sa.String(length=20), nullable=False),
+        sa.Column('fee_type', sa.String(length=100), nullable=False),
+        sa.Column('installment_name', sa.String(length=100), nullable=False),
+        sa.Column('payment_mode', sa.String(length=50), nullable=False),
+        sa.Column('collected_by_name', sa.String(length=100), nullable=False),
+        sa.Column('line_count', sa.Integer(), nullable=False),
+        sa.Column('receipt_count', sa.Integer(), nullable=False),
+        sa.Column('gross_amount', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('concession_amount', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('amount_paid', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('collection_date', 'branch', 'academic_year', 'class_name', 'section',
+                            'fee_type', 'installment_name', 'payment_mode', 'collected_by_name',
+                            name='uq_fee_collection_daily_key')
+    )
+    with op.batch_alter_table('fee_collection_daily', schema=None) as batch_op:
+        batch_op.create_index('idx_fee_collection_year_branch_date', ['academic_year', 'branch', 'collection_date'], unique=False)
+
+    # Backfill from active payment lines; each receipt is counted on its first line
+    op.execute("""
+        INSERT INTO fee_collection_daily
+            (collection_date, branch, academic_year, class_name, section, fee_type,
+             installment_name, payment_mode, collected_by_name,
+             line_count, receipt_count, gross_amount, concession_amount, amount_paid, updated_at)
+        SELECT fp.payment_date, fp.branch, fp.academic_year, fp.class,
+               COALESCE(fp.section, ''), COALESCE(fp.fee_type, ''), COALESCE(fp.installment_name, ''),
+               COALESCE(fp.payment_mode, ''), COALESCE(fp.collected_by_name, ''),
+               COUNT(fp.payment_id),
+               SUM(CASE WHEN fl.payment_id IS NOT NULL THEN 1 ELSE 0 END),
+               COALESCE(SUM(fp.gross_amount), 0), COALESCE(SUM(fp.concession_amount), 0),
+               COALESCE(SUM(fp.amount_paid), 0),
+               CURRENT_TIMESTAMP
+        FROM fee_payments fp
+        LEFT JOIN (
+            SELECT MIN(payment_id) AS payment_id
+            FROM fee_payments
+            WHERE status = 'A'
+            GROUP BY branch, academic_year, receipt_no
+        ) fl ON fl.payment_id = fp.payment_id
+        WHERE fp.status = 'A' AND fp.payment_date IS NOT NULL
+        GROUP BY fp.payment_date, fp.branch, fp.academic_year, fp.class,
+                 COALESCE(fp.section, ''), COALESCE(fp.fee_type, ''), COALESCE(fp.installment_name, ''),
+                 COALESCE(fp.payment_mode, ''), COALESCE(fp.collected_by_name, '')
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('fee_collection_daily', schema=None) as batch_op:
+        batch_op.drop_index('idx_fee_collection_year_branch_date')
+
+    op.drop_table('fee_collection_daily')
@@ -0,0 +1,39 @@
+"""Add cache_versions table
+
+Revision ID: 6a1f0d93e2b7
+Revises: 3b8e51a0c6d4
+Create Date: 2026-10-19 12:40:03.218557
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6a1f0d93e2b7'
+down_revision = '3b8e51a0c6d4'
+branch_labels = None
+depends_on = None
+
+RESOURCES = [
+    'branches', 'locations', 'academic_years', 'classes', 'grade_scales',
+    'test_types', 'installment_schedule', 'concessions', 'class_tests',
+]
+
+
+def upgrade():
+    cache_versions = op.create_table('cache_versions',
+        sa.Column('resource', sa.String(length=50), nullable=False),
+        sa.Column('version', sa.String(length=32), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('resource')
+    )
+
+    # Seed one row per resource so bumps are always plain UPDATEs
+    op.execute(cache_versions.insert().values([
+        {'resource': r, 'version': '1', 'updated_at': sa.func.current_timestamp()} for r in RESOURCES
+    ]))
+
+
+def downgrade():
+    op.drop_table('cache_versions')
@@ -0,0 +1,52 @@
+"""Add student_fee_balance ledger
+
+Revision ID: 901c7eb38bd2
+Revises: 2d216c34a8d6
+Create Date: 2026-10-19 09:12:40.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '901c7eb38bd2'
+down_revision = '2d216c34a8d6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('student_fee_balance',
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('academic_year', sa.String(length=20), nullable=False),
+        sa.Column('total_fee', sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.Column('paid_amount', sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.Column('due_amount', sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.Column('concession', sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['student_id'], ['students.student_id'], ),
+        sa.PrimaryKeyConstraint('student_id', 'academic_year')
+    )
+    with op.batch_alter_table('student_fee_balance', schema=None) as batch_op:
+        batch_op.create_index('idx_fee_balance_year_due', ['academic_year', 'due_amount'], unique=False)
+
+    # Backfill from existing fee rows in one set-based statement
+    op.execute("""
+        INSERT INTO student_fee_balance
+            (student_id, academic_year, total_fee, paid_amount, due_amount, concession, updated_at)
+        SELECT student_id, academic_year,
+               COALESCE(SUM(total_fee), 0), COALESCE(SUM(paid_amount), 0),
+               COALESCE(SUM(due_amount), 0), COALESCE(SUM(concession), 0),
+               CURRENT_TIMESTAMP
+        FROM studentfees
+        WHERE is_active = TRUE AND student_id IS NOT NULL AND academic_year IS NOT NULL
+        GROUP BY student_id, academic_year
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('student_fee_balance', schema=None) as batch_op:
+        batch_op.drop_index('idx_fee_balance_year_due')
+
+    op.drop_table('student_fee_balance')
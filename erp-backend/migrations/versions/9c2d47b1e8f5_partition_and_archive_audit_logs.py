@@ -0,0 +1,102 @@
+"""Partition audit_logs by month and add audit_archives
+
+Revision ID: 9c2d47b1e8f5
+Revises: 6a1f0d93e2b7
+Create Date: 2026-10-19 15:12:44.671203
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c2d47b1e8f5'
+down_revision = '6a1f0d93e2b7'
+branch_labels = None
+depends_on = None
+
+# Future months created up front; the retention job keeps extending this
+MONTHS_AHEAD = 3
+
+
+def _add_months(d, months):
+    index = d.year * 12 + d.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+# Name given to the unnamed SQLite users foreign key while batch-rebuilding audit_logs
+SQLITE_USER_FK = 'fk_audit_logs_user_id_users'
+
+
+def _audit_log_fks(bind):
+    return [fk['name'] for fk in sa.inspect(bind).get_foreign_keys('audit_logs') if fk.get('name')]
+
+
+def _drop_audit_log_fks(bind):
+    """audit_logs.user_id stops referencing users on every backend (required for MySQL partitioning)."""
+    if bind.dialect.name == 'sqlite':
+        fks = sa.inspect(bind).get_foreign_keys('audit_logs')
+        if fks:
+            with op.batch_alter_table(
+                'audit_logs',
+                naming_convention={"fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s"}
+            ) as batch_op:
+                for fk in fks:
+                    batch_op.drop_constraint(fk.get('name') or SQLITE_USER_FK, type_='foreignkey')
+        return
+    for name in _audit_log_fks(bind):
+        op.drop_constraint(name, 'audit_logs', type_='foreignkey')
+
+
+def upgrade():
+    op.create_table('audit_archives',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('period', sa.String(length=7), nullable=False),
+        sa.Column('file_path', sa.String(length=500), nullable=False),
+        sa.Column('row_count', sa.Integer(), nullable=False),
+        sa.Column('first_timestamp', sa.DateTime(), nullable=True),
+        sa.Column('last_timestamp', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('audit_archives', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_audit_archives_period'), ['period'], unique=False)
+
+    bind = op.get_bind()
+    _drop_audit_log_fks(bind)
+    if bind.dialect.name != 'mysql':
+        # SQLite/Postgres: retention deletes month ranges through idx_audit_timestamp
+        return
+
+    # MySQL partitioning requires the partition column in every unique key and no foreign keys
+    op.execute("ALTER TABLE audit_logs DROP PRIMARY KEY, ADD PRIMARY KEY (id, timestamp)")
+
+    oldest = bind.execute(sa.text("SELECT MIN(timestamp) FROM audit_logs")).scalar() or datetime.now()
+    month = datetime(oldest.year, oldest.month, 1)
+    last = _add_months(datetime(datetime.now().year, datetime.now().month, 1), MONTHS_AHEAD)
+
+    parts = []
+    while month <= last:
+        upper = _add_months(month, 1)
+        parts.append(f"PARTITION p{month:%Y%m} VALUES LESS THAN (TO_DAYS('{upper:%Y-%m-%d}'))")
+        month = upper
+    parts.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+
+    op.execute(f"ALTER TABLE audit_logs PARTITION BY RANGE (TO_DAYS(timestamp)) ({', '.join(parts)})")
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'mysql':
+        op.execute("ALTER TABLE audit_logs REMOVE PARTITIONING")
+        op.execute("ALTER TABLE audit_logs DROP PRIMARY KEY, ADD PRIMARY KEY (id)")
+
+    with op.batch_alter_table('audit_logs', schema=None) as batch_op:
+        batch_op.create_foreign_key('fk_audit_logs_user_id', 'users', ['user_id'], ['user_id'])
+
+    with op.batch_alter_table('audit_archives', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_audit_archives_period'))
+
+    op.drop_table('audit_archives')
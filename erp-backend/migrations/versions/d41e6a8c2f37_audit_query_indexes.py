@@ -0,0 +1,34 @@
+"""Composite indexes for audit trail queries
+
+Revision ID: d41e6a8c2f37
+Revises: 9c2d47b1e8f5
+Create Date: 2026-10-19 16:05:27.904318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd41e6a8c2f37'
+down_revision = '9c2d47b1e8f5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('audit_logs', schema=None) as batch_op:
+        batch_op.drop_index('idx_audit_table_record')
+        batch_op.drop_index('idx_audit_user')
+        batch_op.create_index('idx_audit_table_record', ['table_name', 'record_id', 'timestamp', 'id'], unique=False)
+        batch_op.create_index('idx_audit_user_time', ['user_id', 'timestamp', 'id'], unique=False)
+        batch_op.create_index('idx_audit_module_time', ['module', 'timestamp', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('audit_logs', schema=None) as batch_op:
+        batch_op.drop_index('idx_audit_module_time')
+        batch_op.drop_index('idx_audit_user_time')
+        batch_op.drop_index('idx_audit_table_record')
+        batch_op.create_index('idx_audit_user', ['user_id'], unique=False)
+        batch_op.create_index('idx_audit_table_record', ['table_name', 'record_id'], unique=False)
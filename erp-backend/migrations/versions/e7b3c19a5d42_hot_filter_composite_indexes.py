@@ -0,0 +1,72 @@
+"""Composite indexes for the hot route filters
+
+Revision ID: e7b3c19a5d42
+Revises: d41e6a8c2f37
+Create Date: 2026-10-19 18:40:12.318904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7b3c19a5d42'
+down_revision = 'd41e6a8c2f37'
+branch_labels = None
+depends_on = None
+
+# class_test (academic_year, branch, class_id) is already served by the uniq_class_test prefix
+INDEXES = [
+    ('idx_studentfees_student_year_active', 'studentfees', ['student_id', 'academic_year', 'is_active']),
+    ('idx_studentfees_feetype_year', 'studentfees', ['fee_type_id', 'academic_year']),
+    ('idx_fee_payments_date_branch_status', 'fee_payments', ['payment_date', 'branch', 'status']),
+    ('idx_fee_payments_year_branch_receipt', 'fee_payments', ['academic_year', 'branch', 'receipt_no']),
+    # student_id last so class/section rosters are read from the index alone
+    ('idx_academic_record_year_class', 'student_academic_records', ['academic_year', 'class', 'section', 'student_id']),
+    ('idx_student_branch_status_year', 'students', ['branch', 'status', 'academic_year']),
+    ('idx_student_subject_year_branch', 'studentsubjectassignment', ['academic_year', 'branch']),
+]
+
+# Foreign key columns that lead one of the new indexes; MySQL may drop its own
+# implicit FK index once ours exists, so downgrade puts a plain one back
+FK_COLUMNS = {'studentfees': ['student_id', 'fee_type_id']}
+
+
+def _quote(bind, name):
+    return bind.dialect.identifier_preparer.quote(name)
+
+
+def upgrade():
+    bind = op.get_bind()
+    for name, table, columns in INDEXES:
+        if bind.dialect.name == 'mysql':
+            # InnoDB builds secondary indexes in place while reads and writes continue
+            cols = ', '.join(_quote(bind, c) for c in columns)
+            op.execute(f"CREATE INDEX {name} ON {table} ({cols}) ALGORITHM=INPLACE LOCK=NONE")
+        elif bind.dialect.name == 'postgresql':
+            with op.get_context().autocommit_block():
+                op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+        else:
+            with op.batch_alter_table(table, schema=None) as batch_op:
+                batch_op.create_index(name, columns, unique=False)
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'mysql':
+        new_indexes = {name for name, _, _ in INDEXES}
+        for table, columns in FK_COLUMNS.items():
+            remaining = [
+                ix for ix in sa.inspect(bind).get_indexes(table)
+                if ix['name'] not in new_indexes and ix['column_names']
+            ]
+            for column in columns:
+                if not any(ix['column_names'][0] == column for ix in remaining):
+                    op.execute(f"CREATE INDEX {column} ON {table} ({_quote(bind, column)}) ALGORITHM=INPLACE LOCK=NONE")
+
+    for name, table, _ in reversed(INDEXES):
+        if bind.dialect.name == 'mysql':
+            op.execute(f"DROP INDEX {name} ON {table} ALGORITHM=INPLACE LOCK=NONE")
+        else:
+            with op.batch_alter_table(table, schema=None) as batch_op:
+                batch_op.drop_index(name)
@@ -0,0 +1,52 @@
+"""Link fee_payments to studentfees via student_fee_id
+
+Revision ID: fec7e73e2491
+Revises: 901c7eb38bd2
+Create Date: 2026-10-19 11:02:57.530981
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'fec7e73e2491'
+down_revision = '901c7eb38bd2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('fee_payments', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('student_fee_id', sa.Integer(), nullable=True))
+        batch_op.create_index('ix_fee_payments_student_fee_id', ['student_fee_id'], unique=False)
+        batch_op.create_foreign_key('fk_fee_payments_student_fee_id', 'studentfees', ['student_fee_id'], ['id'])
+
+    # Backfill history in one set-based statement, using the same matching rules the old
+    # cancellation path used (student + year + fee type name + installment/month).
+    # Active fee rows win over deactivated ones, then the lowest id.
+    op.execute("""
+        UPDATE fee_payments
+        SET student_fee_id = (
+            SELECT sf.id
+            FROM studentfees sf
+            JOIN feetypes ft ON ft.id = sf.fee_type_id
+            WHERE sf.student_id = fee_payments.student_id
+              AND sf.academic_year = fee_payments.academic_year
+              AND ft.feetype = fee_payments.fee_type
+              AND (
+                    sf.month = fee_payments.installment_name
+                    OR (fee_payments.installment_name = 'One-Time' AND sf.month IS NULL)
+              )
+            ORDER BY sf.is_active DESC, sf.id
+            LIMIT 1
+        )
+        WHERE student_fee_id IS NULL
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('fee_payments', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_fee_payments_student_fee_id', type_='foreignkey')
+        batch_op.drop_index('ix_fee_payments_student_fee_id')
+        batch_op.drop_column('student_fee_id')
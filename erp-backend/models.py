@@ -1,17 +1,25 @@
-from datetime import datetime, date
 from extensions import db, get_now
-from decimal import Decimal
 from sqlalchemy import or_, event
 from sqlalchemy.orm import declared_attr
-from sqlalchemy import inspect
-from flask import g, has_request_context, request
+from sqlalchemy import MetaData, PrimaryKeyConstraint
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.schema import CreateTable
+from flask import g, has_request_context
 
 
 
 class AuditLog(db.Model):
+    """
+    Declared in its MySQL shape (migration 9c2d47b1e8f5): the table is
+    RANGE-partitioned by month on timestamp, which needs the partition
+    column in the primary key and rules out foreign keys, so user_id is a
+    plain column and the key is (id, timestamp). Migrated SQLite/Postgres
+    databases keep the single id key; see _create_audit_logs_sqlite below.
+    """
     __tablename__ = "audit_logs"
 
-    id = db.Column(db.BigInteger, primary_key=True)
+    # SQLite only autoincrements an INTEGER PRIMARY KEY
+    id = db.Column(db.BigInteger().with_variant(db.Integer, "sqlite"), primary_key=True, autoincrement=True)
 
     table_name = db.Column(db.String(100), nullable=False)
     record_id = db.Column(db.String(100), nullable=True)
@@ -23,16 +31,45 @@ class AuditLog(db.Model):
     old_data = db.Column(db.JSON, nullable=True)
     new_data = db.Column(db.JSON, nullable=True)
 
-    user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=True)
+    user_id = db.Column(db.Integer, nullable=True)  # users.user_id, not enforced (partitioned on MySQL)
     ip_address = db.Column(db.String(50), nullable=True)
 
-    timestamp = db.Column(db.DateTime, nullable=False)
+    timestamp = db.Column(db.DateTime, primary_key=True, nullable=False)
 
     __table_args__ = (
-        db.Index("idx_audit_table_record", "table_name", "record_id"),
-        db.Index("idx_audit_user", "user_id"),
+        # Timeline of one record, already in (timestamp, id) order
+        db.Index("idx_audit_table_record", "table_name", "record_id", "timestamp", "id"),
+        db.Index("idx_audit_user_time", "user_id", "timestamp", "id"),
+        db.Index("idx_audit_module_time", "module", "timestamp", "id"),
         db.Index("idx_audit_timestamp", "timestamp"),
     )
+
+
+@compiles(CreateTable, "sqlite")
+def _create_audit_logs_sqlite(create, compiler, **kw):
+    """SQLite can't autoincrement a composite key: create audit_logs keyed by id alone, as its migrations do."""
+    table = create.element
+    if table.name != AuditLog.__tablename__ or len(table.primary_key.columns) == 1:
+        return compiler.visit_create_table(create, **kw)
+
+    plain = table.to_metadata(MetaData())
+    plain.c.timestamp.primary_key = False
+    plain.c.id.autoincrement = "auto"
+    plain.primary_key = PrimaryKeyConstraint(plain.c.id)
+    return compiler.visit_create_table(CreateTable(plain), **kw)
+
+
+class AuditArchive(db.Model):
+    """One compressed JSONL file holding audit_logs rows moved out of the hot table."""
+    __tablename__ = "audit_archives"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    period = db.Column(db.String(7), nullable=False, index=True) # YYYY-MM
+    file_path = db.Column(db.String(500), nullable=False)
+    row_count = db.Column(db.Integer, nullable=False, default=0)
+    first_timestamp = db.Column(db.DateTime, nullable=True)
+    last_timestamp = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, default=get_now, nullable=False)
     
 class AuditMixin(object):
     """
@@ -238,6 +275,7 @@ class Student(db.Model, AuditMixin):
 
     __table_args__ = (
         db.Index('idx_student_occupancy', 'class', 'section', 'branch', 'academic_year'),
+        db.Index('idx_student_branch_status_year', 'branch', 'status', 'academic_year'),
     )
 
 
@@ -281,6 +319,11 @@ class StudentFee(db.Model, AuditMixin):
     fee_type = db.relationship("FeeType")
     student = db.relationship("Student")
 
+    __table_args__ = (
+        db.Index("idx_studentfees_student_year_active", "student_id", "academic_year", "is_active"),
+        db.Index("idx_studentfees_feetype_year", "fee_type_id", "academic_year"),
+    )
+
 
 class ClassFeeStructure(db.Model, AuditMixin):
     __tablename__ = "classfeestructure"
@@ -358,6 +401,7 @@ class FeePayment(db.Model, AuditMixin):
     section = db.Column(db.String(20)) # Snapshot of section
 
     # Installment / Fee Type
+    student_fee_id = db.Column(db.Integer, db.ForeignKey("studentfees.id"), nullable=True, index=True) # Exact StudentFee row this line paid
     installment_id = db.Column(db.Integer) # derived from FeeInstallment if possible
     installment_name = db.Column(db.String(100)) # e.g. "June Fee"
     fee_type = db.Column(db.String(100))   # Tuition, Transport, etc.
@@ -385,9 +429,89 @@ class FeePayment(db.Model, AuditMixin):
     cancel_reason = db.Column(db.String(255)) # Reason for cancellation
 
     student = db.relationship("Student")
+    student_fee = db.relationship("StudentFee")
+
+    __table_args__ = (
+        db.Index("idx_fee_payments_date_branch_status", "payment_date", "branch", "status"),
+        db.Index("idx_fee_payments_year_branch_receipt", "academic_year", "branch", "receipt_no"),
+    )
+
+
+class StudentFeeBalance(db.Model):
+    """
+    Per-student, per-year fee totals derived from active studentfees rows.
+    Maintained by the flush listeners below; never written by routes directly.
+    """
+    __tablename__ = "student_fee_balance"
+
+    student_id = db.Column(db.Integer, db.ForeignKey("students.student_id"), primary_key=True)
+    academic_year = db.Column(db.String(20), primary_key=True)
+
+    total_fee = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    paid_amount = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    due_amount = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    concession = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+
+    updated_at = db.Column(db.DateTime, default=get_now, nullable=False)
+
+    __table_args__ = (
+        db.Index("idx_fee_balance_year_due", "academic_year", "due_amount"),
+    )
+
+
+class FeeCollectionDaily(db.Model):
+    """
+    Active fee_payments lines rolled up per day and reporting dimension.
+    Kept current by signed per-line deltas from the flush listener below;
+    FeeCollectionService.rebuild() re-derives it for reconciliation.
+    Optional dimensions are stored as '' instead of NULL so the unique key holds.
+    """
+    __tablename__ = "fee_collection_daily"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+
+    collection_date = db.Column(db.Date, nullable=False)
+    branch = db.Column(db.String(50), nullable=False)
+    academic_year = db.Column(db.String(20), nullable=False)
+    class_name = db.Column(db.String(50), nullable=False)
+    section = db.Column(db.String(20), nullable=False, default="")
+    fee_type = db.Column(db.String(100), nullable=False, default="")
+    installment_name = db.Column(db.String(100), nullable=False, default="")
+    payment_mode = db.Column(db.String(50), nullable=False, default="")
+    collected_by_name = db.Column(db.String(100), nullable=False, default="")
+
+    line_count = db.Column(db.Integer, nullable=False, default=0)
+    receipt_count = db.Column(db.Integer, nullable=False, default=0) # receipts whose first line falls in this row
+    gross_amount = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    concession_amount = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    amount_paid = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+
+    updated_at = db.Column(db.DateTime, default=get_now, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint(
+            "collection_date", "branch", "academic_year", "class_name", "section",
+            "fee_type", "installment_name", "payment_mode", "collected_by_name",
+            name="uq_fee_collection_daily_key"
+        ),
+        db.Index("idx_fee_collection_year_branch_date", "academic_year", "branch", "collection_date"),
+    )
 
 
 
+class CacheVersion(db.Model):
+    """
+    Current namespace version of each cached resource.
+    Bumped in the same transaction as the write, so every worker and node
+    sees the new version as soon as the data itself is visible.
+    """
+    __tablename__ = "cache_versions"
+
+    resource = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.String(32), nullable=False)
+    updated_at = db.Column(db.DateTime, default=get_now, nullable=False)
+
+
 # ----------------------------------------------------------
 # BRANCH & ORGANIZATION MANAGEMENT (PHASE 1)
 # ----------------------------------------------------------
@@ -479,6 +603,8 @@ class StudentAcademicRecord(db.Model, AuditMixin):
 
     __table_args__ = (
         db.Index('idx_student_year', 'student_id', 'academic_year'),
+        # Class/section rosters for a year, read from the index alone
+        db.Index('idx_academic_record_year_class', 'academic_year', 'class', 'section', 'student_id'),
         db.UniqueConstraint('student_id', 'academic_year', name='uq_student_academic_year'),
     )
 
@@ -609,6 +735,7 @@ class StudentSubjectAssignment(db.Model, AuditMixin):
 
     __table_args__ = (
         db.UniqueConstraint('student_id', 'subject_id', 'academic_year', name='uq_student_subject_assign'),
+        db.Index('idx_student_subject_year_branch', 'academic_year', 'branch'),
     )
 
 
@@ -810,6 +937,48 @@ class StudentDocument(db.Model, AuditMixin):
     )
 
 
+# ----------------------------------------------------------
+# CLOSED ACADEMIC YEAR ARCHIVE
+# ----------------------------------------------------------
+
+class AcademicYearArchive(db.Model):
+    """
+    An academic year whose year-scoped rows were moved into the *_archive
+    tables. status stays "archiving" until every batch has moved; reads of
+    the year combine hot and archive rows either way.
+    """
+    __tablename__ = "academic_year_archives"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    academic_year = db.Column(db.String(20), nullable=False, unique=True)
+    status = db.Column(db.String(20), nullable=False, default="archiving")
+    row_counts = db.Column(db.Text)  # JSON: table -> rows moved
+    archived_by = db.Column(db.Integer)
+    started_at = db.Column(db.DateTime, default=get_now, nullable=False)
+    archived_at = db.Column(db.DateTime)
+
+
+def _archive_table(model):
+    """Same columns as the hot table, without keys to other tables; rows keep their ids."""
+    source = model.__table__
+    return db.Table(
+        f"{source.name}_archive",
+        *[
+            db.Column(c.name, c.type.copy(), primary_key=c.primary_key, autoincrement=False, nullable=c.nullable)
+            for c in source.columns
+        ],
+        db.Column("archived_at", db.DateTime, nullable=False),
+        db.Index(f"idx_{source.name}_archive_year_student", "academic_year", "student_id"),
+    )
+
+
+# Year-scoped tables moved out once every student_academic_records row of a year is locked
+ARCHIVE_TABLES = {
+    model.__tablename__: _archive_table(model)
+    for model in (StudentAcademicRecord, Attendance, StudentFee, FeePayment, StudentMarks)
+}
+
+
 # ----------------------------------------------------------
 # GLOBAL AUDIT EVENT LISTENERS
 # ----------------------------------------------------------
@@ -820,7 +989,8 @@ VALID_AUDIT_ACTIONS = {
     "DELETE",
     "SOFT_DELETE",
     "LOGIN",
-    "LOGOUT"
+    "LOGOUT",
+    "BULK"
 }
 
 @event.listens_for(db.session, "before_flush")
@@ -832,32 +1002,6 @@ def receive_before_flush(session, flush_context, instances):
 
     user_id = getattr(g, "user_id", None)
 
-    # Nginx-safe IP detection
-    ip_address = request.headers.get(
-        "X-Forwarded-For",
-        request.remote_addr
-    )
-
-    # -------------------------
-    # HELPER: Get Primary Key
-    # -------------------------
-    def get_record_id(obj):
-        state = inspect(obj)
-        pk = state.identity
-        return str(pk[0]) if pk else None
-
-    # -------------------------
-    # HELPER: Make JSON-safe
-    # -------------------------
-    def _make_serializable(val):
-        if isinstance(val, datetime):
-            return val.isoformat()
-        if isinstance(val, date):
-            return val.isoformat()
-        if isinstance(val, Decimal):
-            return float(val)
-        return val
-
     # =========================================================
     # AUTO-FILL created_by / updated_by on NEW objects
     # =========================================================
@@ -882,131 +1026,171 @@ def receive_before_flush(session, flush_context, instances):
             obj.updated_at = get_now()
 
     # =========================================================
-    # INSERT
+    # CAPTURE compact CREATE / UPDATE / DELETE records
     # =========================================================
-    for obj in session.new:
+    from services.audit_service import AuditService
 
-        if not isinstance(obj, AuditMixin) or isinstance(obj, AuditLog):
-            continue
+    AuditService.capture(session)
 
-        if obj.__tablename__ == "audit_logs":
-            continue
 
-        new_data = {}
-        for col in obj.__table__.columns:
-            try:
-                value = getattr(obj, col.name)
-                new_data[col.name] = _make_serializable(value)
-            except Exception:
-                new_data[col.name] = None
-        
-        module = getattr(obj, "__audit_module__", "GENERAL")
-        action = "CREATE"
-        if action not in VALID_AUDIT_ACTIONS:
-            continue
+@event.listens_for(db.session, "after_flush")
+def receive_after_flush(session, flush_context):
+    """Write (outbox mode) or stage (async mode) the records captured for this flush."""
+    from services.audit_service import AuditService
 
-        log = AuditLog(
-            table_name=obj.__tablename__,
-            record_id=None,  # PK may not exist yet (before flush)
-            module=module,
-            action=action,
-            old_data=None,
-            new_data=new_data,
-            user_id=user_id,
-            ip_address=ip_address,
-            timestamp=get_now()
-        )
+    if session.info.get("audit_flush"):
+        AuditService.after_flush(session)
 
-        session.add(log)
 
-    # =========================================================
-    # UPDATE
-    # =========================================================
-    for obj in session.dirty:
+@event.listens_for(db.session, "after_commit")
+def receive_after_commit(session):
+    """Hand staged async records to the background writer once the change is durable."""
+    from services.audit_service import AuditService
 
-        if not isinstance(obj, AuditMixin) or isinstance(obj, AuditLog):
-            continue
+    if session.info.get("audit_outbox"):
+        AuditService.after_commit(session)
 
-        if obj.__tablename__ == "audit_logs":
-            continue
 
-        if not session.is_modified(obj, include_collections=False):
-            continue
+@event.listens_for(db.session, "after_rollback")
+def receive_after_rollback(session):
+    from services.audit_service import AuditService
 
-        state = inspect(obj)
+    AuditService.discard(session)
 
-        old_data = {}
-        new_data = {}
 
-        for col in obj.__table__.columns:
-            attr = state.attrs.get(col.key)
-            if not attr:
-                continue
+# ----------------------------------------------------------
+# FEE BALANCE LEDGER LISTENERS
+# ----------------------------------------------------------
+
+@event.listens_for(db.session, "before_flush")
+def collect_fee_balance_keys(session, flush_context, instances):
+    """Remember which (student_id, academic_year) balances this flush touches."""
+    from services.fee_balance_service import FeeBalanceService
 
-            hist = attr.history
+    if keys := FeeBalanceService.affected_keys(session):
+        session.info.setdefault("fee_balance_keys", set()).update(keys)
 
-            if not hist.has_changes():
-                continue
 
-            old_value = hist.deleted[0] if hist.deleted else None
-            new_value = hist.added[0] if hist.added else None
+@event.listens_for(db.session, "after_flush")
+def refresh_fee_balances(session, flush_context):
+    """Recompute touched balances inside the same transaction as the fee rows."""
+    from services.fee_balance_service import FeeBalanceService
 
-            old_data[col.key] = _make_serializable(old_value)
-            new_data[col.key] = _make_serializable(new_value)
+    if keys := session.info.pop("fee_balance_keys", None):
+        FeeBalanceService.refresh(session.connection(), keys)
 
-        if old_data:
-            module = getattr(obj, "__audit_module__", "GENERAL")
-            action = "UPDATE"
-            if action not in VALID_AUDIT_ACTIONS:
-                continue
 
-            log = AuditLog(
-                table_name=obj.__tablename__,
-                record_id=get_record_id(obj),
-                module=module,
-                action=action,
-                old_data=old_data,
-                new_data=new_data,
-                user_id=user_id,
-                ip_address=ip_address,
-                timestamp=get_now()
-            )
+@event.listens_for(db.session, "before_flush")
+def collect_fee_collection_lines(session, flush_context, instances):
+    """Remember the stored values of payment lines this flush edits or deletes."""
+    from services.fee_collection_service import FeeCollectionService
 
-            session.add(log)
+    session.info["fee_collection_lines"] = FeeCollectionService.stored_lines(session)
 
-    # =========================================================
-    # DELETE
-    # =========================================================
-    for obj in session.deleted:
 
-        if not isinstance(obj, AuditMixin) or isinstance(obj, AuditLog):
-            continue
+@event.listens_for(db.session, "after_flush")
+def apply_fee_collection_deltas(session, flush_context):
+    """Add this flush's payment line changes to the daily rollups, in the same transaction."""
+    from services.fee_collection_service import FeeCollectionService
 
-        if obj.__tablename__ == "audit_logs":
-            continue
+    stored = session.info.pop("fee_collection_lines", {})
+    if lines := FeeCollectionService.changed_lines(session, stored):
+        FeeCollectionService.apply(session.connection(), lines)
 
-        old_data = {}
-        for col in obj.__table__.columns:
-            try:
-                old_data[col.name] = _make_serializable(getattr(obj, col.name))
-            except Exception:
-                old_data[col.name] = None
-                
-        module = getattr(obj, "__audit_module__", "GENERAL")
-        action = "DELETE"
-        if action not in VALID_AUDIT_ACTIONS:
-            continue
 
-        log = AuditLog(
-            table_name=obj.__tablename__,
-            record_id=get_record_id(obj),
-            module=module,
-            action=action,
-            old_data=old_data,
-            new_data=None,
-            user_id=user_id,
-            ip_address=ip_address,
-            timestamp=get_now()
+# ----------------------------------------------------------
+# REFERENCE CACHE INVALIDATION LISTENERS
+# ----------------------------------------------------------
+
+@event.listens_for(db.session, "before_flush")
+def collect_cache_models(session, flush_context, instances):
+    """Remember which model types this transaction writes."""
+    names = {type(obj).__name__ for obj in list(session.new) + list(session.dirty) + list(session.deleted)}
+    if names:
+        session.info.setdefault("cache_models", set()).update(names)
+
+
+@event.listens_for(db.session, "do_orm_execute")
+def collect_bulk_cache_models(orm_execute_state):
+    """query.update()/query.delete() never reach the flush, so catch them here."""
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) and orm_execute_state.bind_mapper:
+        orm_execute_state.session.info.setdefault("cache_models", set()).add(
+            orm_execute_state.bind_mapper.class_.__name__
         )
 
-        session.add(log)
+
+@event.listens_for(db.session, "before_commit")
+def bump_cache_versions(session):
+    """
+    Bump versions of cached reference data inside the committing transaction.
+    Resources every cashier writes (DEFERRED_RESOURCES) wait for after_commit.
+    """
+    from services.cache_service import CacheService, DEFERRED_RESOURCES
+
+    names = session.info.pop("cache_models", set())
+    names |= {type(obj).__name__ for obj in list(session.new) + list(session.dirty) + list(session.deleted)}
+    resources = CacheService.resources_for_models(names)
+    if deferred := resources & DEFERRED_RESOURCES:
+        session.info.setdefault("deferred_cache_resources", set()).update(deferred)
+    if resources := resources - DEFERRED_RESOURCES:
+        CacheService.bump(session.connection(), *resources)
+
+
+@event.listens_for(db.session, "after_commit")
+def forget_cache_versions(session):
+    """Later reads in this request must see the versions just committed."""
+    from services.cache_service import CacheService
+    from services.org_registry_service import OrgRegistryService
+    from services.year_archive_service import YearArchiveService
+    from services.branch_access_service import BranchAccessService
+
+    if deferred := session.info.pop("deferred_cache_resources", None):
+        CacheService.bump_committed(*deferred)
+    CacheService.forget_versions()
+    OrgRegistryService.forget()
+    YearArchiveService.forget()
+    BranchAccessService.forget()
+
+
+@event.listens_for(db.session, "after_rollback")
+def discard_cache_models(session):
+    session.info.pop("cache_models", None)
+    session.info.pop("deferred_cache_resources", None)
+
+
+# ----------------------------------------------------------
+# AUTHENTICATED USER CACHE LISTENERS
+# ----------------------------------------------------------
+
+def _changed_users(session):
+    """Users renamed, re-passworded, re-roled, deleted or granted/revoked branches among the pending objects."""
+    ids = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if obj in session.dirty and not session.is_modified(obj, include_collections=False):
+            continue
+        if isinstance(obj, User) and obj not in session.new and obj.user_id:
+            ids.add(obj.user_id)
+        elif isinstance(obj, UserBranchAccess) and obj.user_id:
+            ids.add(obj.user_id)
+    return ids
+
+
+@event.listens_for(db.session, "before_flush")
+def collect_changed_users(session, flush_context, instances):
+    """Remember which users this transaction changes."""
+    if ids := _changed_users(session):
+        session.info.setdefault("changed_users", set()).update(ids)
+
+
+@event.listens_for(db.session, "after_commit")
+def bump_user_versions(session):
+    """Only after commit, so no request can re-cache the old row under the new version."""
+    from services.user_cache_service import UserCacheService
+
+    if ids := session.info.pop("changed_users", None):
+        UserCacheService.bump(*ids)
+
+
+@event.listens_for(db.session, "after_rollback")
+def discard_changed_users(session):
+    session.info.pop("changed_users", None)
@@ -3,7 +3,8 @@ from extensions import db, to_local_time
 from models import SubjectMaster, Branch, OrgMaster, ClassSubjectAssignment
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.sql import exists
-from helpers import token_required, ensure_student_editable
+from helpers import token_required, ensure_student_editable, read_replica
+from services.cache_service import conditional_get
 
 bp = Blueprint("academic", __name__)
 @bp.route("/api/academic/subjects", methods=["POST"])
@@ -68,6 +69,7 @@ def create_subject(current_user):
 
 
 @bp.route("/api/academic/subjects", methods=["GET"])
+@conditional_get("class_tests")
 def list_subjects():
     try:
         academic_year = request.args.get("academic_year")
@@ -239,6 +241,7 @@ def assign_subjects(current_user):
         return jsonify({"error": str(e)}), 500
 
 @bp.route("/api/academic/assigned-subjects", methods=["GET"])
+@conditional_get("class_tests")
 def get_assigned_subjects():
     try:
         # Filters (Inputs might be IDs or Names)
@@ -524,6 +527,7 @@ def manage_subject_assignment(current_user):
         return jsonify({"error": str(e)}), 500
 
 @bp.route("/api/sections", methods=["GET"])
+@conditional_get("classes", "students")
 def get_sections():
     """
     Get sections for a specific class.
@@ -586,6 +590,7 @@ def get_sections():
 # Student Subject Assignment (Overrides)
 # ---------------------------------------------------------
 @bp.route("/api/academics/assignment-data", methods=["GET"])
+@read_replica
 def get_assignment_data():
     from sqlalchemy import or_, and_
 
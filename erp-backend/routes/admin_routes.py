@@ -0,0 +1,154 @@
+from datetime import datetime, timedelta
+
+from flask import Blueprint, jsonify, request, current_app
+from helpers import token_required
+from models import AuditArchive
+from services.sequence_service import SequenceService
+from services.audit_archive_service import AuditArchiveService
+from services.profiling_service import SqlProfiler
+from services.slow_query_service import SlowQueryService
+from services.replica_service import ReplicaService
+from services.year_archive_service import YearArchiveService
+
+bp = Blueprint('admin_routes', __name__)
+
+
+@bp.route("/api/admin/sequence-metrics", methods=["GET"])
+@token_required
+def get_sequence_metrics(current_user):
+    """Receipt/admission number allocation timings for this worker process"""
+    if current_user.role != 'Admin':
+        return jsonify({"error": "Admin required"}), 403
+
+    return jsonify({
+        "mode": SequenceService.allocation_mode(),
+        "sequences": SequenceService.lock_wait_stats()
+    }), 200
+
+
+@bp.route("/api/admin/perf", methods=["GET"])
+@token_required
+def get_perf_stats(current_user):
+    """
+    SQL profile totals per blueprint/endpoint for this worker process.
+    Requires SQL_PROFILING=true; ?reset=true clears the totals after reading.
+    """
+    if current_user.role != 'Admin':
+        return jsonify({"error": "Admin required"}), 403
+
+    stats = SqlProfiler.snapshot()
+    if request.args.get("reset", "false").lower() == "true":
+        SqlProfiler.reset()
+
+    return jsonify({
+        "enabled": SqlProfiler.enabled(current_app),
+        "blueprints": stats
+    }), 200
+
+
+@bp.route("/api/admin/slow-queries", methods=["GET"])
+@token_required
+def get_slow_queries(current_user):
+    """
+    Statements over SLOW_QUERY_MS captured by this worker process, grouped by
+    shape with their EXPLAIN plan and any full scans of large tables.
+    ?reset=true clears the buffer after reading.
+    """
+    if current_user.role != 'Admin':
+        return jsonify({"error": "Admin required"}), 403
+
+    data = SlowQueryService.snapshot()
+    if request.args.get("reset", "false").lower() == "true":
+        SlowQueryService.reset()
+
+    return jsonify({
+        "enabled": SlowQueryService.enabled(),
+        "threshold_ms": current_app.config.get("SLOW_QUERY_MS", 0),
+        "explain_queue": SlowQueryService.queue_depth(),
+        **data
+    }), 200
+
+
+@bp.route("/api/admin/replica", methods=["GET"])
+@token_required
+def get_replica_status(current_user):
+    """Read replica health as last probed by this worker; ?check=true probes now"""
+    if current_user.role != 'Admin':
+        return jsonify({"error": "Admin required"}), 403
+
+    if not ReplicaService.enabled():
+        return jsonify({"enabled": False}), 200
+    if request.args.get("check", "false").lower() == "true":
+        ReplicaService.probe()
+
+    return jsonify({
+        "enabled": True,
+        "max_lag_seconds": current_app.config.get("REPLICA_MAX_LAG_SECONDS"),
+        **ReplicaService.status()
+    }), 200
+
+
+@bp.route("/api/admin/year-archives", methods=["GET"])
+@token_required
+def get_year_archives(current_user):
+    """Academic years with their lock counts and archive state"""
+    if current_user.role != 'Admin':
+        return jsonify({"error": "Admin required"}), 403
+
+    return jsonify({"years": YearArchiveService.year_summary()}), 200
+
+
+@bp.route("/api/admin/audit/archives", methods=["GET"])
+@token_required
+def get_audit_archives(current_user):
+    """Audit log months moved out of audit_logs by the retention job"""
+    if current_user.role != 'Admin':
+        return jsonify({"error": "Admin required"}), 403
+
+    archives = AuditArchive.query.order_by(AuditArchive.period.desc()).all()
+    return jsonify([{
+        "id": a.id,
+        "period": a.period,
+        "file": a.file_path,
+        "row_count": a.row_count,
+        "first_timestamp": a.first_timestamp.isoformat() if a.first_timestamp else None,
+        "last_timestamp": a.last_timestamp.isoformat() if a.last_timestamp else None,
+        "created_at": a.created_at.isoformat() if a.created_at else None
+    } for a in archives]), 200
+
+
+@bp.route("/api/admin/audit/search", methods=["GET"])
+@token_required
+def search_audit_logs(current_user):
+    """
+    Audit history across the live table and archived months.
+    Query params: table_name, record_id, module, action, user_id,
+    from_date / to_date (YYYY-MM-DD, inclusive), limit (max 1000).
+    """
+    if current_user.role != 'Admin':
+        return jsonify({"error": "Admin required"}), 403
+
+    try:
+        start = request.args.get("from_date")
+        end = request.args.get("to_date")
+        start = datetime.strptime(start, "%Y-%m-%d") if start else None
+        end = datetime.strptime(end, "%Y-%m-%d") + timedelta(days=1) if end else None
+    except ValueError:
+        return jsonify({"error": "Dates must be YYYY-MM-DD"}), 400
+
+    limit = min(request.args.get("limit", 100, type=int), 1000)
+
+    try:
+        results = AuditArchiveService.search(
+            start=start,
+            end=end,
+            limit=limit,
+            table_name=request.args.get("table_name"),
+            record_id=request.args.get("record_id"),
+            module=request.args.get("module"),
+            action=request.args.get("action"),
+            user_id=request.args.get("user_id", type=int)
+        )
+        return jsonify({"count": len(results), "results": results}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
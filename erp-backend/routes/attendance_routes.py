@@ -5,6 +5,8 @@ from helpers import token_required, require_academic_year, student_to_dict, get_
 from datetime import datetime, date
 from sqlalchemy import or_
 from routes.config_routes import is_weekoff_or_holiday
+from services.audit_service import AuditService
+from services.year_archive_service import YearArchiveService
 import traceback
 bp = Blueprint('attendance_routes', __name__)
 
@@ -22,6 +24,9 @@ def get_attendance(current_user):
         h_branch = request.headers.get("X-Branch")
         h_year, err, code = require_academic_year()
         if err: return err, code
+        # Closed years live in the archive tables; these read both
+        Record = YearArchiveService.source(StudentAcademicRecord, h_year)
+        AttendanceRow = YearArchiveService.source(Attendance, h_year)
         
         # Branch Permissions Logic
         if current_user.role != 'Admin':
@@ -38,11 +43,11 @@ def get_attendance(current_user):
         
         # Base query joining Student and Academic Record
         # We need students who were in the requested class/section DURING the requested academic year
-        q = db.session.query(Student, StudentAcademicRecord).join(
-            StudentAcademicRecord, 
-            Student.student_id == StudentAcademicRecord.student_id
+        q = db.session.query(Student, Record).join(
+            Record, 
+            Student.student_id == Record.student_id
         ).filter(
-            StudentAcademicRecord.academic_year == h_year,
+            Record.academic_year == h_year,
             Student.status == "Active"
         )
         
@@ -60,9 +65,9 @@ def get_attendance(current_user):
                  q = q.filter(Student.branch == h_branch)
         
         if class_name:
-            q = q.filter(StudentAcademicRecord.class_name == class_name)
+            q = q.filter(Record.class_name == class_name)
         if section:
-            q = q.filter(StudentAcademicRecord.section == section)
+            q = q.filter(Record.section == section)
         if student_id:
             q = q.filter(Student.student_id == student_id)
             
@@ -96,9 +101,9 @@ def get_attendance(current_user):
         if date_str:
             # Daily View (Specific Date)
             target_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-            records = Attendance.query.filter(
-                Attendance.student_id.in_(student_ids),
-                Attendance.date == target_date
+            records = db.session.query(AttendanceRow).filter(
+                AttendanceRow.student_id.in_(student_ids),
+                AttendanceRow.date == target_date
             ).all()
             
             # Map student_id -> status
@@ -107,10 +112,10 @@ def get_attendance(current_user):
                 
         elif month_str and year_str:
             # Monthly View
-            records = Attendance.query.filter(
-                Attendance.student_id.in_(student_ids),
-                db.extract('year', Attendance.date) == int(year_str),
-                db.extract('month', Attendance.date) == int(month_str)
+            records = db.session.query(AttendanceRow).filter(
+                AttendanceRow.student_id.in_(student_ids),
+                db.extract('year', AttendanceRow.date) == int(year_str),
+                db.extract('month', AttendanceRow.date) == int(month_str)
             ).all()
             
             # Map student_id -> { date: status }
@@ -121,10 +126,10 @@ def get_attendance(current_user):
         
         # If student_id is provided, we might want all history if no date/month specified
         elif student_id:
-             records = Attendance.query.filter(
-                Attendance.student_id == student_id,
-                Attendance.academic_year == h_year
-            ).order_by(Attendance.date.desc()).all()
+             records = db.session.query(AttendanceRow).filter(
+                AttendanceRow.student_id == student_id,
+                AttendanceRow.academic_year == h_year
+            ).order_by(AttendanceRow.date.desc()).all()
              
              if int(student_id) not in attendance_data:
                  attendance_data[int(student_id)] = {}
@@ -269,47 +274,48 @@ def save_attendance(current_user):
                 return jsonify({"error": f"Branch '{h_branch}' not found. Cannot validate attendance against weekoff/holiday rules."}), 400
             check_branch_id = branch_obj.id
 
-        # 3. Process Batch
-        for item in valid_items:
-            key = (item["student_id"], item["date"])
-            status = item["status"]
+        # 3. Process Batch (one summarized audit event instead of a row per record)
+        with AuditService.bulk("attendance", module="ATTENDANCE", branch=h_branch, academic_year=h_year):
+            for item in valid_items:
+                key = (item["student_id"], item["date"])
+                status = item["status"]
 
-            # 3a. Check weekoff / holiday
-            s_branch_id = check_branch_id if h_branch not in ("All", "All Branches") else student_branch_map.get(item["student_id"])
-            if s_branch_id:
-                date_check = is_weekoff_or_holiday(item["date"], s_branch_id, h_year)
-                if date_check["is_weekoff"] or date_check["is_holiday"]:
-                    skipped_count += 1
-                    skip_details.append(f"Date {item['date']} blocked: {date_check['reason']}")
-                    continue
+                # 3a. Check weekoff / holiday
+                s_branch_id = check_branch_id if h_branch not in ("All", "All Branches") else student_branch_map.get(item["student_id"])
+                if s_branch_id:
+                    date_check = is_weekoff_or_holiday(item["date"], s_branch_id, h_year)
+                    if date_check["is_weekoff"] or date_check["is_holiday"]:
+                        skipped_count += 1
+                        skip_details.append(f"Date {item['date']} blocked: {date_check['reason']}")
+                        continue
 
-            record_branch = h_branch
-            if h_branch in ("All", "All Branches"):
-                s_obj = students_obj_map.get(item["student_id"])
-                record_branch = s_obj.branch if s_obj and s_obj.branch else "Main"
+                record_branch = h_branch
+                if h_branch in ("All", "All Branches"):
+                    s_obj = students_obj_map.get(item["student_id"])
+                    record_branch = s_obj.branch if s_obj and s_obj.branch else "Main"
 
-            if key in record_map:
-                # Update
-                record = record_map[key]
-                if record.status != status:
-                    record.status = status
-                    record.update_count = (record.update_count or 0) + 1
-                    record.updated_at = get_now()
-                    updated_count += 1
-            else:
-                # Insert
-                new_record = Attendance(
-                    student_id=item["student_id"],
-                    date=item["date"],
-                    status=status,
-                    update_count=0,
-                    updated_at=get_now(),
-                    branch=record_branch,
-                    academic_year=h_year,
-                    location=current_user.location if current_user.location else get_default_location()
-                )
-                db.session.add(new_record)
-                added_count += 1
+                if key in record_map:
+                    # Update
+                    record = record_map[key]
+                    if record.status != status:
+                        record.status = status
+                        record.update_count = (record.update_count or 0) + 1
+                        record.updated_at = get_now()
+                        updated_count += 1
+                else:
+                    # Insert
+                    new_record = Attendance(
+                        student_id=item["student_id"],
+                        date=item["date"],
+                        status=status,
+                        update_count=0,
+                        updated_at=get_now(),
+                        branch=record_branch,
+                        academic_year=h_year,
+                        location=current_user.location if current_user.location else get_default_location()
+                    )
+                    db.session.add(new_record)
+                    added_count += 1
         
         db.session.commit()
         print(f"Bulk Save Logic: Added={added_count}, Updated={updated_count}, Skipped={skipped_count}")
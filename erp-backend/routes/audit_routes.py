@@ -0,0 +1,187 @@
+import base64
+from datetime import datetime, timedelta
+
+from flask import Blueprint, jsonify, request
+from sqlalchemy import select, and_, or_
+from extensions import db
+from models import AuditLog, User
+from helpers import token_required
+from services.audit_archive_service import AuditArchiveService
+from services.response_service import ResponseService
+
+bp = Blueprint('audit_routes', __name__)
+
+DEFAULT_AUDIT_PAGE_SIZE = 100
+MAX_AUDIT_PAGE_SIZE = 1000
+# Rows fetched per round trip while streaming a page
+AUDIT_STREAM_BATCH = 200
+
+FILTER_FIELDS = ("module", "table_name", "record_id", "action")
+
+
+def encode_cursor(timestamp, audit_id):
+    return base64.urlsafe_b64encode(f"{timestamp.isoformat()}|{audit_id}".encode()).decode()
+
+
+def decode_cursor(cursor):
+    """(timestamp, id) of the last row of the previous page"""
+    ts, audit_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+    return datetime.fromisoformat(ts), int(audit_id)
+
+
+def parse_time(value, end=False):
+    """Accepts YYYY-MM-DD (whole day, inclusive) or a full ISO timestamp."""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if end and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
+
+
+def audit_select():
+    audit = AuditLog.__table__
+    return select(
+        audit.c.id, audit.c.table_name, audit.c.record_id, audit.c.module, audit.c.action,
+        audit.c.old_data, audit.c.new_data, audit.c.user_id, User.username,
+        audit.c.ip_address, audit.c.timestamp
+    ).select_from(audit.outerjoin(User.__table__, User.user_id == audit.c.user_id))
+
+
+def row_to_dict(row):
+    return {
+        "id": row.id,
+        "table_name": row.table_name,
+        "record_id": row.record_id,
+        "module": row.module,
+        "action": row.action,
+        "old_data": row.old_data,
+        "new_data": row.new_data,
+        "user_id": row.user_id,
+        "username": row.username,
+        "ip_address": row.ip_address,
+        "timestamp": row.timestamp.isoformat() if row.timestamp else None
+    }
+
+
+def keyset_condition(cursor, descending):
+    """
+    Rows strictly after the cursor in (timestamp, id) order. The leading
+    timestamp bound lets the index seek straight to the cursor position.
+    """
+    ts, audit_id = cursor
+    audit = AuditLog.__table__
+    if descending:
+        return and_(audit.c.timestamp <= ts, or_(audit.c.timestamp < ts, audit.c.id < audit_id))
+    return and_(audit.c.timestamp >= ts, or_(audit.c.timestamp > ts, audit.c.id > audit_id))
+
+
+def stream_page(stmt, limit, head=None):
+    """
+    Streams {"results": [...], "next_cursor": ...} row by row. One extra
+    row is fetched to tell whether another page exists.
+    """
+    result = db.session.execute(stmt.limit(limit + 1).execution_options(yield_per=AUDIT_STREAM_BATCH))
+    page = {"sent": 0, "last": None, "has_more": False}
+
+    def records():
+        yield from head or []
+        for row in result:
+            if page["sent"] == limit:
+                page["has_more"] = True
+                break
+            yield row_to_dict(row)
+            page["sent"] += 1
+            page["last"] = row
+        result.close()
+
+    def tail():
+        last = page["last"]
+        next_cursor = encode_cursor(last.timestamp, last.id) if page["has_more"] and last is not None else None
+        return {"count": page["sent"] + len(head or []), "next_cursor": next_cursor}
+
+    return ResponseService.stream_json(records(), "results", tail, chunk_size=AUDIT_STREAM_BATCH)
+
+
+def page_args():
+    limit = min(max(request.args.get("limit", DEFAULT_AUDIT_PAGE_SIZE, type=int), 1), MAX_AUDIT_PAGE_SIZE)
+    cursor = request.args.get("cursor")
+    return limit, decode_cursor(cursor) if cursor else None
+
+
+# =========================================================
+# AUDIT TRAIL SEARCH
+# =========================================================
+@bp.route("/api/audit", methods=["GET"])
+@token_required
+def get_audit_logs(current_user):
+    """
+    Audit trail newest first.
+    Filters: module, table_name, record_id, action, user_id,
+    from_date / to_date (YYYY-MM-DD or ISO timestamp).
+    Paging: limit (max 1000) and the next_cursor of the previous page as ?cursor=.
+    """
+    if current_user.role != 'Admin':
+        return jsonify({"error": "Admin required"}), 403
+
+    try:
+        limit, cursor = page_args()
+        start = parse_time(request.args.get("from_date"))
+        end = parse_time(request.args.get("to_date"), end=True)
+    except ValueError:
+        return jsonify({"error": "Invalid cursor or date"}), 400
+
+    audit = AuditLog.__table__
+    conditions = [audit.c[field] == request.args[field] for field in FILTER_FIELDS if request.args.get(field)]
+    if (user_id := request.args.get("user_id", type=int)) is not None:
+        conditions.append(audit.c.user_id == user_id)
+    if start:
+        conditions.append(audit.c.timestamp >= start)
+    if end:
+        conditions.append(audit.c.timestamp < end)
+    if cursor:
+        conditions.append(keyset_condition(cursor, descending=True))
+
+    stmt = audit_select().where(*conditions).order_by(audit.c.timestamp.desc(), audit.c.id.desc())
+    try:
+        return stream_page(stmt, limit)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+# =========================================================
+# PER-RECORD TIMELINE
+# =========================================================
+@bp.route("/api/audit/timeline/<table_name>/<record_id>", methods=["GET"])
+@token_required
+def get_record_timeline(current_user, table_name, record_id):
+    """
+    Every change to one record, oldest first, read from idx_audit_table_record.
+    include_archived=true prepends history already moved to archive files
+    (first page only).
+    """
+    if current_user.role != 'Admin':
+        return jsonify({"error": "Admin required"}), 403
+
+    try:
+        limit, cursor = page_args()
+    except ValueError:
+        return jsonify({"error": "Invalid cursor"}), 400
+
+    audit = AuditLog.__table__
+    conditions = [audit.c.table_name == table_name, audit.c.record_id == record_id]
+    if cursor:
+        conditions.append(keyset_condition(cursor, descending=False))
+
+    head = None
+    if not cursor and request.args.get("include_archived", "false").lower() == "true":
+        archived = AuditArchiveService.search(
+            limit=MAX_AUDIT_PAGE_SIZE, include_hot=False, table_name=table_name, record_id=record_id
+        )
+        head = list(reversed(archived))
+
+    stmt = audit_select().where(*conditions).order_by(audit.c.timestamp.asc(), audit.c.id.asc())
+    try:
+        return stream_page(stmt, limit, head)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
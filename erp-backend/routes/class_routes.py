@@ -4,6 +4,7 @@ from models import ClassMaster, ClassSection, Branch, Student, OrgMaster, User
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy import func
 from helpers import token_required
+from services.cache_service import cached_resource
               
 bp = Blueprint("class_routes", __name__)
 
@@ -340,6 +341,7 @@ def copy_branch_structure(current_user):
         return jsonify({"error": str(e)}), 500
 
 @bp.route("/api/classes", methods=["GET"])
+@cached_resource("classes")
 def get_classes():
     """
     Get all classes (ClassMaster).
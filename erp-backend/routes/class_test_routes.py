@@ -4,11 +4,13 @@ from models import ClassTest, ClassMaster, TestType, OrgMaster, Branch, User, Cl
 import sqlalchemy
 from datetime import datetime
 from helpers import token_required
+from services.cache_service import cached_resource
  
 class_test_bp = Blueprint('class_test_bp', __name__)
 
 
 @class_test_bp.route('/matrix', methods=['GET'])
+@cached_resource("class_tests")
 def get_matrix():
     try:
         academic_year = request.args.get('academic_year')
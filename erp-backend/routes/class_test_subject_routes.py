@@ -13,6 +13,7 @@ from models import (
     OrgMaster
 )
 from helpers import token_required
+from services.cache_service import cached_resource
 # -------------------------------------------------
 # Blueprint
 # -------------------------------------------------
@@ -28,6 +29,7 @@ class_test_subject_bp = Blueprint(
 # GET : Load Matrix
 # -------------------------------------------------
 @class_test_subject_bp.route('/', methods=['GET'])
+@cached_resource("class_tests")
 def get_matrix():
     try:
         academic_year_id = request.args.get('academic_year_id')
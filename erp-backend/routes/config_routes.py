@@ -1,7 +1,8 @@
 from flask import Blueprint, jsonify, request
 from extensions import db, get_today, get_now, to_local_time
-from models import WeeklyOffRule, HolidayCalendar, Branch, ClassMaster
+from models import WeeklyOffRule, HolidayCalendar, Branch
 from helpers import token_required, require_academic_year, get_default_location
+from services.org_registry_service import OrgRegistryService
 from datetime import datetime, date
 from sqlalchemy import and_, or_
 
@@ -20,8 +21,8 @@ def weekoff_to_dict(rule):
     week_label = WEEK_LABELS.get(rule.week_number, f"Week-{rule.week_number}")
     title = f"{week_label} – {day_name}" if rule.week_number else f"All – {day_name}"
 
-    branch = Branch.query.get(rule.branch_id)
-    branch_name = branch.branch_name if branch else str(rule.branch_id)
+    branch = OrgRegistryService.branch(rule.branch_id)
+    branch_name = branch.name if branch else str(rule.branch_id)
 
     return {
         "id": rule.id,
@@ -43,8 +44,8 @@ def weekoff_to_dict(rule):
 
 
 def holiday_to_dict(h):
-    branch = Branch.query.get(h.branch_id)
-    branch_name = branch.branch_name if branch else str(h.branch_id)
+    branch = OrgRegistryService.branch(h.branch_id)
+    branch_name = branch.name if branch else str(h.branch_id)
 
     return {
         "id": h.id,
@@ -352,7 +353,7 @@ def check_date(current_user):
         # Resolve class
         class_id = None
         if class_name:
-            cls = ClassMaster.query.filter_by(class_name=class_name).first()
+            cls = OrgRegistryService.class_(class_name)
             if cls:
                 class_id = cls.id
 
@@ -410,7 +411,7 @@ def check_month(current_user):
         # Resolve class
         class_id = None
         if class_name:
-            cls = ClassMaster.query.filter_by(class_name=class_name).first()
+            cls = OrgRegistryService.class_(class_name)
             if cls:
                 class_id = cls.id
 
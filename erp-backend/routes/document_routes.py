@@ -1,7 +1,8 @@
 from flask import Blueprint, request, jsonify, send_file, current_app
 from extensions import db, get_now, to_local_time
-from models import DocumentType, StudentDocument, Student, User, Branch, UserBranchAccess
+from models import DocumentType, StudentDocument, Student, User
 from helpers import token_required
+from services.branch_access_service import BranchAccessService
 from datetime import datetime
 import os
 import uuid
@@ -38,22 +39,7 @@ def get_media_base():
 def can_access_student(current_user, student):
     if not student:
         return False
-    if current_user.role == 'Admin' or current_user.branch == 'All':
-        return True
-    if student.branch == current_user.branch:
-        return True
-
-    branch_obj = Branch.query.filter(
-        (Branch.branch_code == student.branch) | (Branch.branch_name == student.branch)
-    ).first()
-    if not branch_obj:
-        return False
-
-    return UserBranchAccess.query.filter_by(
-        user_id=current_user.user_id,
-        branch_id=branch_obj.id,
-        is_active=True
-    ).first() is not None
+    return BranchAccessService.can_access(current_user, student.branch)
 
 
 # ==========================================
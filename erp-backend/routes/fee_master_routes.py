@@ -2,6 +2,8 @@ from flask import Blueprint, jsonify, request
 from extensions import db, to_local_time
 from models import FeeType, ClassFeeStructure, StudentFee, FeeInstallment, Concession, Branch, OrgMaster, Student
 from helpers import fee_type_to_dict
+from services.cache_service import cached_resource, conditional_get
+from services.audit_service import AuditService
 from helpers import token_required, require_academic_year, generate_installments, shift_installments, assign_fee_to_student, normalize_fee_title, get_default_location
 from datetime import datetime
 from sqlalchemy import or_, and_, select
@@ -17,6 +19,7 @@ MONTHS = [
 
 @bp.route("/api/fee-types", methods=["GET"])
 @token_required
+@conditional_get("fee_types")
 def get_fee_types(current_user):
     # Header Filtering
     h_branch = request.headers.get("X-Branch")
@@ -157,6 +160,7 @@ def delete_fee_type(current_user, fee_type_id):
 
 @bp.route("/api/class-fee-structure", methods=["GET"])
 @token_required 
+@conditional_get("fee_structures")
 def get_class_fee_structure(current_user): 
     class_name = request.args.get("class")
     
@@ -261,10 +265,12 @@ def _auto_assign_students_bulk(fs, is_new_admission):
     students = students_query.all()
     print(f"DEBUG: Found {len(students)} students in Class {fs.clazz} (Branch: {fs.branch}) for auto-assignment.")
     
-    for s in students:
-        if fs.branch and fs.branch != "All" and s.branch != fs.branch:
-            continue
-        assign_fee_to_student(s.student_id, fs, is_student_new=False)
+    # One summarized audit event for the whole class instead of a row per fee line
+    with AuditService.bulk("studentfees", module="FEES", class_fee_structure_id=fs.id, clazz=fs.clazz, branch=fs.branch):
+        for s in students:
+            if fs.branch and fs.branch != "All" and s.branch != fs.branch:
+                continue
+            assign_fee_to_student(s.student_id, fs, is_student_new=False)
 
 @bp.route("/api/class-fee-structure", methods=["POST"])
 @token_required
@@ -374,6 +380,7 @@ def delete_class_fee_structure(current_user, id):
 
 @bp.route("/api/concessions", methods=["GET"])
 @token_required
+@cached_resource("concessions")
 def get_concessions(current_user):
     academic_year, err, code = require_academic_year()
     if err:
@@ -550,6 +557,7 @@ def update_concession(current_user, original_title, original_year):
 
 @bp.route("/api/installment-schedule", methods=["GET"])
 @token_required
+@cached_resource("installment_schedule")
 def get_installments(current_user):
     try:
         fee_type_id = request.args.get('fee_type_id')
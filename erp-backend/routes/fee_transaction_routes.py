@@ -1,17 +1,21 @@
 from flask import Blueprint, jsonify, request
 from extensions import db, get_now, get_today
-from models import Student, StudentFee, FeePayment, Branch, FeeInstallment, Concession, ClassFeeStructure, StudentAcademicRecord, FeeType
+from models import Student, StudentFee, FeePayment, Branch, FeeInstallment, Concession, ClassFeeStructure, StudentAcademicRecord, FeeType, StudentFeeBalance
 from helpers import token_required, require_academic_year, normalize_fee_title, assign_fee_to_student, require_editable_student, ensure_student_editable
 from services.sequence_service import SequenceService
+from services.year_archive_service import YearArchiveService
+from services.cache_service import conditional_get
 from datetime import datetime, date
 from decimal import Decimal
 from sqlalchemy import func, or_, and_
+from sqlalchemy.orm import joinedload
 import traceback
 
 bp = Blueprint('fee_transaction_routes', __name__)
 
 @bp.route("/api/fees/students", methods=["GET"])
 @token_required
+@conditional_get("students", "fee_balances")
 def get_fee_students(current_user):
     """List students with fee summary"""
     class_name = request.args.get("class")
@@ -33,29 +37,22 @@ def get_fee_students(current_user):
          h_branch = "All"
     
     # HISTORY-AWARE QUERY
-    # query selects: Student, StudentAcademicRecord, total, paid, due, concession
+    # Fee totals come from the maintained student_fee_balance ledger (one row per student/year),
+    # so this is a keyed join instead of a SUM over every studentfees row.
     q = db.session.query(
         Student,
         StudentAcademicRecord,
-        func.sum(StudentFee.total_fee).label("total"),
-        func.sum(StudentFee.paid_amount).label("paid"),
-        func.sum(StudentFee.due_amount).label("due"),
-        func.sum(StudentFee.concession).label("concession"),
+        StudentFeeBalance,
     ).join(StudentAcademicRecord, Student.student_id == StudentAcademicRecord.student_id)\
-     .outerjoin(StudentFee, (Student.student_id == StudentFee.student_id) & (StudentFee.academic_year == h_year) & (StudentFee.is_active == True)) # Filter fees by year in join itself? 
-     # Actually StudentFee has academic_year. joining on year ensures we sum fees for THAT year.
-     # BUT we used to use WHERE clause for that.
-     
-    # Let's stick to WHERE for StudentFee filtering for safety, but the join above is crucial for StudentAcademicRecord
-    
+     .outerjoin(StudentFeeBalance, and_(
+         StudentFeeBalance.student_id == Student.student_id,
+         StudentFeeBalance.academic_year == h_year
+     ))
+
     # FIX: STRICT CROSS-TABLE YEAR FILTERING
     q = q.filter(
         StudentAcademicRecord.academic_year == h_year, # Filter by Record's year
         Student.status == "Active", # Soft Delete Support
-        or_(
-            StudentFee.academic_year == h_year,
-            StudentFee.academic_year.is_(None) # allow null? usually fees have year.
-        )
     )
 
     # STRICT BRANCH SEGREGATION
@@ -87,11 +84,15 @@ def get_fee_students(current_user):
             )
         )
     
-    q = q.group_by(Student.student_id, StudentAcademicRecord.id) # Group by record too for safety
     rows = q.all()
     
-    output = [
-        {
+    output = []
+    for s, record, bal in rows:
+        total = float(bal.total_fee) if bal else 0.0
+        paid = float(bal.paid_amount) if bal else 0.0
+        due = float(bal.due_amount) if bal else 0.0
+        concession = float(bal.concession) if bal else 0.0
+        output.append({
             "student_id": s.student_id, 
             "name": f"{s.first_name} {s.last_name}".strip(),
             "fatherName": s.Fatherfirstname,
@@ -100,20 +101,19 @@ def get_fee_students(current_user):
             "branch": s.branch,
             "class": record.class_name,
             "section": record.section,
-            "total_fee": float(total or 0),
-            "paid_amount": float(paid or 0),
-            "due_amount": float(due or 0),
-            "concession": float(concession or 0),
-            "status": "Paid" if float(due or 0) <= 0 else "Partial" if float(paid or 0) > 0 else "Pending",
-        }
-        for s, record, total, paid, due, concession in rows
-    ]
+            "total_fee": total,
+            "paid_amount": paid,
+            "due_amount": due,
+            "concession": concession,
+            "status": "Paid" if due <= 0 else "Partial" if paid > 0 else "Pending",
+        })
     
     return jsonify(output), 200
 
 
 @bp.route("/api/fees/student-details/<int:student_id>", methods=["GET"])
 @token_required
+@conditional_get((Student, "student_id"), (StudentFee, "student_id"), "fee_types", "installment_schedule", "year_archives")
 def get_student_fees_detail(current_user, student_id):
     """Get detailed fee installments for a student with proper sorting"""
     try:
@@ -125,11 +125,14 @@ def get_student_fees_detail(current_user, student_id):
             if not student or (current_user.branch != 'All' and student.branch != current_user.branch):
                 return jsonify({"error": "Unauthorized access to student data"}), 403
         
+        # Closed years live in the archive tables; Fee reads both
+        Fee = YearArchiveService.source(StudentFee, h_year or None)
+
         # Use join to filter by Student's branch
-        q = StudentFee.query.join(Student).filter(StudentFee.student_id == student_id, StudentFee.is_active == True)
+        q = db.session.query(Fee).join(Fee.student).filter(Fee.student_id == student_id, Fee.is_active == True)
         
         if h_year:
-            q = q.filter(StudentFee.academic_year == h_year)
+            q = q.filter(Fee.academic_year == h_year)
             
         student_fees = q.all()
         
@@ -209,15 +212,59 @@ def get_student_fees_detail(current_user, student_id):
         return jsonify({"error": str(e)}), 500
 
 
-def _process_fee_allocation(alloc, student, receipt_no, payment_mode, payment_date, note, transaction_details, current_user):
+def _prefetch_allocation_context(allocations, student):
+    """
+    Loads everything the allocations of one payment need in a fixed number of queries:
+    the referenced StudentFee rows (with fee types), the installment title -> id map and
+    the concession already recorded per (fee type, installment).
+    """
+    fee_ids = {a.get("student_fee_id") for a in allocations if a.get("student_fee_id")}
+    fees = StudentFee.query.options(joinedload(StudentFee.fee_type))\
+        .filter(StudentFee.id.in_(fee_ids)).all() if fee_ids else []
+    fee_map = {sf.id: sf for sf in fees}
+
+    months = {sf.month for sf in fees if sf.month}
+    inst_map = {}
+    if months:
+        for inst in FeeInstallment.query.filter(
+            FeeInstallment.title.in_(months),
+            FeeInstallment.academic_year == student.academic_year
+        ).order_by(FeeInstallment.id).all():
+            inst_map.setdefault(inst.title, inst.id)
+
+    fee_type_names = {sf.fee_type.feetype if sf.fee_type else "General" for sf in fees}
+    inst_names = {sf.month or "One-Time" for sf in fees}
+    concession_map = {}
+    if fees:
+        concession_map = {
+            (ftype, inst): Decimal(total or 0)
+            for ftype, inst, total in db.session.query(
+                FeePayment.fee_type, FeePayment.installment_name, func.sum(FeePayment.concession_amount)
+            ).filter(
+                FeePayment.student_id == student.student_id,
+                FeePayment.academic_year == student.academic_year,
+                FeePayment.fee_type.in_(fee_type_names),
+                FeePayment.installment_name.in_(inst_names)
+            ).group_by(FeePayment.fee_type, FeePayment.installment_name).all()
+        }
+
+    return {"fees": fee_map, "installments": inst_map, "concessions": concession_map}
+
+
+def _process_fee_allocation(alloc, student, context, payment_mode, payment_date, note, transaction_details, current_user):
+    """
+    Applies one allocation to its prefetched StudentFee and builds the matching FeePayment line.
+    Runs entirely in memory. The line is returned unsaved (no receipt number yet) so the caller
+    can insert all lines together and allocate the receipt number last.
+    """
     amount = Decimal(str(alloc.get("amount", 0)))
     concession_val = Decimal(str(alloc.get("concession_amount", 0)))
     if amount <= 0 and concession_val <= 0:
-        return Decimal(0)
+        return Decimal(0), None
 
-    sf = StudentFee.query.get(alloc.get("student_fee_id"))
+    sf = context["fees"].get(alloc.get("student_fee_id"))
     if not sf or not sf.is_active:
-        return Decimal(0)
+        return Decimal(0), None
 
     sf.paid_amount = (sf.paid_amount or Decimal(0)) + amount
     sf.concession = (sf.concession or Decimal(0)) + concession_val
@@ -226,35 +273,30 @@ def _process_fee_allocation(alloc, student, receipt_no, payment_mode, payment_da
     sf.due_amount = max(Decimal(0), total_fee - (sf.paid_amount + sf.concession))
     sf.status = "Paid" if sf.due_amount <= 0 else "Partial" if sf.paid_amount > 0 else "Pending"
     
-    inst_id = None
-    if sf.month:
-         if inst := FeeInstallment.query.filter_by(title=sf.month, academic_year=student.academic_year).first():
-             inst_id = inst.id
+    inst_id = context["installments"].get(sf.month) if sf.month else None
 
     fee_type_name = sf.fee_type.feetype if sf.fee_type else "General"
+    concession_key = (fee_type_name, sf.month or "One-Time")
     final_concession_amount = concession_val
     
     if sf.due_amount <= 0:
-        prev_recorded = db.session.query(func.sum(FeePayment.concession_amount))\
-            .filter(
-                FeePayment.student_id == student.student_id,
-                FeePayment.fee_type == fee_type_name,
-                FeePayment.installment_name == (sf.month or "One-Time"),
-                FeePayment.academic_year == student.academic_year
-            ).scalar() or 0
+        prev_recorded = context["concessions"].get(concession_key, Decimal(0))
         
-        unrecorded = (sf.concession or Decimal(0)) - Decimal(prev_recorded) - final_concession_amount
+        unrecorded = (sf.concession or Decimal(0)) - prev_recorded - final_concession_amount
         if unrecorded > 0:
             final_concession_amount += unrecorded
 
+    # Later allocations of the same payment must see this line's concession as recorded
+    context["concessions"][concession_key] = context["concessions"].get(concession_key, Decimal(0)) + final_concession_amount
+
     payment_entry = FeePayment(
-        receipt_no=receipt_no,
         branch=student.branch,
         location=student.location,
         academic_year=sf.academic_year or student.academic_year,
         student_id=student.student_id,
         class_name=student.clazz,
         section=student.section,
+        student_fee_id=sf.id,
         installment_id=inst_id,
         installment_name=sf.month or "One-Time",
         fee_type=fee_type_name,
@@ -272,8 +314,7 @@ def _process_fee_allocation(alloc, student, receipt_no, payment_mode, payment_da
         collected_by=current_user.user_id,
         collected_by_name=current_user.username 
     )
-    db.session.add(payment_entry)
-    return amount
+    return amount, payment_entry
 
 @bp.route("/api/fees/payment", methods=["POST"])
 @token_required
@@ -339,12 +380,22 @@ def record_fee_payment(current_user):
         if not branch_id:
                 return jsonify({"error": f"Branch {student.branch} not found"}), 400
 
+        context = _prefetch_allocation_context(allocations, student)
+        total_allocated = Decimal(0)
+        entries = []
+        for alloc in allocations:
+            amount, entry = _process_fee_allocation(alloc, student, context, payment_mode, payment_date, note, transaction_details, current_user)
+            total_allocated += amount
+            if entry is not None:
+                entries.append(entry)
+
+        # Allocate the receipt number only once all fee rows are prepared, right before commit.
+        # In gapless mode this is when the sequence row gets locked, so the lock covers the
+        # final inserts only; in gap-tolerant mode the number is taken in its own transaction.
         receipt_no = SequenceService.generate_receipt_number(branch_id, ay_id, include_prefix=False)
-
-        total_allocated = sum(
-            _process_fee_allocation(alloc, student, receipt_no, payment_mode, payment_date, note, transaction_details, current_user)
-            for alloc in allocations
-        )
+        for entry in entries:
+            entry.receipt_no = receipt_no
+        db.session.add_all(entries) # Flushed together as one batch on commit
         
         db.session.commit()
         
@@ -363,6 +414,7 @@ def record_fee_payment(current_user):
 
 @bp.route("/api/fees/payments/<int:student_id>", methods=["GET"])
 @token_required
+@conditional_get((FeePayment, "student_id"), (StudentFee, "student_id"), "year_archives")
 def get_student_payment_history(current_user, student_id):
     """Fetch all payments for a student"""
     try:
@@ -375,28 +427,29 @@ def get_student_payment_history(current_user, student_id):
         # Filter by Academic Year (SMART FILTER)
         h_year = request.headers.get("X-Academic-Year")
         show_cancelled = request.args.get("show_cancelled", "false").lower() == "true"
+        # Closed years live in the archive tables; these read both
+        Payment = YearArchiveService.source(FeePayment, h_year or None)
+        Fee = YearArchiveService.source(StudentFee, h_year or None)
         
-        query = FeePayment.query.filter_by(student_id=student_id)
+        query = db.session.query(Payment).filter_by(student_id=student_id)
 
         if not show_cancelled:
-            query = query.filter(FeePayment.status == 'A')
+            query = query.filter(Payment.status == 'A')
         
         if h_year:
-            relevant_fees = db.session.query(StudentFee.month, FeeType.feetype)\
-                .join(FeeType)\
-                .filter(StudentFee.student_id == student_id, StudentFee.academic_year == h_year)\
-                .all()
-            
-            relevant_keys = [(month or "One-Time", ftype) for month, ftype in relevant_fees]
-            
-            conditions = [FeePayment.academic_year == h_year, FeePayment.academic_year.is_(None)]
-            
-            if relevant_keys:
-                conditions.extend(and_(FeePayment.installment_name == inst, FeePayment.fee_type == ftype) for inst, ftype in relevant_keys)
+            # Payments of this year, plus any line linked to one of this year's fee rows
+            year_fee_ids = db.session.query(Fee.id).filter(
+                Fee.student_id == student_id,
+                Fee.academic_year == h_year
+            )
             
-            query = query.filter(or_(*conditions))
+            query = query.filter(or_(
+                Payment.academic_year == h_year,
+                Payment.academic_year.is_(None),
+                Payment.student_fee_id.in_(year_fee_ids)
+            ))
             
-        payments = query.order_by(FeePayment.payment_date.desc(), FeePayment.id.desc()).all()
+        payments = query.order_by(Payment.payment_date.desc(), Payment.id.desc()).all()
         
         output = [{
             "payment_id": p.id,
@@ -458,23 +511,29 @@ def delete_fee_payment(current_user, payment_id):
 
         # Revert Logic
         # Find the linked StudentFee record
-        # We match on student_id, academic_year, fee_type, and installment
-        
-        # NOTE: payment.installment_name is "One-Time" if sf.month was None or "One-Time"
-        
-        sf_query = StudentFee.query.join(FeeType).filter(
-            StudentFee.student_id == payment.student_id,
-            StudentFee.academic_year == payment.academic_year,
-            FeeType.feetype == payment.fee_type,
-            StudentFee.is_active == True
-        )
-        
-        if payment.installment_name == "One-Time":
-             sf_query = sf_query.filter(or_(StudentFee.month == "One-Time", StudentFee.month.is_(None)))
+        sf = None
+        if payment.student_fee_id:
+            # Direct link written at payment time (or by the backfill migration)
+            sf = StudentFee.query.get(payment.student_fee_id)
+            if sf and not sf.is_active:
+                sf = None
         else:
-             sf_query = sf_query.filter(StudentFee.month == payment.installment_name)
+            # Legacy line that could not be linked: match on student_id, academic_year, fee_type, and installment
+            # NOTE: payment.installment_name is "One-Time" if sf.month was None or "One-Time"
+            sf_query = StudentFee.query.join(FeeType).filter(
+                StudentFee.student_id == payment.student_id,
+                StudentFee.academic_year == payment.academic_year,
+                FeeType.feetype == payment.fee_type,
+                StudentFee.is_active == True
+            )
+            
+            if payment.installment_name == "One-Time":
+                 sf_query = sf_query.filter(or_(StudentFee.month == "One-Time", StudentFee.month.is_(None)))
+            else:
+                 sf_query = sf_query.filter(StudentFee.month == payment.installment_name)
+            sf = sf_query.first()
              
-        if sf := sf_query.first():
+        if sf:
             # Revert amounts
             sf.paid_amount = (sf.paid_amount or Decimal(0)) - payment.amount_paid
             sf.concession = (sf.concession or Decimal(0)) - (payment.concession_amount or Decimal(0))
@@ -506,6 +565,72 @@ def delete_fee_payment(current_user, payment_id):
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
 
+@bp.route("/api/fees/reconcile/<int:student_id>", methods=["GET"])
+@token_required
+def reconcile_student_fees(current_user, student_id):
+    """Compare each fee row's paid/concession totals with its active payment lines"""
+    try:
+        h_year, err, code = require_academic_year()
+        if err:
+            return err, code
+
+        student = Student.query.get(student_id)
+        if not student:
+            return jsonify({"error": "Student not found"}), 404
+
+        if current_user.role != 'Admin' and current_user.branch != 'All' and student.branch != current_user.branch:
+            return jsonify({"error": "Unauthorized"}), 403
+
+        paid_by_fee = db.session.query(
+            FeePayment.student_fee_id,
+            func.sum(FeePayment.amount_paid),
+            func.sum(FeePayment.concession_amount),
+            func.count(FeePayment.id)
+        ).filter(
+            FeePayment.student_fee_id.in_(
+                db.session.query(StudentFee.id).filter(
+                    StudentFee.student_id == student_id,
+                    StudentFee.academic_year == h_year
+                )
+            ),
+            FeePayment.status == 'A'
+        ).group_by(FeePayment.student_fee_id).all()
+        totals = {fid: (Decimal(paid or 0), Decimal(conc or 0), cnt) for fid, paid, conc, cnt in paid_by_fee}
+
+        rows = []
+        for sf in StudentFee.query.filter_by(student_id=student_id, academic_year=h_year, is_active=True).order_by(StudentFee.id).all():
+            paid, conc, count = totals.get(sf.id, (Decimal(0), Decimal(0), 0))
+            fee_paid = sf.paid_amount or Decimal(0)
+            rows.append({
+                "student_fee_id": sf.id,
+                "month": sf.month,
+                "fee_type_id": sf.fee_type_id,
+                "paid_amount": str(fee_paid),
+                "payments_total": str(paid),
+                "concession": str(sf.concession or Decimal(0)),
+                "payments_concession": str(conc),
+                "payment_lines": count,
+                "matched": fee_paid == paid
+            })
+
+        unlinked = FeePayment.query.filter(
+            FeePayment.student_id == student_id,
+            FeePayment.academic_year == h_year,
+            FeePayment.student_fee_id.is_(None),
+            FeePayment.status == 'A'
+        ).count()
+
+        return jsonify({
+            "student_id": student_id,
+            "fees": rows,
+            "mismatched": sum(1 for r in rows if not r["matched"]),
+            "unlinked_payments": unlinked
+        }), 200
+
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
+
 @bp.route("/api/fees/assign-special", methods=["POST"])
 @token_required
 def assign_special_fee(current_user):
@@ -3,6 +3,7 @@ from extensions import db, to_local_time
 from models import GradeScale, GradeScaleDetails
 from sqlalchemy.exc import IntegrityError
 from helpers import token_required
+from services.cache_service import cached_resource
 
 grade_scale_bp = Blueprint("grade_scale", __name__)
 
@@ -113,6 +114,7 @@ def create_grade_scale(current_user):
         return jsonify({"error": str(e)}), 500
 
 @grade_scale_bp.route("/api/grade-scales", methods=["GET"])
+@cached_resource("grade_scales")
 def get_grade_scales():
     try:
         academic_year = request.args.get("academic_year")
@@ -171,6 +173,7 @@ def get_grade_scales():
         return jsonify({"error": str(e)}), 500
 
 @grade_scale_bp.route("/api/grade-scales/<int:id>", methods=["GET"])
+@cached_resource("grade_scales")
 def get_grade_scale_details_route(id):
     try:
         scale = GradeScale.query.get(id)
@@ -2,6 +2,7 @@ from flask import Blueprint, jsonify, request
 from extensions import db
 from models import Branch, OrgMaster, User, UserBranchAccess, ClassMaster , ClassSection
 from helpers import token_required, require_academic_year, get_branch_query_filter
+from services.cache_service import cached_resource
 from datetime import date, datetime
 from sqlalchemy import or_ 
 
@@ -9,6 +10,7 @@ bp = Blueprint('org_routes', __name__)
 
 @bp.route("/api/branches", methods=["GET"])
 @token_required
+@cached_resource("branches")
 def get_all_branches(current_user):
     try:
         branches = Branch.query.filter_by(is_active=True).all()
@@ -30,6 +32,7 @@ def get_all_branches(current_user):
         return jsonify({"error": str(e)}), 500
 
 @bp.route("/api/org/locations", methods=["GET"])
+@cached_resource("locations")
 def get_all_locations():
     """Fetch all available locations from OrgMaster"""
     try:
@@ -44,6 +47,7 @@ def get_all_locations():
         return jsonify({"error": str(e)}), 500
 
 @bp.route("/api/org/academic-years", methods=["GET"])
+@cached_resource("academic_years")
 def get_all_academic_years():
     """Fetch all available academic years from OrgMaster"""
     try:
@@ -122,6 +126,7 @@ def seed_branches():
     }), 201
 
 @bp.route("/api/classes", methods=["GET"])
+@cached_resource("classes")
 def get_classes():
     from sqlalchemy import and_
     
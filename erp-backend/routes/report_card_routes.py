@@ -4,59 +4,41 @@ import mysql.connector
 from mysql.connector import Error 
 import os
 import logging
-from helpers import token_required
-from models import Branch, UserBranchAccess
+from helpers import token_required, read_replica
+from services.branch_access_service import BranchAccessService
+from services.replica_service import ReplicaService
+from services.year_archive_service import YearArchiveService
 
 report_bp = Blueprint('report', __name__)
 logger = logging.getLogger(__name__)
 
 
 def resolve_branch_scope(current_user, requested_branch=None):
-    if current_user.role == "Admin" or current_user.branch == "All":
+    access = BranchAccessService.for_user(current_user)
+    if access.unrestricted:
         return requested_branch
 
     if requested_branch and requested_branch not in ["All", "All Branches", current_user.branch]:
-        branch_obj = Branch.query.filter(
-            (Branch.branch_code == requested_branch) | (Branch.branch_name == requested_branch)
-        ).first()
-        if branch_obj:
-            access = UserBranchAccess.query.filter_by(
-                user_id=current_user.user_id,
-                branch_id=branch_obj.id,
-                is_active=True
-            ).first()
-            if access:
-                return branch_obj.branch_name
+        if branch_name := access.resolve(requested_branch):
+            return branch_name
 
     return current_user.branch
 
 
 def ensure_student_branch_access(current_user, student_branch):
-    if current_user.role == "Admin" or current_user.branch == "All":
-        return True
-    if not student_branch:
-        return False
-    if student_branch == current_user.branch:
-        return True
-
-    branch_obj = Branch.query.filter(
-        (Branch.branch_code == student_branch) | (Branch.branch_name == student_branch)
-    ).first()
-    if not branch_obj:
-        return False
-
-    if current_user.branch in [branch_obj.branch_code, branch_obj.branch_name]:
-        return True
-
-    access = UserBranchAccess.query.filter_by(
-        user_id=current_user.user_id,
-        branch_id=branch_obj.id,
-        is_active=True
-    ).first()
-    return access is not None
+    return BranchAccessService.can_access(current_user, student_branch)
 
 def get_db_connection():
-    """Create database connection"""
+    """Create database connection; @read_replica endpoints use the replica while it is healthy"""
+    replica = ReplicaService.replica_url()
+    if replica is not None and replica.get_backend_name() == "mysql":
+        return mysql.connector.connect(
+            host=replica.host,
+            database=replica.database,
+            user=replica.username,
+            password=replica.password,
+            port=replica.port or 3306
+        )
     return mysql.connector.connect(
         host=os.getenv('DB_HOST', 'localhost'),
         database=os.getenv('DB_NAME'),
@@ -67,6 +49,7 @@ def get_db_connection():
 # ============== GET STUDENTS FOR DROPDOWN ==============
 @report_bp.route('/api/students', methods=['GET'])
 @token_required
+@read_replica
 def get_students(current_user):
     """Get students by branch, class, section for dropdown"""
     branch = resolve_branch_scope(current_user, request.args.get('branch'))
@@ -81,7 +64,7 @@ def get_students(current_user):
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
         
-        query = """
+        query = f"""
             SELECT DISTINCT
                 s.student_id as id,
                 s.student_id,
@@ -91,7 +74,7 @@ def get_students(current_user):
                 COALESCE(sar.roll_number, s.Roll_Number) as roll_number,
                 s.admission_no
             FROM students s
-            LEFT JOIN student_academic_records sar 
+            LEFT JOIN {YearArchiveService.sql_source('student_academic_records', academic_year, 'sar')} 
                 ON s.student_id = sar.student_id AND sar.academic_year = %s
             WHERE s.status = 'Active'
         """
@@ -128,6 +111,7 @@ def get_students(current_user):
 # ============== GET COMPLETE STUDENT REPORT ==============
 @report_bp.route('/api/report/student', methods=['GET'])
 @token_required
+@read_replica
 def get_student_report(current_user):
     """Get complete student report data"""
     student_id = request.args.get('student_id')
@@ -148,7 +132,7 @@ def get_student_report(current_user):
         cursor = conn.cursor(dictionary=True)
         
         # ========== 1. Get Student Details ==========
-        student_query = """
+        student_query = f"""
             SELECT 
                 s.student_id,
                 CONCAT(COALESCE(s.first_name, ''), ' ', COALESCE(s.last_name, '')) as student_name,
@@ -162,7 +146,7 @@ def get_student_report(current_user):
                 s.admission_no,
                 s.location
             FROM students s
-            LEFT JOIN student_academic_records sar 
+            LEFT JOIN {YearArchiveService.sql_source('student_academic_records', academic_year, 'sar')} 
                 ON s.student_id = sar.student_id AND sar.academic_year = %s
             LEFT JOIN branches b ON (s.branch = b.branch_code OR s.branch = b.branch_name)
             WHERE s.student_id = %s
@@ -239,7 +223,7 @@ def get_student_report(current_user):
             grading_by_total[total].append(row)
         
         # ========== 4. Get all subjects for this test with marks ==========
-        subjects_query = """
+        subjects_query = f"""
             SELECT 
                 sm.id as subject_id,
                 sm.subject_name,
@@ -251,7 +235,7 @@ def get_student_report(current_user):
                 COALESCE(stm.is_absent, 0) as is_absent
             FROM class_test_subjects cts
             JOIN subjectmaster sm ON cts.subject_id = sm.id
-            LEFT JOIN student_marks stm ON stm.class_test_id = cts.class_test_id 
+            LEFT JOIN {YearArchiveService.sql_source('student_marks', academic_year, 'stm')} ON stm.class_test_id = cts.class_test_id 
                 AND stm.subject_id = sm.id 
                 AND stm.student_id = %s
             LEFT JOIN studentsubjectassignment ssa ON ssa.student_id = %s 
@@ -264,9 +248,9 @@ def get_student_report(current_user):
         cursor.execute(subjects_query, (student_id, student_id, academic_year, class_test_id))
         subjects = cursor.fetchall()
 
-        avg_query = """
+        avg_query = f"""
             SELECT subject_id, AVG(marks_obtained) as class_avg
-            FROM student_marks
+            FROM {YearArchiveService.sql_source('student_marks', academic_year)}
             WHERE class_test_id = %s AND is_absent = 0
             GROUP BY subject_id
         """
@@ -434,7 +418,7 @@ def get_student_report(current_user):
             total_absent = 0  
             total_days = 0  
         else:  
-            attendance_query = """  
+            attendance_query = f"""  
                 SELECT   
                 MONTHNAME(date) as month_name,  
                 MONTH(date) as month_num,  
@@ -442,7 +426,7 @@ def get_student_report(current_user):
                 COUNT(*) as total,  
                 SUM(CASE WHEN status = 'Present' THEN 1 ELSE 0 END) as present,  
                 SUM(CASE WHEN status IN ('Absent', 'Leave') THEN 1 ELSE 0 END) as absent  
-            FROM attendance  
+            FROM {YearArchiveService.sql_source('attendance', academic_year)}  
             WHERE student_id = %s AND academic_year = %s  
             """  
         att_params = [student_id, academic_year]  
@@ -476,7 +460,7 @@ def get_student_report(current_user):
             total_days += int(row['total'])
         
         # ========== 6. Get Student's Academic History ==========
-        history_query = """
+        history_query = f"""
             SELECT 
                 sar.academic_year,
                 sar.class,
@@ -485,7 +469,7 @@ def get_student_report(current_user):
                 sar.is_promoted,
                 DATE_FORMAT(sar.promoted_date, '%%Y-%%m-%%d') as promoted_date,
                 DATE_FORMAT(sar.created_at, '%%Y-%%m-%%d') as enrolled_date
-            FROM student_academic_records sar
+            FROM {YearArchiveService.sql_source('student_academic_records', None, 'sar')}
             WHERE sar.student_id = %s
             ORDER BY sar.academic_year DESC
         """
@@ -499,7 +483,7 @@ def get_student_report(current_user):
             hist_class = history['class']
             
             # Get marks for this academic year
-            hist_marks_query = """
+            hist_marks_query = f"""
                 SELECT 
                     tt.test_name,
                     sm.subject_name,
@@ -507,7 +491,7 @@ def get_student_report(current_user):
                     cts.max_marks,
                     stm.marks_obtained,
                     stm.is_absent
-                FROM student_marks stm
+                FROM {YearArchiveService.sql_source('student_marks', hist_year, 'stm')}
                 JOIN class_test ct ON stm.class_test_id = ct.id
                 JOIN testtype tt ON ct.test_id = tt.id
                 JOIN subjectmaster sm ON stm.subject_id = sm.id
@@ -622,6 +606,7 @@ def get_student_report(current_user):
 # ============== GET STUDENT HISTORY ACROSS YEARS ==============
 @report_bp.route('/api/report/student/history', methods=['GET'])
 @token_required
+@read_replica
 def get_student_history(current_user):
     """Get student's complete academic history across all years"""
     student_id = request.args.get('student_id')
@@ -657,7 +642,7 @@ def get_student_history(current_user):
             return jsonify({'error': 'Unauthorized'}), 403
         
         # Get all academic records
-        records_query = """
+        records_query = f"""
             SELECT 
                 sar.academic_year,
                 sar.class,
@@ -666,7 +651,7 @@ def get_student_history(current_user):
                 sar.is_promoted,
                 DATE_FORMAT(sar.promoted_date, '%%Y-%%m-%%d') as promoted_date,
                 DATE_FORMAT(sar.created_at, '%%Y-%%m-%%d') as enrolled_date
-            FROM student_academic_records sar
+            FROM {YearArchiveService.sql_source('student_academic_records', None, 'sar')}
             WHERE sar.student_id = %s
             ORDER BY sar.academic_year
         """
@@ -680,12 +665,12 @@ def get_student_history(current_user):
             year = record['academic_year']
             
             # Get all tests for this year
-            tests_query = """
+            tests_query = f"""
                 SELECT DISTINCT
                     ct.id as class_test_id,
                     tt.test_name,
                     tt.display_order
-                FROM student_marks stm
+                FROM {YearArchiveService.sql_source('student_marks', year, 'stm')}
                 JOIN class_test ct ON stm.class_test_id = ct.id
                 JOIN testtype tt ON ct.test_id = tt.id
                 WHERE stm.student_id = %s AND stm.academic_year = %s
@@ -697,7 +682,7 @@ def get_student_history(current_user):
             year_tests = []
             for test in tests:
                 # Get subjects and marks for this test
-                marks_query = """
+                marks_query = f"""
                     SELECT 
                         sm.subject_name,
                         sm.subject_type,
@@ -705,7 +690,7 @@ def get_student_history(current_user):
                         cts.max_marks,
                         stm.marks_obtained,
                         stm.is_absent
-                    FROM student_marks stm
+                    FROM {YearArchiveService.sql_source('student_marks', year, 'stm')}
                     JOIN subjectmaster sm ON stm.subject_id = sm.id
                     JOIN class_test_subjects cts ON cts.class_test_id = stm.class_test_id 
                         AND cts.subject_id = sm.id
@@ -745,12 +730,12 @@ def get_student_history(current_user):
                 })
             
             # Get attendance for this year
-            att_query = """
+            att_query = f"""
                 SELECT 
                     COUNT(*) as total,
                     SUM(CASE WHEN status = 'Present' THEN 1 ELSE 0 END) as present,
                     SUM(CASE WHEN status IN ('Absent', 'Leave') THEN 1 ELSE 0 END) as absent
-                FROM attendance
+                FROM {YearArchiveService.sql_source('attendance', year)}
                 WHERE student_id = %s AND academic_year = %s
             """
             cursor.execute(att_query, (student_id, year))
@@ -799,6 +784,7 @@ def get_student_history(current_user):
 # ============== GET REPORT WITH SPECIFIC ACADEMIC YEAR (For Historical Reports) ==============
 @report_bp.route('/api/report/student/year', methods=['GET'])
 @token_required
+@read_replica
 def get_student_report_by_year(current_user):
     """Get student report for a specific academic year (for historical data)"""
     student_id = request.args.get('student_id')
@@ -816,7 +802,7 @@ def get_student_report_by_year(current_user):
         cursor = conn.cursor(dictionary=True)
         
         # Get student's record for that year
-        record_query = """
+        record_query = f"""
             SELECT 
                 s.student_id,
                 CONCAT(COALESCE(s.first_name, ''), ' ', COALESCE(s.last_name, '')) as student_name,
@@ -828,7 +814,7 @@ def get_student_report_by_year(current_user):
                 sar.roll_number,
                 sar.is_promoted
             FROM students s
-            JOIN student_academic_records sar ON s.student_id = sar.student_id
+            JOIN {YearArchiveService.sql_source('student_academic_records', academic_year, 'sar')} ON s.student_id = sar.student_id
             LEFT JOIN branches b ON s.branch = b.branch_code
             WHERE s.student_id = %s AND sar.academic_year = %s
         """
@@ -875,13 +861,13 @@ def get_student_report_by_year(current_user):
             return 'E'
         
         # Get tests taken in this year
-        tests_query = """
+        tests_query = f"""
             SELECT DISTINCT
                 ct.id as class_test_id,
                 ct.test_id,
                 tt.test_name,
                 tt.display_order
-            FROM student_marks stm
+            FROM {YearArchiveService.sql_source('student_marks', academic_year, 'stm')}
             JOIN class_test ct ON stm.class_test_id = ct.id
             JOIN testtype tt ON ct.test_id = tt.id
             WHERE stm.student_id = %s AND stm.academic_year = %s
@@ -901,7 +887,7 @@ def get_student_report_by_year(current_user):
         
         for test in tests:
             # Get subjects and marks
-            marks_query = """
+            marks_query = f"""
                 SELECT 
                     sm.id as subject_id,
                     sm.subject_name,
@@ -910,7 +896,7 @@ def get_student_report_by_year(current_user):
                     cts.max_marks,
                     stm.marks_obtained,
                     stm.is_absent
-                FROM student_marks stm
+                FROM {YearArchiveService.sql_source('student_marks', academic_year, 'stm')}
                 JOIN subjectmaster sm ON stm.subject_id = sm.id
                 JOIN class_test_subjects cts ON cts.class_test_id = stm.class_test_id 
                     AND cts.subject_id = sm.id
@@ -920,9 +906,9 @@ def get_student_report_by_year(current_user):
             cursor.execute(marks_query, (student_id, test['class_test_id']))
             subjects = cursor.fetchall()
 
-            avg_query = """
+            avg_query = f"""
                 SELECT subject_id, AVG(marks_obtained) as avg
-                FROM student_marks
+                FROM {YearArchiveService.sql_source('student_marks', academic_year)}
                 WHERE class_test_id = %s AND is_absent = 0
                 GROUP BY subject_id
             """
@@ -967,13 +953,13 @@ def get_student_report_by_year(current_user):
             })
         
         # Get attendance for this year
-        att_query = """
+        att_query = f"""
             SELECT 
                 MONTHNAME(date) as month,
                 COUNT(*) as total,
                 SUM(CASE WHEN status = 'Present' THEN 1 ELSE 0 END) as present,
                 SUM(CASE WHEN status IN ('Absent', 'Leave') THEN 1 ELSE 0 END) as absent
-            FROM attendance
+            FROM {YearArchiveService.sql_source('attendance', academic_year)}
             WHERE student_id = %s AND academic_year = %s
             GROUP BY MONTH(date), MONTHNAME(date)
             ORDER BY MONTH(date)
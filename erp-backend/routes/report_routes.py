@@ -1,73 +1,171 @@
 from flask import Blueprint, jsonify, request
 from extensions import db, to_local_time
-from models import FeePayment, Student, StudentFee
-from helpers import token_required, require_academic_year
+from models import FeePayment, FeeCollectionDaily, Student, StudentFee, StudentFeeBalance
+from helpers import token_required, require_academic_year, read_replica
 from datetime import date, datetime
-from sqlalchemy import func, or_
+import calendar
+from sqlalchemy import func, or_, and_, tuple_
 from sqlalchemy.orm import selectinload
+from services.year_archive_service import YearArchiveService
 
-def consolidate_receipts(payments):
+RECEIPT_LABEL_SEPARATOR = ", "
+DEFAULT_RECEIPTS_PER_PAGE = 100
+MAX_RECEIPTS_PER_PAGE = 1000
+
+
+def consolidate_receipts(*conditions):
     """
-    Consolidates multiple payment rows (line items) into single receipt entries.
-    Returns a list of receipt dicts suitable for frontend display.
+    Consolidates active payment rows (line items) into receipt entries in SQL.
+    Lines are grouped by branch + receipt_no (receipt numbers repeat across branches)
+    and joined to a narrow student projection.
+    Returns (receipts, pagination); pagination is None unless ?page= was sent.
     """
-    receipt_map = {}
-    
-    for p in payments:
-        #Group by both branch and receipt_no to prevent cross-branching receipt merging
-        key = f"{p.branch}_{p.receipt_no}"
-
-        if key not in receipt_map:
-            receipt_map[key] = {
-                "receipt_no": p.receipt_no,
-                "student_name": (p.student.first_name if p.student else "Unknown") + " " + (p.student.last_name if p.student and p.student.last_name else ""),
-                "admission_no": p.student.admission_no if p.student else "",
-                "class": p.class_name,
-                "section": p.section,
-                "branch": p.branch,
-                "gross_amount": 0.0,
-                "concession": 0.0,
-                "net_payable": 0.0,
-                "amount_paid": 0.0,
-                "due_amount": 0.0,
-                "date": p.payment_date.isoformat(),
-                "time": to_local_time(p.created_at).strftime("%I:%M %p") if p.created_at else "",
-                "mode": p.payment_mode,
-                "note": p.note,
-                "collected_by": p.collected_by_name,
-                "fee_types": []
-            }
-        
-        key = f"{p.branch}_{p.receipt_no}"
-        item = receipt_map[key]
-        item["gross_amount"] += float(p.gross_amount or 0)
-        item["concession"] += float(p.concession_amount or 0)
-        item["net_payable"] += float(p.net_payable or 0)
-        item["amount_paid"] += float(p.amount_paid or 0)
-        item["amount"] = item["amount_paid"] # Frontend expects 'amount'
-        item["due_amount"] += float(p.due_amount or 0)
-        
+    grouped = db.session.query(
+        FeePayment.branch.label("branch"),
+        FeePayment.receipt_no.label("receipt_no"),
+        func.min(FeePayment.student_id).label("student_id"),
+        func.min(FeePayment.class_name).label("class_name"),
+        func.min(FeePayment.section).label("section"),
+        func.sum(FeePayment.gross_amount).label("gross_amount"),
+        func.sum(FeePayment.concession_amount).label("concession"),
+        func.sum(FeePayment.net_payable).label("net_payable"),
+        func.sum(FeePayment.amount_paid).label("amount_paid"),
+        func.sum(FeePayment.due_amount).label("due_amount"),
+        func.min(FeePayment.payment_date).label("payment_date"),
+        func.min(FeePayment.created_at).label("created_at"),
+        func.min(FeePayment.payment_mode).label("mode"),
+        func.min(FeePayment.note).label("note"),
+        func.min(FeePayment.collected_by_name).label("collected_by")
+    ).filter(
+        FeePayment.status == 'A', # Exclude Cancelled Receipts
+        *conditions
+    ).group_by(FeePayment.branch, FeePayment.receipt_no).subquery()
+
+    query = db.session.query(
+        grouped,
+        Student.first_name,
+        Student.last_name,
+        Student.admission_no
+    ).outerjoin(Student, Student.student_id == grouped.c.student_id).order_by(
+        grouped.c.created_at.desc(), grouped.c.receipt_no.desc()
+    )
+
+    pagination = None
+    if page := request.args.get('page', type=int):
+        page = max(page, 1)
+        per_page = request.args.get('per_page', DEFAULT_RECEIPTS_PER_PAGE, type=int)
+        per_page = min(max(per_page, 1), MAX_RECEIPTS_PER_PAGE)
+        total = db.session.query(func.count()).select_from(grouped).scalar()
+        query = query.limit(per_page).offset((page - 1) * per_page)
+        pagination = {
+            "page": page,
+            "per_page": per_page,
+            "total": total,
+            "pages": (total + per_page - 1) // per_page
+        }
+
+    rows = query.all()
+    labels = receipt_labels([(r.branch, r.receipt_no) for r in rows] if pagination else None, *conditions)
+
+    receipts = []
+    for r in rows:
+        fee_types = labels.get((r.branch, r.receipt_no), [])
+        amount_paid = float(r.amount_paid or 0)
+        receipts.append({
+            "receipt_no": r.receipt_no,
+            "student_name": (r.first_name or "Unknown") + " " + (r.last_name or ""),
+            "admission_no": r.admission_no or "",
+            "class": r.class_name,
+            "section": r.section,
+            "branch": r.branch,
+            "gross_amount": float(r.gross_amount or 0),
+            "concession": float(r.concession or 0),
+            "net_payable": float(r.net_payable or 0),
+            "amount_paid": amount_paid,
+            "amount": amount_paid, # Frontend expects 'amount'
+            "due_amount": float(r.due_amount or 0),
+            "date": r.payment_date.isoformat() if r.payment_date else "",
+            "time": to_local_time(r.created_at).strftime("%I:%M %p") if r.created_at else "",
+            "mode": r.mode,
+            "note": r.note,
+            "collected_by": r.collected_by,
+            "fee_types": fee_types,
+            "fee_type_str": RECEIPT_LABEL_SEPARATOR.join(fee_types)
+        })
+
+    return receipts, pagination
+
+
+def receipt_labels(keys, *conditions):
+    """
+    (branch, receipt_no) -> distinct fee labels of its active lines, in line order.
+    Read as rows rather than aggregated in SQL: GROUP_CONCAT silently truncates
+    at group_concat_max_len, and labels may contain any separator.
+    keys limits the lookup to one page of receipts; None reads every match.
+    """
+    query = db.session.query(
+        FeePayment.branch, FeePayment.receipt_no, FeePayment.fee_type, FeePayment.installment_name
+    ).filter(
+        FeePayment.status == 'A',
+        *conditions
+    )
+    if keys is not None:
+        if not keys:
+            return {}
+        query = query.filter(tuple_(FeePayment.branch, FeePayment.receipt_no).in_(keys))
+
+    labels = {}
+    for branch, receipt_no, fee_type, installment_name in query.order_by(FeePayment.id):
+        label = f"{fee_type or ''} {installment_name or ''}".strip()
+        fee_types = labels.setdefault((branch, receipt_no), [])
         # Avoid duplicate fee type strings
-        f_name = f"{p.fee_type or ''} {p.installment_name or ''}".strip()
-        if f_name and f_name not in item["fee_types"]:
-            item["fee_types"].append(f_name)
+        if label and label not in fee_types:
+            fee_types.append(label)
+    return labels
 
-    final_receipts = []
-    # Sort by recent first (assuming input was sorted, but we iterate dict. Python 3.7+ preserves insertion order)
-    # The input 'payments' should be sorted.
-    
-    for r in receipt_map.values():
-        final_receipts.append({
-            **r,
-            "fee_type_str": ", ".join(r["fee_types"]) 
-        })
-    
-    return final_receipts
+
+def receipt_counts(*conditions):
+    """
+    Distinct active receipts per (collector, branch), counted on fee_payments.
+    The rollup credits a receipt only to the row of its first line, so its
+    receipt_count undercounts once a class, section or fee type filter drops
+    that line.
+    """
+    collector = func.coalesce(FeePayment.collected_by_name, '')
+    rows = db.session.query(
+        collector, FeePayment.branch, func.count(func.distinct(FeePayment.receipt_no))
+    ).filter(
+        FeePayment.status == 'A',
+        *conditions
+    ).group_by(collector, FeePayment.branch).all()
+    return {(name, branch): count for name, branch, count in rows}
+
+
+def receipts_payload(receipts, pagination):
+    """Response fields for a receipt listing; pagination is only added when requested."""
+    payload = {"receipts": receipts}
+    if pagination:
+        payload["pagination"] = pagination
+    return payload
 
 bp = Blueprint('report_routes', __name__)
 
+def include_receipts():
+    """Receipt drilldowns are the only part of the fee reports that read fee_payments."""
+    return request.args.get('include_receipts', 'true').lower() not in ('false', '0', 'no')
+
+
+def collection_query(h_year, target_branch, *columns):
+    """Aggregate query over the daily collection rollup for one year and branch scope."""
+    query = db.session.query(*columns).filter(FeeCollectionDaily.academic_year == h_year)
+    if target_branch and target_branch not in ['All', 'AllBranches']:
+        query = query.filter(FeeCollectionDaily.branch == target_branch)
+    return query
+
+
 @bp.route("/api/reports/fees/today", methods=["GET"])
 @token_required
+@read_replica
 def report_fee_today(current_user):
     h_year, err, code = require_academic_year()
     if err: return err, code
@@ -80,26 +178,24 @@ def report_fee_today(current_user):
     today = date.today()
     
     try:
-        query = FeePayment.query.options(selectinload(FeePayment.student)).filter(FeePayment.payment_date == today)
-        query = query.filter(FeePayment.academic_year == h_year)
+        conditions = [FeePayment.payment_date == today, FeePayment.academic_year == h_year]
         
         if target_branch and target_branch not in ['All', 'AllBranches']:
-            query = query.filter(FeePayment.branch == target_branch)
-            
-        # Exclude Cancelled Receipts
-        query = query.filter(FeePayment.status == 'A')
+            conditions.append(FeePayment.branch == target_branch)
 
-        payments = query.order_by(FeePayment.created_at.desc()).all()
-        
-        total_amount = sum(float(p.amount_paid or 0) for p in payments)
+        total_amount, receipts_count = collection_query(
+            h_year, target_branch,
+            func.sum(FeeCollectionDaily.amount_paid),
+            func.sum(FeeCollectionDaily.receipt_count)
+        ).filter(FeeCollectionDaily.collection_date == today).first()
         
-        receipts_list = consolidate_receipts(payments)
+        receipts_list, pagination = consolidate_receipts(*conditions)
         
         return jsonify({
             "date": today.isoformat(),
-            "total_collection": total_amount,
-            "receipts_count": len(receipts_list),
-            "receipts": receipts_list
+            "total_collection": float(total_amount or 0),
+            "receipts_count": int(receipts_count or 0),
+            **receipts_payload(receipts_list, pagination)
         }), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -107,6 +203,7 @@ def report_fee_today(current_user):
 @bp.route("/api/reports/fees/daily", methods=["GET"])
 @bp.route("/api/reports/fees/daily", methods=["GET"])
 @token_required
+@read_replica
 def report_fee_daily(current_user):
     """Get fee collection for specific date or date range"""
     h_year, err, code = require_academic_year()
@@ -124,6 +221,7 @@ def report_fee_daily(current_user):
     # Filters
     class_filter = request.args.get('class')
     section_filter = request.args.get('section')
+    fee_type_filter = request.args.get('fee_type')
 
     target_start = None
     target_end = None
@@ -138,74 +236,81 @@ def report_fee_daily(current_user):
         else:
              return jsonify({"error": "Date range (start_date, end_date) or specific date required"}), 400
         
-        query = FeePayment.query.options(selectinload(FeePayment.student)).filter(FeePayment.payment_date >= target_start)
-        query = query.filter(FeePayment.payment_date <= target_end)
-        query = query.filter(FeePayment.academic_year == h_year)
-        
+        def scoped(*columns):
+            q = collection_query(h_year, target_branch, *columns).filter(
+                FeeCollectionDaily.collection_date >= target_start,
+                FeeCollectionDaily.collection_date <= target_end
+            )
+            if class_filter and class_filter != 'All':
+                q = q.filter(FeeCollectionDaily.class_name == class_filter)
+            if section_filter and section_filter != 'All':
+                q = q.filter(FeeCollectionDaily.section == section_filter)
+            if fee_type_filter and fee_type_filter != 'All':
+                q = q.filter(FeeCollectionDaily.fee_type == fee_type_filter)
+            return q
+
+        conditions = [
+            FeePayment.payment_date >= target_start,
+            FeePayment.payment_date <= target_end,
+            FeePayment.academic_year == h_year
+        ]
+
         if target_branch and target_branch not in ['All', 'AllBranches']:
-            query = query.filter(FeePayment.branch == target_branch)
-            
+            conditions.append(FeePayment.branch == target_branch)
+
         if class_filter and class_filter != 'All':
-            query = query.filter(FeePayment.class_name == class_filter)
-            
+            conditions.append(FeePayment.class_name == class_filter)
+
         if section_filter and section_filter != 'All':
-            query = query.filter(FeePayment.section == section_filter)
+            conditions.append(FeePayment.section == section_filter)
 
-        fee_type_filter = request.args.get('fee_type')
         if fee_type_filter and fee_type_filter != 'All':
-            query = query.filter(FeePayment.fee_type == fee_type_filter)
-            
-        # Exclude Cancelled Receipts
-        query = query.filter(FeePayment.status == 'A')
+            conditions.append(FeePayment.fee_type == fee_type_filter)
 
-        payments = query.order_by(FeePayment.created_at.desc()).all()
-        
-        # Consolidate Receipts
-        final_receipts = consolidate_receipts(payments)
-        
-        # Summaries
-        mode_summary = {}
-        collected_details = {} # Key: (name, branch) -> {amount, count}
-        
-        # Re-calc totals from consolidated receipts if needed, OR just iterate payments for simple sums
-        # Actually mode_summary and collected_by_summary should also be accurate. 
-        # Mode summary is sum of amounts, so iterating raw payments is fine.
-        
-        for p in payments:
-             mode = p.payment_mode or "Unknown"
-             mode_summary[mode] = mode_summary.get(mode, 0) + float(p.amount_paid or 0)
+        # Summaries (from the rollup; receipts are counted once, on their first line,
+        # so a class/section/fee type filter counts them on fee_payments instead)
+        line_filtered = any(f and f != 'All' for f in (class_filter, section_filter, fee_type_filter))
+        counts = receipt_counts(*conditions) if line_filtered else None
 
-        total_amount = 0.0
-        
-        # Collected By Summary (Count RECEIPTS, not line items)
-        for r in final_receipts:
-            total_amount += r["amount_paid"]
-            
-            key = (r["collected_by"] or "Unknown", r["branch"] or "Unknown")
-            if key not in collected_details:
-                collected_details[key] = {"amount": 0.0, "count": 0}
-            
-            collected_details[key]["amount"] += r["amount_paid"]
-            collected_details[key]["count"] += 1
+        mode_summary = {}
+        for mode, amount in scoped(
+            FeeCollectionDaily.payment_mode, func.sum(FeeCollectionDaily.amount_paid)
+        ).group_by(FeeCollectionDaily.payment_mode).all():
+            mode = mode or "Unknown"
+            mode_summary[mode] = mode_summary.get(mode, 0) + float(amount or 0)
 
-        # Format collected_by_summary for frontend
         collected_list = []
-        for (name, branch), data in collected_details.items():
+        total_amount = 0.0
+        receipts_count = 0
+        for name, branch, amount, count in scoped(
+            FeeCollectionDaily.collected_by_name,
+            FeeCollectionDaily.branch,
+            func.sum(FeeCollectionDaily.amount_paid),
+            func.sum(FeeCollectionDaily.receipt_count)
+        ).group_by(FeeCollectionDaily.collected_by_name, FeeCollectionDaily.branch).all():
+            if counts is not None:
+                count = counts.get((name, branch), 0)
+            total_amount += float(amount or 0)
+            receipts_count += int(count or 0)
             collected_list.append({
-                "user": name,
-                "branch": branch,
-                "count": data["count"],
-                "amount": data["amount"]
+                "user": name or "Unknown",
+                "branch": branch or "Unknown",
+                "count": int(count or 0),
+                "amount": float(amount or 0)
             })
 
+        final_receipts, pagination = [], None
+        if include_receipts():
+            final_receipts, pagination = consolidate_receipts(*conditions)
+
         return jsonify({
             "start_date": target_start.isoformat(),
             "end_date": target_end.isoformat(),
             "total_collection": total_amount,
-            "receipts_count": len(final_receipts),
+            "receipts_count": receipts_count,
             "mode_summary": mode_summary,
             "collected_by_summary": collected_list,
-            "receipts": final_receipts
+            **receipts_payload(final_receipts, pagination)
         }), 200
     except ValueError:
         return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
@@ -214,6 +319,7 @@ def report_fee_daily(current_user):
 
 @bp.route("/api/reports/fees/monthly", methods=["GET"])
 @token_required
+@read_replica
 def report_fee_monthly(current_user):
     """Get fee collection for month"""
     try:
@@ -231,16 +337,8 @@ def report_fee_monthly(current_user):
         
         if not month or not year:
             return jsonify({"error": "Month and Year required"}), 400
-            
-        query = FeePayment.query.options(selectinload(FeePayment.student)).filter(
-            FeePayment.payment_month == int(month),
-            FeePayment.payment_year == int(year)
-        )
-        query = query.filter(FeePayment.academic_year == h_year)
-        
-        if target_branch and target_branch not in ['All', 'AllBranches']:
-            query = query.filter(FeePayment.branch == target_branch)
-        elif current_user.role != 'Admin':
+
+        if (not target_branch or target_branch in ['All', 'AllBranches']) and current_user.role != 'Admin':
              return jsonify({
                 "period": f"{month}-{year}",
                 "total_collection": 0,
@@ -248,27 +346,46 @@ def report_fee_monthly(current_user):
                 "receipts_count": 0,
                 "receipts": []
             }), 200
-            
-        # Exclude Cancelled Receipts
-        query = query.filter(FeePayment.status == 'A')
-            
-        payments = query.all()
-        
-        total = sum(float(p.amount_paid or 0) for p in payments)
+
+        month_start = date(int(year), int(month), 1)
+        month_end = date(int(year), int(month), calendar.monthrange(int(year), int(month))[1])
+
+        total = 0.0
+        receipts_count = 0
         class_totals = {}
-        
-        for p in payments:
-            cls = p.class_name or "Unknown"
-            class_totals[cls] = class_totals.get(cls, 0) + float(p.amount_paid or 0)
+        for cls, amount, count in collection_query(
+            h_year, target_branch,
+            FeeCollectionDaily.class_name,
+            func.sum(FeeCollectionDaily.amount_paid),
+            func.sum(FeeCollectionDaily.receipt_count)
+        ).filter(
+            FeeCollectionDaily.collection_date >= month_start,
+            FeeCollectionDaily.collection_date <= month_end
+        ).group_by(FeeCollectionDaily.class_name).all():
+            cls = cls or "Unknown"
+            class_totals[cls] = class_totals.get(cls, 0) + float(amount or 0)
+            total += float(amount or 0)
+            receipts_count += int(count or 0)
+
+        receipts_list, pagination = [], None
+        if include_receipts():
+            conditions = [
+                FeePayment.payment_month == int(month),
+                FeePayment.payment_year == int(year),
+                FeePayment.academic_year == h_year
+            ]
             
-        receipts_list = consolidate_receipts(payments)
+            if target_branch and target_branch not in ['All', 'AllBranches']:
+                conditions.append(FeePayment.branch == target_branch)
+
+            receipts_list, pagination = consolidate_receipts(*conditions)
         
         return jsonify({
             "period": f"{month}-{year}",
             "total_collection": total,
             "class_wise": class_totals,
-            "receipts_count": len(receipts_list),
-             "receipts": receipts_list
+            "receipts_count": receipts_count,
+            **receipts_payload(receipts_list, pagination)
         }), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -276,6 +393,7 @@ def report_fee_monthly(current_user):
 
 @bp.route("/api/reports/fees/class-wise", methods=["GET"])
 @token_required
+@read_replica
 def report_fee_class_wise(current_user):
     """Get fee stats by class"""
     try:
@@ -299,16 +417,11 @@ def report_fee_class_wise(current_user):
                 "class": class_name, "total_fee": 0, "collected": 0, "due": 0, "receipts": []
             }), 200
 
-        # 1. Total Collected (from FeePayment)
-        p_query = FeePayment.query.options(selectinload(FeePayment.student)).filter_by(class_name=class_name, academic_year=h_year)
-        if target_branch and target_branch not in ['All', 'AllBranches']:
-            p_query = p_query.filter_by(branch=target_branch)
-        
-        # Exclude Cancelled Receipts
-        p_query = p_query.filter(FeePayment.status == 'A')
-            
-        payments = p_query.all()
-        collected = sum(float(p.amount_paid or 0) for p in payments)
+        # 1. Total Collected (from the daily collection rollup)
+        collected = collection_query(
+            h_year, target_branch, func.sum(FeeCollectionDaily.amount_paid)
+        ).filter(FeeCollectionDaily.class_name == class_name).scalar()
+        collected = float(collected or 0)
         
         # 2. Total Demand (from StudentFee)
         # Find students of this class & branch
@@ -338,14 +451,19 @@ def report_fee_class_wise(current_user):
         # Note: collected might not match total_fee - total_due exactly if there are data inconsistencies, 
         # but normally total_fee = paid + due + concession.
         
-        receipts_list = consolidate_receipts(payments)
+        receipts_list, pagination = [], None
+        if include_receipts():
+            conditions = [FeePayment.class_name == class_name, FeePayment.academic_year == h_year]
+            if target_branch and target_branch not in ['All', 'AllBranches']:
+                conditions.append(FeePayment.branch == target_branch)
+            receipts_list, pagination = consolidate_receipts(*conditions)
         
         return jsonify({
             "class": class_name,
             "total_fee": total_fee,
             "collected": collected, # From Payments Table (Reality)
             "due": total_due,       # From StudentFee Table (Plan)
-            "receipts": receipts_list
+            **receipts_payload(receipts_list, pagination)
         }), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -353,6 +471,7 @@ def report_fee_class_wise(current_user):
 
 @bp.route("/api/reports/fees/installment-wise", methods=["GET"])
 @token_required
+@read_replica
 def report_fee_installment_wise(current_user):
     try:
         h_year, err, code = require_academic_year()
@@ -378,18 +497,12 @@ def report_fee_installment_wise(current_user):
 
         # 1. Payments for this installment
         # We search by installment_name or month
-        p_query = FeePayment.query.options(selectinload(FeePayment.student)).filter(
-            (FeePayment.installment_name == installment) | (FeePayment.fee_type == installment)
-        ).filter(FeePayment.academic_year == h_year)
-        
-        if target_branch and target_branch not in ['All', 'AllBranches']:
-            p_query = p_query.filter(FeePayment.branch == target_branch)
-        
-        # Exclude Cancelled Receipts
-        p_query = p_query.filter(FeePayment.status == 'A')
-        
-        payments = p_query.all()
-        collected = sum(float(p.amount_paid or 0) for p in payments)
+        collected = collection_query(
+            h_year, target_branch, func.sum(FeeCollectionDaily.amount_paid)
+        ).filter(
+            (FeeCollectionDaily.installment_name == installment) | (FeeCollectionDaily.fee_type == installment)
+        ).scalar()
+        collected = float(collected or 0)
         
         # 2. Demand for this installment
         # We search StudentFee where month == installment
@@ -422,8 +535,17 @@ def report_fee_installment_wise(current_user):
             paid_count = paid_count.filter(Student.branch == target_branch)
         paid_count = paid_count.scalar()
 
-        
-        receipts_list = consolidate_receipts(payments)
+        receipts_list, pagination = [], None
+        if include_receipts():
+            conditions = [
+                (FeePayment.installment_name == installment) | (FeePayment.fee_type == installment),
+                FeePayment.academic_year == h_year
+            ]
+            
+            if target_branch and target_branch not in ['All', 'AllBranches']:
+                conditions.append(FeePayment.branch == target_branch)
+            
+            receipts_list, pagination = consolidate_receipts(*conditions)
 
         return jsonify({
             "installment": installment,
@@ -433,7 +555,7 @@ def report_fee_installment_wise(current_user):
             "total_students": student_count,
             "paid_students": paid_count,
             "pending_students": student_count - paid_count,
-            "receipts": receipts_list
+            **receipts_payload(receipts_list, pagination)
         }), 200
 
     except Exception as e:
@@ -442,6 +564,7 @@ def report_fee_installment_wise(current_user):
 
 @bp.route("/api/reports/fees/due", methods=["GET"])
 @token_required
+@read_replica
 def report_fee_due(current_user):
     """Get students with due amount"""
     try:
@@ -458,23 +581,23 @@ def report_fee_due(current_user):
         if current_user.role != 'Admin' and (not target_branch or target_branch in ['All', 'AllBranches']):
              return jsonify([]), 200
 
-        # Query StudentFees grouped by Student
+        # Read per-student totals from the student_fee_balance ledger
         # Filter where due_amount > 0
         
         query = db.session.query(
             Student,
-            func.sum(StudentFee.due_amount).label("total_due"),
-            func.sum(StudentFee.total_fee).label("total_fee")
-        ).join(StudentFee).filter(
-            StudentFee.academic_year == h_year,
+            StudentFeeBalance.due_amount,
+            StudentFeeBalance.total_fee
+        ).join(StudentFeeBalance, and_(
+            StudentFeeBalance.student_id == Student.student_id,
+            StudentFeeBalance.academic_year == h_year
+        )).filter(
             Student.academic_year == h_year,
-            StudentFee.is_active == True
+            StudentFeeBalance.due_amount > 0
         )
         
         if target_branch and target_branch not in ['All', 'AllBranches']:
             query = query.filter(Student.branch == target_branch)
-            
-        query = query.group_by(Student.student_id).having(func.sum(StudentFee.due_amount) > 0)
         
         results = query.all()
         
@@ -499,6 +622,7 @@ def report_fee_due(current_user):
 
 @bp.route("/api/reports/fees/late-due", methods=["GET"])
 @token_required
+@read_replica
 def report_fee_late_due(current_user):
     """Get students with late due amount (due date passed or no due date)"""
     try:
@@ -522,7 +646,11 @@ def report_fee_late_due(current_user):
             Student,
             func.sum(StudentFee.due_amount).label("total_due"),
             func.sum(StudentFee.total_fee).label("total_fee")
-        ).join(StudentFee).filter(
+        ).join(StudentFee).join(StudentFeeBalance, and_(
+            StudentFeeBalance.student_id == Student.student_id,
+            StudentFeeBalance.academic_year == h_year
+        )).filter(
+            StudentFeeBalance.due_amount > 0, # Only students the ledger says still owe something
             StudentFee.academic_year == h_year,
             Student.academic_year == h_year,
             StudentFee.is_active == True,
@@ -560,6 +688,7 @@ def report_fee_late_due(current_user):
 
 @bp.route("/api/reports/fees/receipt/<string:receipt_no>", methods=["GET"])
 @token_required
+@read_replica
 def get_receipt_data(current_user, receipt_no):
     """Get Receipt Details (Immutable Read-Only)"""
     try:
@@ -568,7 +697,9 @@ def get_receipt_data(current_user, receipt_no):
         
         # Scoped by Branch (if strict) and Year
         # Actually receipt_no should be unique regardless of year, but we enforce year check for security context
-        query = FeePayment.query.options(selectinload(FeePayment.student)).filter_by(receipt_no=receipt_no) #, academic_year=h_year) 
+        # Receipts of an archived year are read from fee_payments_archive as well
+        Payment = YearArchiveService.source(FeePayment, h_year)
+        query = db.session.query(Payment).options(selectinload(Payment.student)).filter_by(receipt_no=receipt_no) #, academic_year=h_year) 
         # Note: If we enforce year check, user can't view old receipts easily if they switched year? 
         # But instructions say "Receipts must be fetched by receipt_no + branch + academic_year."
         query = query.filter_by(academic_year=h_year)
@@ -8,6 +8,7 @@ from sqlalchemy import and_
 import traceback
 from datetime import datetime
 from helpers import token_required, ensure_student_editable
+from services.year_archive_service import YearArchiveService
 
 student_marks_bp = Blueprint('student_marks_bp', __name__)
 
@@ -24,6 +25,10 @@ def get_marks_entry_grid():
         if not all([academic_year, branch, class_id, test_id, subject_id]):
             return jsonify({"error": "Missing required parameters"}), 400
 
+        # Closed years live in the archive tables; these read both
+        Record = YearArchiveService.source(StudentAcademicRecord, academic_year)
+        Marks = YearArchiveService.source(StudentMarks, academic_year)
+
         # 1. Resolve ClassTest ID
         # We need to find the specific class_test instance for this class/year/test type
         class_test = ClassTest.query.filter_by(
@@ -53,7 +58,7 @@ def get_marks_entry_grid():
 
         # 3. Fetch Students
         # Must be:
-        # a) In the class/section (StudentAcademicRecord)
+        # a) In the class/section (Record)
         # b) Assigned to the subject (StudentSubjectAssignment)
         # c) (Optional) Explicitly assigned to test? Relaxing this to allow implicit inclusion.
 
@@ -62,9 +67,9 @@ def get_marks_entry_grid():
             Student.admission_no,
             Student.first_name,
             Student.last_name,
-            StudentAcademicRecord.roll_number
+            Record.roll_number
         ).join(
-            StudentAcademicRecord, Student.student_id == StudentAcademicRecord.student_id
+            Record, Student.student_id == Record.student_id
         ).join(
             StudentSubjectAssignment, and_(
                 Student.student_id == StudentSubjectAssignment.student_id,
@@ -72,8 +77,8 @@ def get_marks_entry_grid():
                 StudentSubjectAssignment.academic_year == academic_year # Scope subject assign to year
             )
         ).filter(
-            StudentAcademicRecord.academic_year == academic_year,
-            StudentAcademicRecord.class_name == class_name_val,
+            Record.academic_year == academic_year,
+            Record.class_name == class_name_val,
             Student.branch == branch, 
             Student.status == 'Active',
             
@@ -82,12 +87,12 @@ def get_marks_entry_grid():
         )
 
         if section:
-            query = query.filter(StudentAcademicRecord.section == section)
+            query = query.filter(Record.section == section)
 
         students = query.all()
 
         # 4. Fetch Existing Marks
-        existing_marks = StudentMarks.query.filter_by(
+        existing_marks = db.session.query(Marks).filter_by(
             class_test_id=class_test.id,
             subject_id=subject_id
         ).all()
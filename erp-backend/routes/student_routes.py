@@ -1,11 +1,9 @@
 
-from flask import Blueprint, jsonify, request, send_file
+from flask import Blueprint, jsonify, request, send_file, current_app
 from extensions import db, get_now, to_local_time
-from models import Student, Branch, UserBranchAccess, StudentFee, StudentAcademicRecord
+from models import Student, StudentFee, StudentAcademicRecord
 from models import (
     Student,
-    Branch,
-    UserBranchAccess,
     StudentFee,
     StudentAcademicRecord,
     FeePayment,
@@ -13,11 +11,16 @@ from models import (
     StudentSubjectAssignment,
     StudentTestAssignment,
     StudentMarks,
+    StudentFeeBalance,
 )
 
 
-from services.sequence_service import SequenceService
-from helpers import token_required, require_academic_year, get_branch_query_filter, student_to_dict, auto_enroll_student_fee, require_editable_student
+from services.sequence_service import SequenceService, MODE_GAP_TOLERANT
+from services.branch_access_service import BranchAccessService
+from services.year_archive_service import YearArchiveService
+from services.response_service import ResponseService
+from services.cache_service import conditional_get
+from helpers import token_required, read_replica, require_academic_year, get_branch_query_filter, student_to_dict, auto_enroll_student_fee, require_editable_student
 from datetime import datetime
 from sqlalchemy import or_, and_, func
 import io
@@ -139,6 +142,8 @@ def save_student_photo(student, photo_data):
 
 @bp.route("/api/students", methods=["GET"])
 @token_required
+@read_replica
+@conditional_get("students", "fee_balances")
 def get_students(current_user):
     try:
         class_name = request.args.get("class")
@@ -216,12 +221,8 @@ def get_students(current_user):
         if current_user.role != 'Admin':
              req_branch = h_branch 
              
-             has_access = False
-             # Check explicit branch request access
-             if req_branch and req_branch != "All" and (b_obj := Branch.query.filter(or_(Branch.branch_code == req_branch, Branch.branch_name == req_branch)).first()):
-                 has_access = bool(UserBranchAccess.query.filter_by(user_id=current_user.user_id, branch_id=b_obj.id, is_active=True).first())
-             
-             if has_access or (current_user.branch == 'All' and req_branch and req_branch != "All"):
+             # Explicit branch request: home branch, an active grant, or an 'All' user
+             if req_branch and req_branch != "All" and BranchAccessService.can_access(current_user, req_branch):
                  branch_filter = get_branch_query_filter(Student.branch, req_branch)
              elif current_user.branch != 'All':
                   branch_filter = get_branch_query_filter(Student.branch, current_user.branch)
@@ -251,50 +252,54 @@ def get_students(current_user):
             current_user.role,
             len(rows),
         )
-        results = []
-        
         include_fee_due = request.args.get("include_fee_due") == "true"
         
         student_dues_map = {}
         if include_fee_due and rows:
             student_ids = [r[0].student_id if h_year else r.student_id for r in rows]
             if student_ids:
+                # One ledger row per student/year instead of every fee row
                 dues_query = db.session.query(
-                    StudentFee.student_id, func.sum(StudentFee.due_amount)
+                    StudentFeeBalance.student_id, func.sum(StudentFeeBalance.due_amount)
                 ).filter(
-                    StudentFee.student_id.in_(student_ids),
-                    StudentFee.is_active == True
-                ).group_by(StudentFee.student_id).all()
+                    StudentFeeBalance.student_id.in_(student_ids)
+                ).group_by(StudentFeeBalance.student_id).all()
                 for sid, total in dues_query:
                     student_dues_map[sid] = float(total or 0)
         
-        for row in rows:
-            try:
-                # Handle tuple vs object
-                if h_year:
-                    s, record = row
-                    s_dict = student_to_dict(s)
-                    if record:
-                        s_dict['class'] = record.class_name
-                        s_dict['section'] = record.section
-                        s_dict['Roll_Number'] = record.roll_number
-                        s_dict['rollNo'] = record.roll_number
-                        s_dict['academic_year'] = record.academic_year
-                        s_dict['is_promoted'] = record.is_promoted
-                        s_dict['is_locked'] = record.is_locked
+        def student_dicts():
+            for row in rows:
+                try:
+                    # Handle tuple vs object
+                    if h_year:
+                        s, record = row
+                        s_dict = student_to_dict(s)
+                        if record:
+                            s_dict['class'] = record.class_name
+                            s_dict['section'] = record.section
+                            s_dict['Roll_Number'] = record.roll_number
+                            s_dict['rollNo'] = record.roll_number
+                            s_dict['academic_year'] = record.academic_year
+                            s_dict['is_promoted'] = record.is_promoted
+                            s_dict['is_locked'] = record.is_locked
+                        else:
+                            s_dict['academic_year'] = h_year
                     else:
-                        s_dict['academic_year'] = h_year
-                else:
-                    s = row
-                    s_dict = student_to_dict(s)
-                    
-                if include_fee_due:
-                    s_dict['total_due'] = float(student_dues_map.get(s_dict["student_id"], 0.0))
-                    
-                results.append(s_dict)
-            except Exception as inner_e:
-                print(f"Error processing student row: {inner_e}")
-                continue # Skip bad rows to avoid crashing the whole list
+                        s = row
+                        s_dict = student_to_dict(s)
+                        
+                    if include_fee_due:
+                        s_dict['total_due'] = float(student_dues_map.get(s_dict["student_id"], 0.0))
+                        
+                    yield s_dict
+                except Exception as inner_e:
+                    print(f"Error processing student row: {inner_e}")
+                    continue # Skip bad rows to avoid crashing the whole list
+
+        # Big lists start flowing while the rest is still being built
+        if len(rows) >= current_app.config.get("JSON_STREAM_MIN_ITEMS", 1000):
+            return ResponseService.stream_json(student_dicts(), "students")
+        results = list(student_dicts())
 
         return jsonify({"students": results}), 200
 
@@ -829,8 +834,27 @@ def upload_students_csv(current_user):
             if existing_students := Student.query.filter(Student.admission_no.in_(admission_nos_in_file)).all():
                 found_admissions = [s.admission_no for s in existing_students]
                 return jsonify({"error": f"Admission Numbers already exist in database: {found_admissions}. Import aborted to prevent corruption."}), 400
+
         # ---------------------------------------------------------
-        
+
+        h_year = (request.headers.get("X-Academic-Year") or "").strip()
+        h_branch = request.headers.get("X-Branch")
+        scopes = {}
+
+        def sequence_scope(row):
+            """(branch_id, academic_year_id) whose series numbers this row, or None."""
+            year = str(row.get('academic_year') or h_year or "").strip()
+            branch = str(row.get('branch') or h_branch or "").strip()
+            if not year or not branch or branch == "All":
+                return None
+            if (branch, year) not in scopes:
+                branch_id = SequenceService.resolve_branch_id(branch)
+                ay_id = SequenceService.resolve_academic_year_id(year)
+                scopes[(branch, year)] = (branch_id, ay_id) if branch_id and ay_id else None
+            return scopes[(branch, year)]
+
+        # 3. Build every row first, so admission numbers only go to rows that parsed
+        pending = []
         for row_num, row in enumerate(data, start=2):
             try:
                 # Create student from CSV row
@@ -923,7 +947,29 @@ def upload_students_csv(current_user):
                     Stream=row.get('Stream'),
                     EmploymentCategory=row.get('EmploymentCategory')
                 )
-                
+                pending.append((row_num, student, None if student.admission_no else sequence_scope(row)))
+            except Exception as e:
+                errors.append(f"Row {row_num}: {str(e)}")
+
+        # 4. Gap-tolerant mode: one reserved block per (branch, year) series instead of
+        #    one sequence transaction per student. Gapless mode numbers each student
+        #    inside its own transaction below, so a failed insert gives its number back.
+        gap_tolerant = SequenceService.allocation_mode() == MODE_GAP_TOLERANT
+        if gap_tolerant:
+            by_scope = {}
+            for _, student, scope in pending:
+                if scope:
+                    by_scope.setdefault(scope, []).append(student)
+            for (branch_id, ay_id), students in by_scope.items():
+                reserved = SequenceService.reserve_admission_numbers(branch_id, ay_id, len(students))
+                for student, adm_no in zip(students, reserved):
+                    student.admission_no = adm_no
+
+        for row_num, student, scope in pending:
+            try:
+                if scope and not gap_tolerant:
+                    student.admission_no = SequenceService.generate_admission_number(*scope)
+
                 db.session.add(student)
                 db.session.commit() # Commit each student individually
                 
@@ -956,6 +1002,7 @@ def upload_students_csv(current_user):
 
 @bp.route("/api/students/<int:student_id>/history", methods=["GET"])
 @token_required
+@conditional_get((StudentAcademicRecord, "student_id"), "year_archives")
 def get_student_history(current_user, student_id):
     """Get academic history (promotion records) for a student"""
     try:
@@ -967,7 +1014,9 @@ def get_student_history(current_user, student_id):
         if current_user.role != 'Admin' and current_user.branch != 'All' and student.branch != current_user.branch:
              return jsonify({"error": "Unauthorized"}), 403
              
-        records = StudentAcademicRecord.query.filter_by(student_id=student_id).order_by(StudentAcademicRecord.created_at.desc()).all()
+        # Includes years moved to the archive tables
+        Record = YearArchiveService.source(StudentAcademicRecord)
+        records = db.session.query(Record).filter_by(student_id=student_id).order_by(Record.created_at.desc()).all()
         
         history = [{
             "id": r.id,
@@ -1335,6 +1384,8 @@ def change_section_bulk(current_user):
 
 @bp.route("/api/students/summary", methods=["GET"])
 @token_required
+@read_replica
+@conditional_get("students")
 def get_student_summary(current_user):
     """
     Get aggregated student summary:
@@ -2,12 +2,14 @@ from flask import Blueprint, request, jsonify, current_app
 from extensions import db, to_local_time
 from models import TestType, User
 from helpers import token_required
+from services.cache_service import cached_resource
 
 test_type_bp = Blueprint('test_type_bp', __name__)
 
 from sqlalchemy import or_
 
 @test_type_bp.route('/', methods=['GET'])
+@cached_resource("test_types")
 def get_test_types():
     try:
         academic_year = request.args.get('academic_year')
@@ -0,0 +1,55 @@
+import sys
+import os
+import argparse
+
+# Fix path to allow importing from parent directory
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from services.year_archive_service import YearArchiveService, ARCHIVE_BATCH_SIZE
+
+app = create_app()
+
+
+def archive_academic_year():
+    """
+    Moves a closed academic year (every academic record locked, no student
+    still in it) into the *_archive tables, or back with --restore. Safe to
+    re-run after an interruption; it resumes from the last committed batch.
+    """
+    parser = argparse.ArgumentParser(description="Archive or restore a closed academic year")
+    parser.add_argument("--year", help="Academic year, e.g. 2024-2025")
+    parser.add_argument("--list", action="store_true", help="List academic years and their archive state")
+    parser.add_argument("--restore", action="store_true", help="Move an archived year back into the live tables")
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE, help="Rows per transaction")
+    parser.add_argument("--dry-run", action="store_true", help="Only check the year and count its rows")
+    args = parser.parse_args()
+
+    with app.app_context():
+        if args.list or not args.year:
+            for y in YearArchiveService.year_summary():
+                print(f"{y['academic_year']}: {y['status']}, {y['locked']}/{y['records']} records locked")
+            return
+
+        try:
+            if args.dry_run:
+                if not args.restore:
+                    YearArchiveService.check_closed(args.year)
+                counts = YearArchiveService.pending_rows(args.year, archived=args.restore)
+                for table, rows in counts.items():
+                    print(f"  {table}: {rows} rows")
+                return
+
+            if args.restore:
+                counts = YearArchiveService.restore_year(args.year, args.batch_size, log=print)
+                print(f"Restored {args.year}: {sum(counts.values())} rows.")
+            else:
+                counts = YearArchiveService.archive_year(args.year, "script", args.batch_size, log=print)
+                print(f"Archived {args.year}: {sum(counts.values())} rows.")
+        except ValueError as e:
+            print(str(e))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    archive_academic_year()
@@ -0,0 +1,42 @@
+import sys
+import os
+import argparse
+
+# Fix path to allow importing from parent directory
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from services.audit_archive_service import AuditArchiveService
+
+app = create_app()
+
+
+def archive_audit_logs():
+    """
+    Retention job for audit_logs; schedule monthly (cron / Task Scheduler).
+    Creates upcoming MySQL partitions, then moves every month older than
+    the retention window into a compressed archive file.
+    """
+    parser = argparse.ArgumentParser(description="Archive audit_logs months past retention")
+    parser.add_argument("--months", type=int, default=None, help="Months to keep in audit_logs (default AUDIT_RETENTION_MONTHS)")
+    parser.add_argument("--dry-run", action="store_true", help="Only list the months that would be archived")
+    args = parser.parse_args()
+
+    with app.app_context():
+        months = args.months if args.months is not None else app.config["AUDIT_RETENTION_MONTHS"]
+
+        if args.dry_run:
+            periods = AuditArchiveService.cold_periods(months)
+            print(f"Months past {months}-month retention: {', '.join(f'{p:%Y-%m}' for p in periods) or 'none'}")
+            return
+
+        result = AuditArchiveService.run_retention(months)
+        if result["partitions_created"]:
+            print(f"Created partitions: {', '.join(result['partitions_created'])}")
+        for item in result["archived"]:
+            print(f"Archived {item['period']}: {item['rows']} rows -> {item['file']}")
+        print(f"Done. {len(result['archived'])} month(s) archived.")
+
+
+if __name__ == "__main__":
+    archive_audit_logs()
@@ -0,0 +1,673 @@
+import sys
+import os
+import time
+import random
+import argparse
+import calendar
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+# Fix path to allow importing from parent directory
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import insert, delete, select, func, text
+from app import create_app
+from extensions import db
+from helpers import hash_user_password
+from models import (
+    AuditMixin, OrgMaster, Branch, User, UserBranchAccess, BranchYearSequence, ClassMaster, ClassSection,
+    Student, StudentAcademicRecord, FeeType, ClassFeeStructure, FeeInstallment, StudentFee, FeePayment,
+    StudentFeeBalance, FeeCollectionDaily, WeeklyOffRule, HolidayCalendar, Attendance, SubjectMaster,
+    ClassSubjectAssignment, StudentSubjectAssignment, TestType, ClassTest, ClassTestSubject,
+    StudentTestAssignment, GradeScale, GradeScaleDetails, StudentMarks, StudentDocument, TestAttendanceMonth,
+    Concession, PasswordResetOTP
+)
+from services.fee_balance_service import FeeBalanceService
+from services.fee_collection_service import FeeCollectionService
+from services.cache_service import CacheService, RESOURCE_MODELS
+
+app = create_app()
+
+LOCATION_CODE = "HYD"
+LOCATION_NAME = "Hyderabad"
+CLASSES = [str(c) for c in range(1, 11)]
+SECTIONS = ["A", "B", "C"]
+SUBJECTS = ["English", "Urdu", "Mathematics", "Science", "Social Studies", "Computer"]
+TESTS = ["Unit Test 1", "Quarterly", "Unit Test 2", "Half Yearly", "Unit Test 3", "Annual"]
+# Month offset (from June) each test is written in
+TEST_MONTHS = [1, 3, 5, 6, 8, 9]
+FEE_MONTHS = [6, 7, 8, 9, 10, 11, 12, 1, 2, 3, 4, 5]
+GRADES = [("A1", 91, 100), ("A2", 81, 90), ("B1", 71, 80), ("B2", 61, 70), ("C1", 51, 60), ("C2", 41, 50), ("D", 33, 40), ("E", 0, 32)]
+
+# (month, day, length in days, title); month >= 6 falls in the first calendar year
+HOLIDAYS = [
+    (8, 15, 1, "Independence Day"),
+    (10, 2, 1, "Gandhi Jayanti"),
+    (10, 20, 5, "Dussehra Break"),
+    (12, 25, 7, "Winter Break"),
+    (1, 26, 1, "Republic Day"),
+    (3, 14, 2, "Holi"),
+]
+
+FIRST_NAMES = ["Ayaan", "Zara", "Imran", "Fatima", "Rehan", "Sana", "Arif", "Mariam", "Yusuf", "Hiba", "Kabir", "Aisha",
+               "Omar", "Noor", "Faiz", "Iqra", "Hamza", "Safa", "Bilal", "Amna", "Zaid", "Huda", "Saad", "Ruqayya"]
+LAST_NAMES = ["Khan", "Siddiqui", "Qureshi", "Ansari", "Shaikh", "Hussain", "Baig", "Mirza", "Syed", "Farooqui",
+              "Hashmi", "Rizvi", "Naqvi", "Pasha", "Quadri"]
+OCCUPATIONS = ["Business", "Teacher", "Engineer", "Doctor", "Driver", "Shopkeeper", "Accountant", "Government Service"]
+AREAS = ["Toli Chowki", "Mehdipatnam", "Banjara Hills", "Masab Tank", "Attapur", "Shaikpet", "Golconda", "Langar Houz"]
+
+# Tables written by the generator, parents first
+GENERATED_MODELS = [
+    OrgMaster, Branch, User, UserBranchAccess, BranchYearSequence, ClassMaster, ClassSection, WeeklyOffRule,
+    HolidayCalendar, Student, StudentAcademicRecord, FeeType, ClassFeeStructure, FeeInstallment, StudentFee,
+    FeePayment, Attendance, SubjectMaster, ClassSubjectAssignment, StudentSubjectAssignment, TestType, ClassTest,
+    ClassTestSubject, StudentTestAssignment, GradeScale, GradeScaleDetails, StudentMarks,
+]
+DERIVED_MODELS = [StudentFeeBalance, FeeCollectionDaily]
+# Not generated, but they reference generated rows and would block --reset
+DEPENDENT_MODELS = [StudentDocument, TestAttendanceMonth, Concession, PasswordResetOTP]
+
+
+def year_label(start):
+    return f"{start}-{start + 1}"
+
+
+class LoadDataGenerator:
+    """
+    Writes a multi-year, multi-branch school straight into the tables with
+    Core executemany inserts. Primary keys are assigned here and all values
+    come from one seeded Random, so a given seed always produces the same
+    rows. ORM events (audit trail, rollup listeners) never fire; the fee
+    rollups are rebuilt once at the end and cache versions are bumped.
+    """
+
+    def __init__(self, seed, branches, students_per_branch, years, end_year, as_of, batch_size, log=print):
+        self.rng = random.Random(seed)
+        self.branch_count = branches
+        self.students_per_branch = students_per_branch
+        self.start_years = list(range(end_year - years + 1, end_year + 1))
+        self.as_of = as_of
+        self.batch_size = batch_size
+        self.log = log
+        # Fixed audit timestamp so reruns are byte-for-byte comparable
+        self.stamp = datetime.combine(as_of, datetime.min.time())
+        self.ids = {}
+        self.counts = {}
+        self.started = time.perf_counter()
+
+    # ---------------------------------------------------------
+    # PLUMBING
+    # ---------------------------------------------------------
+    def next_id(self, model):
+        self.ids[model] = self.ids.get(model, 0) + 1
+        return self.ids[model]
+
+    def insert(self, model, rows):
+        """Streams dict rows into model's table in executemany batches."""
+        table = model.__table__
+        audited = issubclass(model, AuditMixin)
+        conn = db.session.connection()
+        batch = []
+        for row in rows:
+            if audited:
+                row.setdefault("created_at", self.stamp)
+                row.setdefault("updated_at", self.stamp)
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                conn.execute(insert(table), batch)
+                self.counts[table.name] = self.counts.get(table.name, 0) + len(batch)
+                batch = []
+        if batch:
+            conn.execute(insert(table), batch)
+            self.counts[table.name] = self.counts.get(table.name, 0) + len(batch)
+        db.session.commit()
+
+    def step(self, message):
+        self.log(f"[{time.perf_counter() - self.started:7.1f}s] {message}")
+
+    @staticmethod
+    def year_dates(start):
+        """(first school day, last school day) of an academic year starting in June of `start`."""
+        return date(start, 6, 1), date(start + 1, 3, 31)
+
+    def cutoff(self, start):
+        return min(self.year_dates(start)[1], self.as_of)
+
+    # ---------------------------------------------------------
+    # ORGANISATION
+    # ---------------------------------------------------------
+    def build_org(self, admin_password):
+        self.step("Organisation: locations, years, branches, users, classes")
+        self.years = [year_label(y) for y in self.start_years]
+        self.current_year = self.years[-1]
+
+        orgs = [dict(id=self.next_id(OrgMaster), master_type="LOCATION", code=LOCATION_CODE, display_name=LOCATION_NAME, is_active=True)]
+        self.year_ids = {}
+        for label in self.years:
+            self.year_ids[label] = self.next_id(OrgMaster)
+            orgs.append(dict(id=self.year_ids[label], master_type="ACADEMIC_YEAR", code=label, display_name=label, is_active=True))
+        self.insert(OrgMaster, orgs)
+
+        self.branches = []
+        for n in range(1, self.branch_count + 1):
+            self.branches.append(dict(
+                id=self.next_id(Branch), branch_code=f"LT{n:02d}", branch_name=f"Load Test {n:02d}",
+                location_code=LOCATION_CODE, is_active=True
+            ))
+        self.insert(Branch, [dict(b) for b in self.branches])
+
+        users = [dict(user_id=self.next_id(User), username="loadtest_admin", password=hash_user_password(admin_password),
+                      role="Admin", branch="All", location=LOCATION_NAME)]
+        access = []
+        for b in self.branches:
+            user_id = self.next_id(User)
+            users.append(dict(user_id=user_id, username=f"loadtest_{b['branch_code'].lower()}",
+                              password=hash_user_password(admin_password), role="Teacher",
+                              branch=b["branch_name"], location=LOCATION_NAME))
+            access.append(dict(id=self.next_id(UserBranchAccess), user_id=user_id, branch_id=b["id"],
+                               start_date=date(self.start_years[0], 6, 1), end_date=None, is_active=True))
+        self.insert(User, users)
+        self.insert(UserBranchAccess, access)
+
+        self.class_ids = {}
+        classes = []
+        for c in CLASSES:
+            self.class_ids[c] = self.next_id(ClassMaster)
+            classes.append(dict(id=self.class_ids[c], class_name=c, location=LOCATION_NAME, branch="All"))
+        self.insert(ClassMaster, classes)
+
+        per_section = self.students_per_branch // (len(CLASSES) * len(SECTIONS)) + 1
+        self.insert(ClassSection, (
+            dict(id=self.next_id(ClassSection), class_id=self.class_ids[c], branch_id=b["id"], academic_year=y,
+                 section_name=s, student_strength=per_section + 5, is_active=True)
+            for y in self.years for b in self.branches for c in CLASSES for s in SECTIONS
+        ))
+
+    def build_calendar(self):
+        self.step("Calendar: week-offs and holidays")
+        rules, holidays = [], []
+        self.off_days = {}
+        for b in self.branches:
+            for start, label in zip(self.start_years, self.years):
+                # Every Sunday, plus the second Saturday of the month
+                for weekday, week_number in ((6, None), (5, 2)):
+                    rules.append(dict(id=self.next_id(WeeklyOffRule), branch_id=b["id"], class_id=None, weekday=weekday,
+                                      week_number=week_number, academic_year=label, active=True))
+                closed = set()
+                for order, (month, day, length, title) in enumerate(HOLIDAYS, start=1):
+                    first = date(start if month >= 6 else start + 1, month, day)
+                    last = first + timedelta(days=length - 1)
+                    holidays.append(dict(id=self.next_id(HolidayCalendar), branch_id=b["id"], class_id=None, title=title,
+                                         start_date=first, end_date=last, holiday_for="All", description=None,
+                                         display_order=order, academic_year=label, active=True))
+                    closed.update(first + timedelta(days=i) for i in range(length))
+                self.off_days[(b["id"], label)] = closed
+        self.insert(WeeklyOffRule, rules)
+        self.insert(HolidayCalendar, holidays)
+
+    def school_days(self, branch, start, label):
+        """Working days of the year up to the cutoff, by the same rules is_weekoff_or_holiday applies."""
+        first, _ = self.year_dates(start)
+        last = self.cutoff(start)
+        closed = self.off_days[(branch["id"], label)]
+        days = []
+        d = first
+        while d <= last:
+            second_saturday = d.weekday() == 5 and (d.day - 1) // 7 + 1 == 2
+            if d.weekday() != 6 and not second_saturday and d not in closed:
+                days.append(d)
+            d += timedelta(days=1)
+        return days
+
+    # ---------------------------------------------------------
+    # STUDENTS
+    # ---------------------------------------------------------
+    def build_students(self):
+        self.step(f"Students: {self.branch_count} branches x {self.students_per_branch}, {len(self.years)} years of records")
+        rng = self.rng
+        last_year = self.start_years[-1]
+        self.students = []  # (student_id, branch, {year label: (class, section, roll)}, first year label, transport)
+        admissions = {}     # (branch_id, year label) -> last admission number
+        sequences = {}
+
+        def profiles():
+            for b in self.branches:
+                for n in range(self.students_per_branch):
+                    clazz = CLASSES[n % len(CLASSES)]
+                    section = SECTIONS[(n // len(CLASSES)) % len(SECTIONS)]
+                    roll = n // (len(CLASSES) * len(SECTIONS)) + 1
+                    # Years already spent at the school, limited by class and history length
+                    history = rng.randint(0, min(len(self.years), int(clazz)) - 1)
+                    years = {}
+                    for back in range(history + 1):
+                        label = self.years[-1 - back]
+                        years[label] = (str(int(clazz) - back), section, roll)
+                    joined = self.years[-1 - history]
+                    joined_start = int(joined[:4])
+
+                    key = (b["id"], joined)
+                    admissions[key] = admissions.get(key, 0) + 1
+                    sequences[key] = f"{b['branch_code']}{joined_start % 100:02d}"
+                    admission_no = f"{sequences[key]}{admissions[key]:04d}"
+
+                    student_id = self.next_id(Student)
+                    self.students.append((student_id, b, years, joined, rng.random() < 0.35))
+
+                    gender = rng.choice(["Male", "Female"])
+                    last_name = rng.choice(LAST_NAMES)
+                    father = rng.choice(FIRST_NAMES)
+                    yield {
+                        "student_id": student_id,
+                        "admission_no": admission_no,
+                        "first_name": rng.choice(FIRST_NAMES),
+                        "last_name": last_name,
+                        "gender": gender,
+                        "dob": date(last_year - 5 - int(clazz), rng.randint(1, 12), rng.randint(1, 28)),
+                        "Doa": date(joined_start, 6, 1) - timedelta(days=rng.randint(0, 60)),
+                        "BloodGroup": rng.choice(["A+", "B+", "O+", "AB+", "A-", "O-"]),
+                        "Adharcardno": f"{rng.randint(10 ** 11, 10 ** 12 - 1)}",
+                        "Religion": "Islam",
+                        "phone": f"9{rng.randint(10 ** 8, 10 ** 9 - 1)}",
+                        "email": None,
+                        "address": f"{rng.randint(1, 999)}-{rng.randint(1, 99)}, {rng.choice(AREAS)}, Hyderabad",
+                        "Category": rng.choice(["General", "OBC", "BC-E"]),
+                        "class": clazz,
+                        "section": section,
+                        "Roll_Number": roll,
+                        "admission_date": date(joined_start, 6, 1),
+                        "status": "Active",
+                        "MotherTongue": "Urdu",
+                        "StudentType": "Day Scholar",
+                        "House": rng.choice(["Red", "Blue", "Green", "Yellow"]),
+                        "Fatherfirstname": father,
+                        "FatherLastName": last_name,
+                        "FatherPhone": f"9{rng.randint(10 ** 8, 10 ** 9 - 1)}",
+                        "SmsNo": f"9{rng.randint(10 ** 8, 10 ** 9 - 1)}",
+                        "FatherOccuption": rng.choice(OCCUPATIONS),
+                        "FatherAadhar": f"{rng.randint(10 ** 11, 10 ** 12 - 1)}",
+                        "Motherfirstname": rng.choice(FIRST_NAMES),
+                        "Motherlastname": last_name,
+                        "SecondaryPhone": f"9{rng.randint(10 ** 8, 10 ** 9 - 1)}",
+                        "SecondaryOccupation": rng.choice(["Homemaker", "Teacher", "Doctor"]),
+                        "AdmissionClass": years[joined][0],
+                        "primaryIncomePerYear": Decimal(rng.randrange(200000, 2000000, 10000)),
+                        "SecondLanguage": "Urdu",
+                        "ThirdLanguage": "Hindi",
+                        "location": LOCATION_NAME,
+                        "branch": b["branch_name"],
+                        "academic_year": self.current_year,
+                    }
+
+        self.insert(Student, profiles())
+
+        def records():
+            for student_id, b, years, joined, _ in self.students:
+                for label, (clazz, section, roll) in years.items():
+                    past = label != self.current_year
+                    closed_at = datetime(int(label[:4]) + 1, 4, 1) if past else None
+                    yield dict(id=self.next_id(StudentAcademicRecord), student_id=student_id, academic_year=label,
+                               **{"class": clazz}, section=section, roll_number=roll,
+                               is_promoted=past, promoted_date=closed_at, is_locked=past, locked_at=closed_at)
+
+        self.insert(StudentAcademicRecord, records())
+        self.admissions = admissions
+        self.admission_prefixes = sequences
+
+    # ---------------------------------------------------------
+    # FEES
+    # ---------------------------------------------------------
+    def build_fee_structure(self):
+        self.step("Fee structure: fee types, class amounts, installments")
+        self.fee_types = {}     # (branch_id, year label, kind) -> id
+        self.installments = {}  # (branch_id, year label) -> [(id, title, last_pay_date)]
+        fee_types, structures, installments = [], [], []
+        for b in self.branches:
+            for start, label in zip(self.start_years, self.years):
+                for kind, group in (("Tuition Fee", "Academic"), ("Transport Fee", "Transport"), ("Admission Fee", "Admission")):
+                    fee_type_id = self.next_id(FeeType)
+                    self.fee_types[(b["id"], label, kind)] = fee_type_id
+                    fee_types.append(dict(id=fee_type_id, feetype=kind, category=group, feetypegroup=group,
+                                          type="One Time" if kind == "Admission Fee" else "Installment",
+                                          displayname=kind, isrefundable=False, branch=b["branch_name"],
+                                          location=LOCATION_NAME, academic_year=label))
+                    for c in CLASSES:
+                        monthly = self.monthly_amount(kind, c, start)
+                        count = 1 if kind == "Admission Fee" else len(FEE_MONTHS)
+                        structures.append(dict(id=self.next_id(ClassFeeStructure), **{"class": c}, feetypeid=fee_type_id,
+                                               academicyear=label, totalamount=monthly * count, monthly_amount=monthly,
+                                               installments_count=count, isnewadmission=kind == "Admission Fee",
+                                               feegroup=group, branch=b["branch_name"], location=LOCATION_NAME,
+                                               academic_year=label))
+
+                schedule = []
+                for no, month in enumerate(FEE_MONTHS, start=1):
+                    y = start if month >= 6 else start + 1
+                    last_day = calendar.monthrange(y, month)[1]
+                    inst_id = self.next_id(FeeInstallment)
+                    title = calendar.month_name[month]
+                    schedule.append((inst_id, title, date(y, month, 10)))
+                    installments.append(dict(id=inst_id, installment_no=no, title=title, start_date=date(y, month, 1),
+                                             end_date=date(y, month, last_day), last_pay_date=date(y, month, 10),
+                                             is_admission=False, fee_type_id=self.fee_types[(b["id"], label, "Tuition Fee")],
+                                             location=LOCATION_NAME, branch=b["branch_name"], academic_year=label))
+                self.installments[(b["id"], label)] = schedule
+
+        self.insert(FeeType, fee_types)
+        self.insert(ClassFeeStructure, structures)
+        self.insert(FeeInstallment, installments)
+
+    @staticmethod
+    def monthly_amount(kind, clazz, start):
+        # Fees rise 8% a year; tuition also steps up by class
+        growth = Decimal("1.08") ** (start - 2020)
+        if kind == "Tuition Fee":
+            base = Decimal(1200 + 150 * int(clazz))
+        elif kind == "Transport Fee":
+            base = Decimal(900)
+        else:
+            base = Decimal(5000)
+        return (base * growth).quantize(Decimal("1"))
+
+    def build_fees_and_payments(self):
+        self.step("Student fees and payments with receipt sequences")
+        rng = self.rng
+        self.receipts = {}
+
+        for start, label in zip(self.start_years, self.years):
+            past = label != self.current_year
+            cutoff = self.cutoff(start)
+            for b in self.branches:
+                schedule = self.installments[(b["id"], label)]
+                fees, receipts = [], []
+                for student_id, sb, years, joined, transport in self.students:
+                    if sb is not b or label not in years:
+                        continue
+                    clazz, section, _ = years[label]
+                    has_concession = rng.random() < 0.1
+                    lines = []
+
+                    items = []
+                    if joined == label:
+                        items.append(("Admission Fee", "Admission", date(start, 6, 5)))
+                    for _, title, due in schedule:
+                        items.append(("Tuition Fee", title, due))
+                        if transport:
+                            items.append(("Transport Fee", title, due))
+
+                    for kind, title, due in items:
+                        fee_id = self.next_id(StudentFee)
+                        amount = self.monthly_amount(kind, clazz, start)
+                        concession = (amount * Decimal("0.10")).quantize(Decimal("1")) if has_concession and kind == "Tuition Fee" else Decimal(0)
+                        net = amount - concession
+                        paid = Decimal(0)
+                        if (past or due <= cutoff) and rng.random() < (0.97 if past else 0.85):
+                            paid = net if rng.random() < 0.95 else (net / 2).quantize(Decimal("1"))
+                        fees.append({
+                            "id": fee_id, "student_id": student_id,
+                            "fee_type_id": self.fee_types[(b["id"], label, kind)], "academic_year": label,
+                            "month": title, "monthly_amount": amount, "total_fee": amount, "paid_amount": paid,
+                            "due_amount": net - paid, "concession": concession,
+                            "status": "Paid" if paid == net else ("Partial" if paid else "Pending"),
+                            "due_date": due, "is_active": True,
+                        })
+                        if paid:
+                            lines.append(dict(fee_id=fee_id, kind=kind, title=title, due=due, gross=amount,
+                                              concession=concession, net=net, paid=paid))
+
+                    # Parents often clear two or three months in one visit
+                    i = 0
+                    while i < len(lines):
+                        group = [lines[i]]
+                        while i + len(group) < len(lines) and rng.random() < 0.3:
+                            group.append(lines[i + len(group)])
+                        pay_date = max(group[0]["due"] - timedelta(days=rng.randint(0, 9)), date(start, 6, 1))
+                        receipts.append((pay_date, student_id, clazz, section, group))
+                        i += len(group)
+
+                self.insert(StudentFee, fees)
+                self.insert(FeePayment, self.payment_rows(b, label, receipts))
+
+    def payment_rows(self, branch, label, receipts):
+        rng = self.rng
+        number = 0
+        # Receipt numbers run in date order per branch and year, as SequenceService issues them
+        for pay_date, student_id, clazz, section, group in sorted(receipts, key=lambda r: (r[0], r[1])):
+            number += 1
+            receipt_no = f"{number:02d}"
+            mode = rng.choice(["Cash", "Cash", "Cash", "UPI", "CardSwap"])
+            reference = f"TXN{rng.randint(10 ** 9, 10 ** 10 - 1)}" if mode != "Cash" else None
+            for line in group:
+                yield {
+                    "payment_id": self.next_id(FeePayment), "receipt_no": receipt_no, "branch": branch["branch_name"],
+                    "location": LOCATION_NAME, "academic_year": label, "student_id": student_id, "class": clazz,
+                    "section": section, "student_fee_id": line["fee_id"], "installment_name": line["title"],
+                    "fee_type": line["kind"], "gross_amount": line["gross"], "concession_amount": line["concession"],
+                    "net_payable": line["net"], "amount_paid": line["paid"], "due_amount": line["net"] - line["paid"],
+                    "payment_mode": mode, "transaction_ref": reference, "payment_date": pay_date,
+                    "payment_month": pay_date.month, "payment_year": pay_date.year,
+                    "TransactionDetails": reference, "collected_by": 1, "collected_by_name": "loadtest_admin",
+                    "status": "A",
+                }
+        self.receipts[(branch["id"], label)] = number
+
+    def build_sequences(self):
+        self.step("Enrollment sequences")
+        self.insert(BranchYearSequence, (
+            dict(id=self.next_id(BranchYearSequence), branch_id=b["id"], academic_year_id=self.year_ids[label],
+                 admission_prefix=f"{b['branch_code']}{start % 100:02d}",
+                 last_admission_no=self.admissions.get((b["id"], label), 0),
+                 receipt_prefix=b["branch_code"], last_receipt_no=self.receipts.get((b["id"], label), 0))
+            for b in self.branches for start, label in zip(self.start_years, self.years)
+        ))
+
+    # ---------------------------------------------------------
+    # ATTENDANCE
+    # ---------------------------------------------------------
+    def build_attendance(self):
+        self.step("Attendance on working days only")
+        rng = self.rng
+        # Each student keeps one absence rate for the whole history
+        absence = {s[0]: rng.uniform(0.02, 0.15) for s in self.students}
+
+        def rows():
+            for start, label in zip(self.start_years, self.years):
+                for b in self.branches:
+                    enrolled = [s[0] for s in self.students if s[1] is b and label in s[2]]
+                    for d in self.school_days(b, start, label):
+                        for student_id in enrolled:
+                            yield dict(id=self.next_id(Attendance), student_id=student_id, date=d,
+                                       status="Absent" if rng.random() < absence[student_id] else "Present",
+                                       update_count=0, branch=b["branch_name"], location=LOCATION_NAME,
+                                       academic_year=label)
+
+        self.insert(Attendance, rows())
+
+    # ---------------------------------------------------------
+    # SUBJECTS, TESTS & MARKS
+    # ---------------------------------------------------------
+    def build_academics(self):
+        self.step("Subjects, tests and marks")
+        rng = self.rng
+        subjects, tests, scales, details = [], [], [], []
+        self.subject_ids, self.test_ids = {}, {}
+        for start, label in zip(self.start_years, self.years):
+            for name in SUBJECTS:
+                self.subject_ids[(label, name)] = self.next_id(SubjectMaster)
+                subjects.append(dict(id=self.subject_ids[(label, name)], subject_name=name, subject_type="Academic",
+                                     academic_year=label, is_active=True))
+            for order, name in enumerate(TESTS, start=1):
+                self.test_ids[(label, name)] = self.next_id(TestType)
+                tests.append(dict(id=self.test_ids[(label, name)], test_name=name,
+                                  max_marks=100 if name in ("Half Yearly", "Annual") else 50,
+                                  display_order=order, academic_year=label, is_active=True))
+            scale_id = self.next_id(GradeScale)
+            scales.append(dict(id=scale_id, scale_name="Standard", location=LOCATION_NAME, branch="All",
+                               academic_year=label, total_marks=100, is_active=True))
+            details.extend(dict(id=self.next_id(GradeScaleDetails), grade_scale_id=scale_id, grade=g,
+                                min_marks=lo, max_marks=hi, is_active=True) for g, lo, hi in GRADES)
+        self.insert(SubjectMaster, subjects)
+        self.insert(TestType, tests)
+        self.insert(GradeScale, scales)
+        self.insert(GradeScaleDetails, details)
+
+        self.insert(ClassSubjectAssignment, (
+            dict(id=self.next_id(ClassSubjectAssignment), class_id=self.class_ids[c], subject_id=self.subject_ids[(label, s)],
+                 academic_year=label, location_name=LOCATION_NAME, branch_name=b["branch_name"])
+            for label in self.years for b in self.branches for c in CLASSES for s in SUBJECTS
+        ))
+
+        # Only tests already written by the cutoff
+        class_tests, test_subjects = {}, []
+        written = []
+        for start, label in zip(self.start_years, self.years):
+            for name, offset in zip(TESTS, TEST_MONTHS):
+                month = FEE_MONTHS[offset]
+                if date(start if month >= 6 else start + 1, month, 1) <= self.cutoff(start):
+                    written.append((label, name))
+        rows = []
+        for label, name in written:
+            test_id = self.test_ids[(label, name)]
+            max_marks = 100 if name in ("Half Yearly", "Annual") else 50
+            for b in self.branches:
+                for c in CLASSES:
+                    ct_id = self.next_id(ClassTest)
+                    class_tests[(label, b["id"], c, name)] = (ct_id, max_marks)
+                    rows.append(dict(id=ct_id, academic_year=label, branch=b["branch_name"], location=LOCATION_NAME,
+                                     class_id=self.class_ids[c], test_id=test_id, test_order=TESTS.index(name) + 1, status=True))
+                    test_subjects.extend(
+                        dict(id=self.next_id(ClassTestSubject), class_test_id=ct_id, subject_id=self.subject_ids[(label, s)],
+                             max_marks=max_marks, subject_order=order)
+                        for order, s in enumerate(SUBJECTS, start=1)
+                    )
+        self.insert(ClassTest, rows)
+        self.insert(ClassTestSubject, test_subjects)
+
+        def subject_assignments():
+            for student_id, b, years, _, _ in self.students:
+                for label in years:
+                    for s in SUBJECTS:
+                        yield dict(id=self.next_id(StudentSubjectAssignment), student_id=student_id,
+                                   subject_id=self.subject_ids[(label, s)], academic_year=label,
+                                   branch=b["branch_name"], status=True)
+
+        def test_assignments():
+            for student_id, b, years, _, _ in self.students:
+                for label, name in written:
+                    if label in years:
+                        ct_id, _ = class_tests[(label, b["id"], years[label][0], name)]
+                        yield dict(id=self.next_id(StudentTestAssignment), student_id=student_id, class_test_id=ct_id,
+                                   academic_year=label, branch=b["branch_name"], location=LOCATION_NAME, status=True)
+
+        def marks():
+            for student_id, b, years, _, _ in self.students:
+                # A steady ability per student keeps report cards plausible across tests
+                ability = rng.uniform(0.4, 0.95)
+                for label, name in written:
+                    if label not in years:
+                        continue
+                    clazz, section, _ = years[label]
+                    ct_id, max_marks = class_tests[(label, b["id"], clazz, name)]
+                    for s in SUBJECTS:
+                        absent = rng.random() < 0.02
+                        score = None if absent else Decimal(round(min(1.0, max(0.0, rng.gauss(ability, 0.12))) * max_marks))
+                        yield dict(id=self.next_id(StudentMarks), student_id=student_id, class_test_id=ct_id,
+                                   subject_id=self.subject_ids[(label, s)], marks_obtained=score, is_absent=absent,
+                                   academic_year=label, branch=b["branch_name"], class_id=self.class_ids[clazz],
+                                   section=section)
+
+        self.insert(StudentSubjectAssignment, subject_assignments())
+        self.insert(StudentTestAssignment, test_assignments())
+        self.insert(StudentMarks, marks())
+
+    # ---------------------------------------------------------
+    # FINISH
+    # ---------------------------------------------------------
+    def rebuild_derived(self):
+        self.step("Rebuilding student_fee_balance and fee_collection_daily")
+        FeeBalanceService.rebuild()
+        FeeCollectionService.rebuild()
+        # Whatever was cached for these tables describes data that no longer exists
+        CacheService.bump(db.session.connection(), *RESOURCE_MODELS)
+        db.session.commit()
+
+    def run(self, admin_password):
+        self.build_org(admin_password)
+        self.build_calendar()
+        self.build_students()
+        self.build_fee_structure()
+        self.build_fees_and_payments()
+        self.build_sequences()
+        self.build_attendance()
+        self.build_academics()
+        self.rebuild_derived()
+        return self.counts
+
+
+def reset_tables():
+    """Deletes every row the generator writes, children first."""
+    conn = db.session.connection()
+    for model in DERIVED_MODELS + DEPENDENT_MODELS + list(reversed(GENERATED_MODELS)):
+        if model is User:
+            continue
+        conn.execute(delete(model.__table__))
+    # Users are referenced by every audited table's created_by, so they go last
+    conn.execute(delete(User.__table__))
+    db.session.commit()
+
+
+def generate_load_data():
+    """
+    Fills an empty database with a large, realistic, reproducible school for
+    load and scale testing. Development databases only.
+
+        python scripts/generate_load_data.py --branches 4 --students 5000 --years 3
+    """
+    parser = argparse.ArgumentParser(description="Generate high-volume synthetic data with bulk inserts")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--branches", type=int, default=4)
+    parser.add_argument("--students", type=int, default=5000, help="Current-year students per branch")
+    parser.add_argument("--years", type=int, default=3, help="Academic years of history, ending at --end-year")
+    parser.add_argument("--end-year", type=int, default=2025, help="Start year of the current academic year")
+    parser.add_argument("--as-of", help="Data stops at this date (YYYY-MM-DD, default 31 January of the current year)")
+    parser.add_argument("--batch-size", type=int, default=10000, help="Rows per executemany")
+    parser.add_argument("--admin-password", default="loadtest123")
+    parser.add_argument("--reset", action="store_true", help="Delete existing rows from the generated tables first")
+    args = parser.parse_args()
+
+    # SAFETY GUARD
+    env = os.getenv("ENV", "development").lower()
+    if env not in ("development", "testing"):
+        print(f"\n[CRITICAL ERROR] Script blocked in '{env}' environment.")
+        print("This script writes millions of synthetic rows. Use in development only.")
+        sys.exit(1)
+
+    as_of = datetime.strptime(args.as_of, "%Y-%m-%d").date() if args.as_of else date(args.end_year + 1, 1, 31)
+
+    with app.app_context():
+        print(f"Database: {db.engine.url.render_as_string(hide_password=True)}")
+        if args.reset:
+            reset_tables()
+        elif db.session.execute(select(func.count()).select_from(Student)).scalar():
+            print("Students table is not empty. Re-run with --reset to replace existing data.")
+            sys.exit(1)
+
+        if db.engine.dialect.name == "sqlite":
+            # Bulk load: trade crash safety for speed on a throwaway database
+            db.session.execute(text("PRAGMA synchronous = OFF"))
+
+        generator = LoadDataGenerator(
+            seed=args.seed, branches=args.branches, students_per_branch=args.students, years=args.years,
+            end_year=args.end_year, as_of=as_of, batch_size=args.batch_size
+        )
+        counts = generator.run(args.admin_password)
+
+        total = sum(counts.values())
+        elapsed = time.perf_counter() - generator.started
+        print(f"\nDone. {total:,} rows in {elapsed:.1f}s ({total / max(elapsed, 0.001):,.0f} rows/s)")
+        for table, count in sorted(counts.items(), key=lambda c: -c[1]):
+            print(f"  {table:<28}{count:>12,}")
+        print("Log in as loadtest_admin (or loadtest_<branch code>) with the --admin-password value.")
+
+
+if __name__ == "__main__":
+    generate_load_data()
@@ -146,6 +146,33 @@ def test_soft_delete(student_id):
     except Exception as e:
         log(f"Soft Delete Error: {e}", "FAIL")
 
+# ------------------------------------------------------------------------------
+# 3. Response Versions
+# ------------------------------------------------------------------------------
+def has_nulls(value):
+    if isinstance(value, dict):
+        return any(v is None or has_nulls(v) for v in value.values())
+    if isinstance(value, list):
+        return any(has_nulls(v) for v in value)
+    return False
+
+def test_api_version_cache():
+    log("Testing v1/v2 bodies of a cached endpoint...")
+    v2_url = BASE_URL.replace("/api", "/api/v2", 1)
+    try:
+        # Order matters: each version must miss the entry the other one filled
+        v1_first = requests.get(f"{BASE_URL}/branches", headers=HEADERS)
+        v2 = requests.get(f"{v2_url}/branches", headers=HEADERS)
+        v2_header = requests.get(f"{BASE_URL}/branches", headers={**HEADERS, "X-API-Version": "2"})
+        v1_again = requests.get(f"{BASE_URL}/branches", headers=HEADERS)
+        if check(all(r.status_code == 200 for r in (v1_first, v2, v2_header, v1_again)), "Branches v1/v2 Requests"):
+            check(v1_first.json() == v1_again.json(), "v1 Body Unchanged After v2 Request")
+            check(not has_nulls(v2.json()), "v2 Body Has No Null Fields")
+            check(v2.json() == v2_header.json(), "v2 Prefix And Header Agree")
+            check(v2.headers.get("ETag") != v1_first.headers.get("ETag"), "v1 And v2 ETags Differ")
+    except Exception as e:
+        log(f"API Version Cache Error: {e}", "FAIL")
+
 # ------------------------------------------------------------------------------
 # MAIN Execution
 # ------------------------------------------------------------------------------
@@ -153,6 +180,7 @@ if __name__ == "__main__":
     print("=== QA AUTOMATION STARTED ===")
     
     if test_login():
+        test_api_version_cache()
         sid = test_create_student()
         if sid:
             test_get_student(sid)
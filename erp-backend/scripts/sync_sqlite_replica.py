@@ -0,0 +1,56 @@
+import sys
+import os
+import time
+import sqlite3
+import argparse
+
+# Fix path to allow importing from parent directory
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from extensions import db
+
+app = create_app()
+
+
+def sync_sqlite_replica():
+    """
+    Local stand-in for replication: copies the primary SQLite file over the
+    REPLICA_DATABASE_URL file with the online backup API. Run once, or with
+    --interval to keep the replica a few seconds behind like a real one.
+    """
+    parser = argparse.ArgumentParser(description="Copy the SQLite primary into the SQLite read replica")
+    parser.add_argument("--interval", type=float, help="Repeat every N seconds until interrupted")
+    args = parser.parse_args()
+
+    with app.app_context():
+        if "replica" not in db.engines:
+            print("REPLICA_DATABASE_URL is not set.")
+            sys.exit(2)
+        primary, replica = db.engine.url, db.engines["replica"].url
+        if primary.get_backend_name() != "sqlite" or replica.get_backend_name() != "sqlite":
+            print("Both the primary and the replica must be SQLite files.")
+            sys.exit(2)
+        # Relative sqlite paths resolve against the instance folder, so ask the engines
+        with db.engine.connect() as conn:
+            primary_path = conn.connection.dbapi_connection.execute("PRAGMA database_list").fetchone()[2]
+        with db.engines["replica"].connect() as conn:
+            replica_path = conn.connection.dbapi_connection.execute("PRAGMA database_list").fetchone()[2]
+        db.engines["replica"].dispose()
+
+    while True:
+        source = sqlite3.connect(primary_path)
+        target = sqlite3.connect(replica_path)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+        print(f"{time.strftime('%H:%M:%S')} copied {primary_path} -> {replica_path}")
+        if not args.interval:
+            return
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    sync_sqlite_replica()
@@ -0,0 +1,281 @@
+import gzip
+import json
+import os
+from datetime import datetime, date
+
+from flask import current_app
+from sqlalchemy import text, func, select, delete
+from extensions import db, get_now
+from models import AuditLog, AuditArchive
+
+try:
+    import zstandard
+except ImportError:  # optional; gzip is always available
+    zstandard = None
+
+# Rows per SELECT/DELETE round trip while moving a month out of the hot table
+ARCHIVE_BATCH_SIZE = 5000
+
+ARCHIVE_FIELDS = [
+    "id", "table_name", "record_id", "module", "action",
+    "old_data", "new_data", "user_id", "ip_address", "timestamp",
+]
+
+
+def _month_start(d):
+    return datetime(d.year, d.month, 1)
+
+
+def _next_month(d):
+    return datetime(d.year + (d.month == 12), d.month % 12 + 1, 1)
+
+
+def _add_months(d, months):
+    index = d.year * 12 + d.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def _open_archive(path, mode):
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError("zstandard is not installed; cannot open " + path)
+        if "w" in mode:
+            return zstandard.open(path, "wt", encoding="utf-8")
+        return zstandard.open(path, "rt", encoding="utf-8")
+    return gzip.open(path, mode + "t", encoding="utf-8")
+
+
+def _row_to_json(row):
+    record = dict(zip(ARCHIVE_FIELDS, row))
+    if isinstance(record["timestamp"], (datetime, date)):
+        record["timestamp"] = record["timestamp"].isoformat()
+    for field in ("old_data", "new_data"):
+        if isinstance(record[field], str):
+            record[field] = json.loads(record[field])
+    return json.dumps(record, default=str)
+
+
+class AuditArchiveService:
+
+    @staticmethod
+    def archive_dir():
+        path = current_app.config.get("AUDIT_ARCHIVE_DIR") or os.path.join(current_app.instance_path, "audit_archive")
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    @staticmethod
+    def _is_mysql():
+        return db.engine.dialect.name == "mysql"
+
+    # ---------------------------------------------------------
+    # PARTITIONS (MySQL only; other databases rely on idx_audit_timestamp)
+    # ---------------------------------------------------------
+    @staticmethod
+    def partition_name(month):
+        return f"p{month.year}{month.month:02d}"
+
+    @staticmethod
+    def mysql_partitions():
+        rows = db.session.execute(text("""
+            SELECT PARTITION_NAME FROM information_schema.PARTITIONS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'audit_logs' AND PARTITION_NAME IS NOT NULL
+        """)).scalars().all()
+        return set(rows)
+
+    @staticmethod
+    def ensure_partitions(months_ahead=3):
+        """Splits pmax so every month up to months_ahead has its own partition."""
+        if not AuditArchiveService._is_mysql():
+            return []
+
+        existing = AuditArchiveService.mysql_partitions()
+        if "pmax" not in existing:
+            return []
+
+        current = _month_start(get_now())
+        missing = []
+        for i in range(months_ahead + 1):
+            month = _add_months(current, i)
+            if AuditArchiveService.partition_name(month) not in existing:
+                missing.append(month)
+        if not missing:
+            return []
+
+        parts = ", ".join(
+            f"PARTITION {AuditArchiveService.partition_name(m)} VALUES LESS THAN (TO_DAYS('{_next_month(m):%Y-%m-%d}'))"
+            for m in missing
+        )
+        db.session.execute(text(
+            f"ALTER TABLE audit_logs REORGANIZE PARTITION pmax INTO ({parts}, PARTITION pmax VALUES LESS THAN MAXVALUE)"
+        ))
+        return [AuditArchiveService.partition_name(m) for m in missing]
+
+    # ---------------------------------------------------------
+    # RETENTION
+    # ---------------------------------------------------------
+    @staticmethod
+    def cold_periods(retention_months):
+        """Months (as datetimes) entirely older than the retention window that still hold rows."""
+        cutoff = _add_months(_month_start(get_now()), -retention_months)
+        oldest = db.session.query(func.min(AuditLog.timestamp)).scalar()
+        if not oldest:
+            return []
+
+        periods = []
+        month = _month_start(oldest)
+        while month < cutoff:
+            periods.append(month)
+            month = _next_month(month)
+        return periods
+
+    @staticmethod
+    def archive_period(month):
+        """
+        Streams one month of audit_logs into a compressed JSONL file, records
+        it in audit_archives, then removes the month from the hot table
+        (DROP PARTITION on MySQL, batched DELETE elsewhere). Commits.
+        """
+        start, end = month, _next_month(month)
+        table = AuditLog.__table__
+        in_range = (table.c.timestamp >= start, table.c.timestamp < end)
+
+        bounds = db.session.execute(
+            select(func.count(), func.min(table.c.timestamp), func.max(table.c.timestamp), func.min(table.c.id), func.max(table.c.id))
+            .where(*in_range)
+        ).one()
+        count, first_ts, last_ts, first_id, last_id = bounds
+        if not count:
+            return None
+
+        ext = ".jsonl.zst" if current_app.config.get("AUDIT_ARCHIVE_COMPRESSION") == "zstd" and zstandard else ".jsonl.gz"
+        path = os.path.join(AuditArchiveService.archive_dir(), f"audit_logs_{month:%Y_%m}_{first_id}-{last_id}{ext}")
+        tmp_path = path + ".tmp"
+
+        written = 0
+        with _open_archive(tmp_path, "w") as fh:
+            # Keyset walk on id so each batch is an index range scan
+            after_id = first_id - 1
+            while True:
+                rows = db.session.execute(
+                    select(*[table.c[f] for f in ARCHIVE_FIELDS])
+                    .where(*in_range, table.c.id > after_id)
+                    .order_by(table.c.id)
+                    .limit(ARCHIVE_BATCH_SIZE)
+                ).all()
+                if not rows:
+                    break
+                for row in rows:
+                    fh.write(_row_to_json(row) + "\n")
+                written += len(rows)
+                after_id = rows[-1][0]
+        os.replace(tmp_path, path)
+
+        db.session.add(AuditArchive(
+            period=f"{month:%Y-%m}",
+            file_path=path,
+            row_count=written,
+            first_timestamp=first_ts,
+            last_timestamp=last_ts
+        ))
+        db.session.commit()
+
+        partition = AuditArchiveService.partition_name(month)
+        if AuditArchiveService._is_mysql() and partition in AuditArchiveService.mysql_partitions():
+            db.session.execute(text(f"ALTER TABLE audit_logs DROP PARTITION {partition}"))
+        else:
+            while True:
+                ids = db.session.execute(
+                    select(table.c.id).where(*in_range).limit(ARCHIVE_BATCH_SIZE)
+                ).scalars().all()
+                if not ids:
+                    break
+                db.session.execute(delete(table).where(table.c.id.in_(ids)))
+                db.session.commit()
+        db.session.commit()
+
+        return {"period": f"{month:%Y-%m}", "rows": written, "file": path}
+
+    @staticmethod
+    def run_retention(retention_months=None):
+        if retention_months is None:
+            retention_months = current_app.config.get("AUDIT_RETENTION_MONTHS", 12)
+
+        created = AuditArchiveService.ensure_partitions()
+        archived = []
+        for month in AuditArchiveService.cold_periods(retention_months):
+            if result := AuditArchiveService.archive_period(month):
+                archived.append(result)
+        return {"partitions_created": created, "archived": archived}
+
+    # ---------------------------------------------------------
+    # QUERY (hot table first, then archives newest to oldest)
+    # ---------------------------------------------------------
+    @staticmethod
+    def _matches(record, filters, start, end):
+        for field, value in filters.items():
+            if value is not None and str(record.get(field)) != str(value):
+                return False
+        ts = record.get("timestamp") or ""
+        if start and ts < start.isoformat():
+            return False
+        if end and ts >= end.isoformat():
+            return False
+        return True
+
+    @staticmethod
+    def search(start=None, end=None, limit=100, include_hot=True, **filters):
+        """
+        Audit rows matching the equality filters (table_name, record_id,
+        module, action, user_id) within [start, end), newest first. Archived
+        months are read only when the hot table cannot fill the page.
+        include_hot=False reads the archives alone.
+        """
+        filters = {k: v for k, v in filters.items() if v is not None}
+
+        query = AuditLog.query
+        for field, value in filters.items():
+            query = query.filter(getattr(AuditLog, field) == value)
+        if start:
+            query = query.filter(AuditLog.timestamp >= start)
+        if end:
+            query = query.filter(AuditLog.timestamp < end)
+
+        results = [] if not include_hot else [{
+            "id": a.id,
+            "table_name": a.table_name,
+            "record_id": a.record_id,
+            "module": a.module,
+            "action": a.action,
+            "old_data": a.old_data,
+            "new_data": a.new_data,
+            "user_id": a.user_id,
+            "ip_address": a.ip_address,
+            "timestamp": a.timestamp.isoformat() if a.timestamp else None,
+            "archived": False
+        } for a in query.order_by(AuditLog.timestamp.desc(), AuditLog.id.desc()).limit(limit).all()]
+
+        if len(results) >= limit:
+            return results
+
+        archives = AuditArchive.query
+        if start:
+            archives = archives.filter(AuditArchive.last_timestamp >= start)
+        if end:
+            archives = archives.filter(AuditArchive.first_timestamp < end)
+
+        for archive in archives.order_by(AuditArchive.last_timestamp.desc()).all():
+            if not os.path.exists(archive.file_path):
+                continue
+            matched = []
+            with _open_archive(archive.file_path, "r") as fh:
+                for line in fh:
+                    record = json.loads(line)
+                    if AuditArchiveService._matches(record, filters, start, end):
+                        record["archived"] = True
+                        matched.append(record)
+            matched.sort(key=lambda r: (r["timestamp"] or "", r["id"]), reverse=True)
+            results.extend(matched[:limit - len(results)])
+            if len(results) >= limit:
+                break
+
+        return results
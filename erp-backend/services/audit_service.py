@@ -0,0 +1,360 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, date
+from decimal import Decimal
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import inspect, insert, select, tuple_
+from extensions import db, get_now
+from models import AuditLog, AuditMixin
+
+logger = logging.getLogger(__name__)
+
+MODE_OUTBOX = "outbox"  # audit rows inserted in the same transaction as the change
+MODE_ASYNC = "async"    # audit rows queued after commit and bulk-inserted by a background writer
+
+# Per mapped class: [(attribute key, column name)], built once
+_COLUMN_CACHE = {}
+
+# Cap on record ids kept in a bulk summary event
+BULK_SAMPLE_SIZE = 100
+
+
+def _make_serializable(val):
+    if isinstance(val, (datetime, date)):
+        return val.isoformat()
+    if isinstance(val, Decimal):
+        return float(val)
+    return val
+
+
+def _columns(cls):
+    if (cols := _COLUMN_CACHE.get(cls)) is None:
+        mapper = inspect(cls)
+        cols = [(prop.key, prop.columns[0].name) for prop in mapper.column_attrs]
+        _COLUMN_CACHE[cls] = cols
+    return cols
+
+
+def _snapshot(obj):
+    """Loaded, non-null column values only; never triggers a lazy load."""
+    loaded = inspect(obj).dict
+    return {name: loaded[key] for key, name in _columns(type(obj)) if loaded.get(key) is not None}
+
+
+def _stored_snapshots(session, objs):
+    """
+    (class, identity) -> stored non-null column values for the instances whose
+    columns are not all loaded (expired after a commit, or queried with
+    load_only). One SELECT per mapped class, issued before the flush runs.
+    """
+    by_class = {}
+    for obj in objs:
+        state = inspect(obj)
+        if state.identity and state.unloaded & {key for key, _ in _columns(type(obj))}:
+            by_class.setdefault(type(obj), []).append(state.identity)
+
+    stored = {}
+    for cls, identities in by_class.items():
+        mapper = inspect(cls)
+        pk = mapper.primary_key
+        key = pk[0].in_([i[0] for i in identities]) if len(pk) == 1 else tuple_(*pk).in_(identities)
+        columns = _columns(cls)
+        for row in session.connection().execute(
+            select(*pk, *(getattr(cls, attr) for attr, _ in columns)).where(key)
+        ):
+            values = row[len(pk):]
+            stored[(cls, tuple(row[:len(pk)]))] = {
+                name: value for (_, name), value in zip(columns, values) if value is not None
+            }
+    return stored
+
+
+def _is_audited(obj):
+    return isinstance(obj, AuditMixin) and not isinstance(obj, AuditLog)
+
+
+class BulkScope:
+    """Collects per-row changes for the tables of one bulk operation."""
+
+    def __init__(self, table_names, module, details):
+        self.table_names = set(table_names)
+        self.module = module
+        self.details = details
+        self.counts = {}
+        self.record_ids = []
+
+    def covers(self, obj):
+        return obj.__tablename__ in self.table_names
+
+    def count(self, action, obj=None):
+        self.counts[action] = self.counts.get(action, 0) + 1
+        if obj is not None and len(self.record_ids) < BULK_SAMPLE_SIZE:
+            if identity := inspect(obj).identity:
+                self.record_ids.append(str(identity[0]))
+
+
+class AuditWriter:
+    """
+    Bounded queue drained by one daemon thread that bulk-inserts audit rows.
+    When the queue is full the submitting request writes its own rows,
+    so bursts slow callers down instead of dropping history.
+    """
+
+    def __init__(self, engine, maxsize, batch_size, interval):
+        self.engine = engine
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.batch_size = batch_size
+        self.interval = interval
+        self.thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, rows):
+        overflow = []
+        for row in rows:
+            try:
+                self.queue.put_nowait(row)
+            except queue.Full:
+                overflow.append(row)
+        if overflow:
+            self._write(overflow)
+
+    def depth(self):
+        return self.queue.qsize()
+
+    def drain(self):
+        rows = []
+        while True:
+            try:
+                rows.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        if rows:
+            self._write(rows)
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write(batch)
+
+    def _write(self, rows):
+        try:
+            with self.engine.begin() as conn:
+                AuditService.write(conn, rows)
+        except Exception:
+            logger.exception("Failed to write %d audit rows", len(rows))
+
+
+_writer = None
+_writer_pid = None
+_writer_lock = threading.Lock()
+
+
+class AuditService:
+
+    @staticmethod
+    def mode():
+        return current_app.config.get("AUDIT_MODE", MODE_OUTBOX)
+
+    @staticmethod
+    def _context():
+        user_id = getattr(g, "user_id", None)
+        # Nginx-safe IP detection
+        ip_address = request.headers.get("X-Forwarded-For", request.remote_addr)
+        return user_id, ip_address
+
+    @staticmethod
+    def _record(obj, action, old_data, new_data, user_id, ip_address, timestamp, record_id=None):
+        return {
+            "table_name": obj.__tablename__,
+            "record_id": record_id,
+            "module": getattr(obj, "__audit_module__", "GENERAL"),
+            "action": action,
+            "old_data": old_data,
+            "new_data": new_data,
+            "user_id": user_id,
+            "ip_address": ip_address,
+            "timestamp": timestamp,
+        }
+
+    @staticmethod
+    def capture(session):
+        """
+        Called from before_flush: builds compact change records for the
+        pending AuditMixin objects. Inserts keep only loaded, non-null
+        columns; deletes keep the stored non-null columns, read back for
+        instances that are not fully loaded; updates keep only the changed
+        columns. JSON conversion is deferred to write time.
+        """
+        user_id, ip_address = AuditService._context()
+        timestamp = get_now()
+        scope = session.info.get("audit_bulk")
+        pending = session.info.setdefault("audit_flush", [])
+
+        for obj in session.new:
+            if not _is_audited(obj):
+                continue
+            if scope and scope.covers(obj):
+                scope.count("CREATE")
+                continue
+            # record_id is filled in after the flush assigns the key
+            pending.append((obj, AuditService._record(obj, "CREATE", None, _snapshot(obj), user_id, ip_address, timestamp)))
+
+        for obj in session.dirty:
+            if not _is_audited(obj) or not session.is_modified(obj, include_collections=False):
+                continue
+
+            state = inspect(obj)
+            old_data = {}
+            new_data = {}
+            for key, _ in _columns(type(obj)):
+                hist = state.attrs[key].history
+                if not hist.has_changes():
+                    continue
+                old_data[key] = hist.deleted[0] if hist.deleted else None
+                new_data[key] = hist.added[0] if hist.added else None
+
+            if not old_data:
+                continue
+            if scope and scope.covers(obj):
+                scope.count("UPDATE", obj)
+                continue
+            record_id = str(state.identity[0]) if state.identity else None
+            pending.append((None, AuditService._record(obj, "UPDATE", old_data, new_data, user_id, ip_address, timestamp, record_id)))
+
+        deleted = []
+        for obj in session.deleted:
+            if not _is_audited(obj):
+                continue
+            if scope and scope.covers(obj):
+                scope.count("DELETE", obj)
+                continue
+            deleted.append(obj)
+
+        # An expired or partially loaded instance would otherwise leave old_data empty or short
+        stored = _stored_snapshots(session, deleted) if deleted else {}
+        for obj in deleted:
+            state = inspect(obj)
+            record_id = str(state.identity[0]) if state.identity else None
+            old_data = stored.get((type(obj), state.identity)) or _snapshot(obj)
+            pending.append((None, AuditService._record(obj, "DELETE", old_data, None, user_id, ip_address, timestamp, record_id)))
+
+    @staticmethod
+    def after_flush(session):
+        """Resolves new primary keys, then writes (outbox) or stages (async) the records."""
+        if not (pending := session.info.pop("audit_flush", None)):
+            return
+
+        records = []
+        for obj, record in pending:
+            if obj is not None:
+                # identity is only set after the flush completes; the PK attribute already is
+                pk = inspect(obj).mapper.primary_key_from_instance(obj)
+                record["record_id"] = str(pk[0]) if pk and pk[0] is not None else None
+            records.append(record)
+
+        AuditService._emit(session, records)
+
+    @staticmethod
+    def _emit(session, records):
+        if AuditService.mode() == MODE_ASYNC:
+            session.info.setdefault("audit_outbox", []).extend(records)
+        else:
+            AuditService.write(session.connection(), records)
+
+    @staticmethod
+    def after_commit(session):
+        if records := session.info.pop("audit_outbox", None):
+            AuditService.writer().submit(records)
+
+    @staticmethod
+    def discard(session):
+        session.info.pop("audit_flush", None)
+        session.info.pop("audit_outbox", None)
+
+    @staticmethod
+    def write(connection, records):
+        """One executemany INSERT for a batch of records."""
+        rows = []
+        for r in records:
+            row = dict(r)
+            for field in ("old_data", "new_data"):
+                if row[field] is not None:
+                    row[field] = {k: _make_serializable(v) for k, v in row[field].items()}
+            rows.append(row)
+        connection.execute(insert(AuditLog.__table__), rows)
+
+    @staticmethod
+    def writer():
+        """Per-process writer, created lazily so forked workers each get their own thread."""
+        global _writer, _writer_pid
+        if _writer is None or _writer_pid != os.getpid():
+            with _writer_lock:
+                if _writer is None or _writer_pid != os.getpid():
+                    _writer = AuditWriter(
+                        db.engine,
+                        maxsize=current_app.config.get("AUDIT_QUEUE_SIZE", 10000),
+                        batch_size=current_app.config.get("AUDIT_BATCH_SIZE", 500),
+                        interval=current_app.config.get("AUDIT_FLUSH_INTERVAL", 1.0)
+                    )
+                    _writer_pid = os.getpid()
+                    atexit.register(_writer.drain)
+        return _writer
+
+    @staticmethod
+    def queue_depth():
+        return _writer.depth() if _writer is not None and _writer_pid == os.getpid() else 0
+
+    @staticmethod
+    @contextmanager
+    def bulk(table_names, module="GENERAL", **details):
+        """
+        Replaces per-row audit records for the given tables with one BULK
+        event carrying per-action counts and a sample of record ids.
+        Commit after the block: the summary is written when it exits.
+        """
+        if isinstance(table_names, str):
+            table_names = [table_names]
+
+        session = db.session()
+        scope = BulkScope(table_names, module, details)
+        previous = session.info.get("audit_bulk")
+        session.info["audit_bulk"] = scope
+        try:
+            yield scope
+            session.flush()
+        finally:
+            if previous is None:
+                session.info.pop("audit_bulk", None)
+            else:
+                session.info["audit_bulk"] = previous
+
+        if not scope.counts or not has_request_context():
+            return
+
+        user_id, ip_address = AuditService._context()
+        AuditService._emit(session, [{
+            "table_name": ",".join(sorted(scope.table_names))[:100],
+            "record_id": None,
+            "module": module,
+            "action": "BULK",
+            "old_data": None,
+            "new_data": {"counts": scope.counts, "record_ids": scope.record_ids, **details},
+            "user_id": user_id,
+            "ip_address": ip_address,
+            "timestamp": get_now(),
+        }])
@@ -0,0 +1,114 @@
+from flask import current_app, g, has_app_context
+from sqlalchemy import or_
+from extensions import db, cache, get_today
+from models import Branch, UserBranchAccess
+from services.cache_service import CacheService
+from services.user_cache_service import UserCacheService
+from services.metrics_service import MetricsService
+
+DEFAULT_TIMEOUT = 300
+
+# cache_versions resource bumped by any Branch write (see RESOURCE_MODELS)
+BRANCH_ACCESS_RESOURCE = "branch_access"
+
+
+class BranchAccess:
+    """
+    One user's effective branches: the home branch (users.branch) plus every
+    active UserBranchAccess grant whose start/end dates cover today.
+    Each branch is indexed by id, code and name, so checks are set lookups.
+    """
+
+    def __init__(self, unrestricted, branches, home=None):
+        self.unrestricted = unrestricted
+        self.branches = branches  # [(id, code, name)]
+        self.names = {}
+        for branch_id, code, name in branches:
+            for key in (str(branch_id), code, name):
+                if key:
+                    self.names[key] = name
+        # users.branch counts even when it matches no Branch row
+        if home and home not in self.names:
+            self.names[home] = home
+
+    @property
+    def ids(self):
+        return {b[0] for b in self.branches}
+
+    @property
+    def codes(self):
+        return {b[1] for b in self.branches}
+
+    @property
+    def branch_names(self):
+        return {b[2] for b in self.branches}
+
+    def can_access(self, branch):
+        if self.unrestricted:
+            return True
+        return bool(branch) and str(branch) in self.names
+
+    def resolve(self, branch):
+        """Branch name for an accessible id/code/name, else None."""
+        return self.names.get(str(branch)) if branch else None
+
+
+class BranchAccessService:
+
+    @staticmethod
+    def _versions(user_id):
+        return UserCacheService.version(user_id), CacheService.version(BRANCH_ACCESS_RESOURCE)
+
+    @staticmethod
+    def _load(user):
+        today = get_today()
+        home = [user.branch] if user.branch else []
+
+        rows = db.session.query(Branch.id, Branch.branch_code, Branch.branch_name).outerjoin(
+            UserBranchAccess,
+            (UserBranchAccess.branch_id == Branch.id) & (UserBranchAccess.user_id == user.user_id)
+        ).filter(or_(
+            Branch.branch_code.in_(home),
+            Branch.branch_name.in_(home),
+            (UserBranchAccess.is_active == True) & (UserBranchAccess.start_date <= today) & (
+                UserBranchAccess.end_date.is_(None) | (UserBranchAccess.end_date >= today)
+            )
+        )).distinct().all()
+
+        return [(r.id, r.branch_code, r.branch_name) for r in rows]
+
+    @staticmethod
+    def for_user(user):
+        """
+        Cached per user version (see UserCacheService), branch version (a
+        cache_versions row) and day (grants start and end on dates), and
+        memoised for the rest of the request.
+        """
+        memo = g.setdefault("branch_access", {}) if has_app_context() else {}
+        if (access := memo.get(user.user_id)) is not None:
+            return access
+
+        unrestricted = user.role == "Admin" or user.branch == "All"
+        if unrestricted:
+            access = BranchAccess(True, [])
+        else:
+            user_version, global_version = BranchAccessService._versions(user.user_id)
+            key = f"branch_access:{user.user_id}:{user_version}:{global_version}:{get_today().isoformat()}"
+            branches = cache.get(key)
+            MetricsService.record_cache("branch_access", branches is not None)
+            if branches is None:
+                branches = BranchAccessService._load(user)
+                cache.set(key, branches, timeout=current_app.config.get("BRANCH_ACCESS_CACHE_TIMEOUT", DEFAULT_TIMEOUT))
+            access = BranchAccess(False, [tuple(b) for b in branches], home=user.branch)
+
+        memo[user.user_id] = access
+        return access
+
+    @staticmethod
+    def can_access(user, branch):
+        return BranchAccessService.for_user(user).can_access(branch)
+
+    @staticmethod
+    def forget():
+        if has_app_context():
+            g.pop("branch_access", None)
@@ -0,0 +1,282 @@
+import hashlib
+import logging
+import uuid
+from functools import wraps
+
+from flask import request, current_app, make_response, g, has_request_context, has_app_context
+from sqlalchemy import select, func
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from extensions import db, cache, get_now
+from models import CacheVersion
+from services.metrics_service import MetricsService
+from services.response_service import ResponseService
+
+# Cached resource -> models whose writes make it stale
+RESOURCE_MODELS = {
+    "branches": ("Branch", "OrgMaster"),
+    "locations": ("OrgMaster",),
+    "academic_years": ("OrgMaster",),
+    "classes": ("ClassMaster", "ClassSection", "Branch", "OrgMaster"),
+    "grade_scales": ("GradeScale", "GradeScaleDetails"),
+    "test_types": ("TestType",),
+    "installment_schedule": ("FeeInstallment", "FeeType", "Branch", "OrgMaster"),
+    "concessions": ("Concession", "FeeType"),
+    "class_tests": (
+        "ClassTest", "ClassTestSubject", "ClassMaster", "TestType", "SubjectMaster",
+        "ClassSubjectAssignment", "Branch", "OrgMaster",
+    ),
+    # In-process OrgRegistryService snapshot
+    "org_registry": ("Branch", "OrgMaster", "ClassMaster"),
+    # In-process YearArchiveService set of archived years
+    "year_archives": ("AcademicYearArchive",),
+    # BranchAccessService sets: codes and names of every user's branches may change
+    "branch_access": ("Branch",),
+    # Conditional GET stamps of student and fee listings; archiving a year moves their rows
+    "students": ("Student", "StudentAcademicRecord", "AcademicYearArchive"),
+    # student_fee_balance is derived from studentfees in the same flush
+    "fee_balances": ("StudentFee", "AcademicYearArchive"),
+    "fee_payments": ("FeePayment", "AcademicYearArchive"),
+    "fee_types": ("FeeType",),
+    "fee_structures": ("ClassFeeStructure", "FeeType"),
+}
+
+# Written by every admission and fee payment in every branch. Bumping them inside
+# the writer's transaction would queue all cashiers on one row lock until commit,
+# so they are bumped right after commit instead (see bump_committed). Readers may
+# briefly see the new rows under the old version; nothing caches them under it
+# once the bump lands.
+DEFERRED_RESOURCES = {"students", "fee_balances", "fee_payments"}
+
+logger = logging.getLogger(__name__)
+
+MODEL_RESOURCES = {}
+for _resource, _models in RESOURCE_MODELS.items():
+    for _model in _models:
+        MODEL_RESOURCES.setdefault(_model, set()).add(_resource)
+
+DEFAULT_TIMEOUT = 3600
+
+
+class CacheService:
+
+    @staticmethod
+    def versions():
+        """
+        resource -> version, read from cache_versions once per request.
+        The table holds one short row per resource, so this is a single
+        primary-key scan; every worker and node derives the same keys from it.
+        """
+        if has_request_context() and "cache_versions" in g:
+            return g.cache_versions
+
+        versions = dict(db.session.execute(select(CacheVersion.resource, CacheVersion.version)).all())
+        if has_request_context():
+            g.cache_versions = versions
+        return versions
+
+    @staticmethod
+    def version(resource):
+        return CacheService.versions().get(resource, "0")
+
+    @staticmethod
+    def forget_versions():
+        if has_app_context():
+            g.pop("cache_versions", None)
+
+    @staticmethod
+    def bump(connection, *resources):
+        """
+        Moves each resource to a fresh namespace on the caller's connection,
+        so the new version commits (or rolls back) with the write itself.
+        A single upsert per resource: rows missing from the seed are created
+        without a racing INSERT. Old entries are never deleted; nothing asks
+        for their keys again.
+        """
+        stmt = CacheService._upsert(connection.dialect.name)
+        for resource in sorted(resources):
+            connection.execute(stmt, {"resource": resource, "version": uuid.uuid4().hex[:12], "updated_at": get_now()})
+
+    @staticmethod
+    def _upsert(dialect_name):
+        table = CacheVersion.__table__
+        if dialect_name in ("mysql", "mariadb"):
+            stmt = mysql.insert(table)
+            return stmt.on_duplicate_key_update(version=stmt.inserted.version, updated_at=stmt.inserted.updated_at)
+
+        stmt = (postgresql if dialect_name == "postgresql" else sqlite).insert(table)
+        return stmt.on_conflict_do_update(
+            index_elements=["resource"],
+            set_={"version": stmt.excluded.version, "updated_at": stmt.excluded.updated_at}
+        )
+
+    @staticmethod
+    def bump_committed(*resources):
+        """
+        Bumps resources in a short transaction of their own, after the write
+        that staled them has committed. A failure leaves the old versions in
+        place; it is logged rather than raised, since the write already stands.
+        """
+        try:
+            with db.engine.begin() as connection:
+                CacheService.bump(connection, *resources)
+        except SQLAlchemyError:
+            logger.exception("Could not bump cache versions %s", sorted(resources))
+
+    @staticmethod
+    def resources_for_models(model_names):
+        resources = set()
+        for name in model_names:
+            resources |= MODEL_RESOURCES.get(name, set())
+        return resources
+
+    @staticmethod
+    def request_scope():
+        """(branch, academic_year) the current request is asking about."""
+        branch = request.args.get("branch") or request.args.get("branch_id") or request.headers.get("X-Branch") or "All"
+        year = request.args.get("academic_year") or request.args.get("academic_year_id") or request.headers.get("X-Academic-Year") or "-"
+        return branch, year
+
+    @staticmethod
+    def make_key(resource, user=None):
+        branch, year = CacheService.request_scope()
+        # Views that narrow results by role/branch must not share entries across users
+        user_scope = f"{user.role}|{user.branch}" if user is not None else "-"
+        args = "&".join(f"{k}={v}" for k, v in sorted(request.args.items(multi=True)))
+        # v1 and v2 share request.path (/api/v2/ is rewritten) but not the body
+        api_version = f"v{2 if ResponseService.is_v2() else 1}"
+        digest = hashlib.md5(f"{request.path}?{args}|{user_scope}|{api_version}".encode()).hexdigest()
+        return f"{resource}:{CacheService.version(resource)}:{branch}:{year}:{digest}"
+
+
+    # ---------------------------------------------------------
+    # CONDITIONAL GET
+    # ---------------------------------------------------------
+    @staticmethod
+    def table_stamp(model, **filters):
+        """
+        Row count + latest updated_at of the rows matching column=value filters
+        (AuditMixin columns); any insert, update or delete among them moves it.
+        Only for indexed filters that select a handful of rows.
+        """
+        stmt = select(func.count(), func.max(model.updated_at)).select_from(model).where(
+            *(getattr(model, column) == value for column, value in filters.items())
+        )
+        count, latest = db.session.execute(stmt).one()
+        return f"{model.__tablename__}:{count}:{latest.isoformat() if latest else '-'}"
+
+    @staticmethod
+    def source_stamp(source, view_kwargs):
+        if isinstance(source, str):
+            return CacheService.version(source)
+        # (Model, "student_id"): only the rows of the student in the URL. updated_at
+        # has whole-second precision on MySQL, so the versions of the model's
+        # resources are added to tell apart two edits within the same second.
+        model, column = source
+        versions = [CacheService.version(r) for r in sorted(MODEL_RESOURCES.get(model.__name__, ()))]
+        return ":".join([CacheService.table_stamp(model, **{column: view_kwargs[column]}), *versions])
+
+    @staticmethod
+    def etag(*parts):
+        """Strong ETag for this request's view of the given versions/stamps."""
+        branch, year = CacheService.request_scope()
+        args = "&".join(f"{k}={v}" for k, v in sorted(request.args.items(multi=True)))
+        scope = (
+            f"{request.path}?{args}|{branch}|{year}|{request.headers.get('X-Location', '-')}"
+            f"|{g.get('user_id', '-')}|v{2 if ResponseService.is_v2() else 1}"
+        )
+        return hashlib.md5("|".join((scope, *parts)).encode()).hexdigest()
+
+    @staticmethod
+    def not_modified(etag):
+        """304 response when If-None-Match already holds this ETag (or one of its compressed variants)."""
+        if not request.if_none_match:
+            return None
+        for candidate in (etag, *(f"{etag}-{encoding}" for encoding in ResponseService.encodings())):
+            if request.if_none_match.contains_weak(candidate):
+                response = current_app.response_class(status=304)
+                CacheService.tag_response(response, candidate)
+                return response
+        return None
+
+    @staticmethod
+    def tag_response(response, etag):
+        encoding = response.headers.get("Content-Encoding")
+        response.set_etag(f"{etag}-{encoding}" if encoding else etag)
+        # Cached copies must be revalidated (cheap 304s) rather than reused blindly
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        response.vary.add("Accept-Encoding")
+        response.vary.add("Authorization")
+        return response
+
+
+def conditional_get(*sources):
+    """
+    Answers If-None-Match with 304 before the view (and its serialization)
+    runs. Each source is a cache_versions resource name (bumped on commit
+    through RESOURCE_MODELS), or (model, "url_arg") to stamp only the rows
+    whose indexed column equals that URL argument. A stamp the database
+    cannot produce (e.g. an unreachable replica) serves the view untagged. The ETag covers those plus the
+    request's path, args, scope headers, user and API version.
+    Place below @token_required.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            try:
+                tag = CacheService.etag(*(CacheService.source_stamp(source, kwargs) for source in sources))
+            except SQLAlchemyError:
+                # No stamp, no ETag: serve the view as if the decorator wasn't there
+                logger.warning("Could not compute ETag for %s", request.path, exc_info=True)
+                return f(*args, **kwargs)
+            not_modified = CacheService.not_modified(tag)
+            MetricsService.record_cache("etag", not_modified is not None)
+            if not_modified is not None:
+                return not_modified
+
+            response = make_response(f(*args, **kwargs))
+            if response.status_code == 200:
+                CacheService.tag_response(response, tag)
+            return response
+        return decorated
+    return decorator
+
+
+def cached_resource(resource, timeout=None):
+    """
+    Serves a GET view from the cache under the resource's versioned namespace,
+    with an ETag so unchanged responses come back as 304.
+    Place below @token_required so authentication still runs on every request.
+    Only 200 responses are stored.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            user = args[0] if args and hasattr(args[0], "role") else None
+            key = CacheService.make_key(resource, user)
+
+            # The key already carries the resource version, so it doubles as the ETag source
+            tag = CacheService.etag(key)
+            not_modified = CacheService.not_modified(tag)
+            MetricsService.record_cache("etag", not_modified is not None)
+            if not_modified is not None:
+                return not_modified
+
+            hit = cache.get(key)
+            MetricsService.record_cache("reference", hit is not None)
+            if hit is not None:
+                body, status, mimetype = hit
+                return CacheService.tag_response(current_app.response_class(body, status=status, mimetype=mimetype), tag)
+
+            response = make_response(f(*args, **kwargs))
+            if response.status_code == 200:
+                cache.set(
+                    key,
+                    (response.get_data(), response.status_code, response.mimetype),
+                    timeout=timeout or current_app.config.get("REFERENCE_CACHE_TIMEOUT", DEFAULT_TIMEOUT)
+                )
+                CacheService.tag_response(response, tag)
+            return response
+        return decorated
+    return decorator
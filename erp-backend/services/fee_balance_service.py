@@ -0,0 +1,140 @@
+from extensions import db, get_now
+from models import StudentFee, StudentFeeBalance
+from sqlalchemy import select, update, insert, delete, func, literal, inspect
+
+# Keep IN (...) lists well below driver/DB parameter limits
+CHUNK_SIZE = 500
+
+BALANCE_COLUMNS = ["student_id", "academic_year", "total_fee", "paid_amount", "due_amount", "concession", "updated_at"]
+
+
+class FeeBalanceService:
+
+    @staticmethod
+    def affected_keys(session):
+        """
+        Collects (student_id, academic_year) pairs for every StudentFee that is
+        being inserted, modified or deleted in the pending flush.
+        Old keys are included too, so moving a fee between students/years
+        refreshes both sides.
+        """
+        keys = set()
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+            if not isinstance(obj, StudentFee):
+                continue
+            if obj in session.dirty and not session.is_modified(obj, include_collections=False):
+                continue
+
+            keys.add((obj.student_id, obj.academic_year))
+
+            state = inspect(obj)
+            old_student = state.attrs.student_id.history.deleted
+            old_year = state.attrs.academic_year.history.deleted
+            if old_student or old_year:
+                keys.add((
+                    old_student[0] if old_student else obj.student_id,
+                    old_year[0] if old_year else obj.academic_year
+                ))
+
+        return {k for k in keys if k[0] is not None and k[1]}
+
+    @staticmethod
+    def _by_year(keys):
+        grouped = {}
+        for student_id, year in keys:
+            grouped.setdefault(year, set()).add(student_id)
+        for year, ids in grouped.items():
+            ids = sorted(ids)
+            for i in range(0, len(ids), CHUNK_SIZE):
+                yield year, ids[i:i + CHUNK_SIZE]
+
+    @staticmethod
+    def _aggregate_select(academic_year, student_ids=None, sf=None):
+        sf = StudentFee.__table__ if sf is None else sf
+        q = select(
+            sf.c.student_id,
+            sf.c.academic_year,
+            func.coalesce(func.sum(sf.c.total_fee), 0),
+            func.coalesce(func.sum(sf.c.paid_amount), 0),
+            func.coalesce(func.sum(sf.c.due_amount), 0),
+            func.coalesce(func.sum(sf.c.concession), 0),
+            literal(get_now()),
+        ).where(
+            sf.c.academic_year == academic_year,
+            sf.c.is_active == True
+        )
+        if student_ids is not None:
+            q = q.where(sf.c.student_id.in_(student_ids))
+        return q.group_by(sf.c.student_id, sf.c.academic_year)
+
+    @staticmethod
+    def refresh(connection, keys):
+        """
+        Recomputes the balance rows for the given keys from studentfees.
+        Runs on the caller's connection so it commits or rolls back together
+        with the fee rows that triggered it. The sums are evaluated inside
+        the UPDATE itself, which makes concurrent writers for the same student
+        serialize on the studentfees rows instead of overwriting each other.
+        """
+        sf = StudentFee.__table__
+        bal = StudentFeeBalance.__table__
+
+        def correlated_sum(col):
+            return select(func.coalesce(func.sum(col), 0)).where(
+                sf.c.student_id == bal.c.student_id,
+                sf.c.academic_year == bal.c.academic_year,
+                sf.c.is_active == True
+            ).scalar_subquery()
+
+        for year, student_ids in FeeBalanceService._by_year(keys):
+            existing = set(connection.execute(
+                select(bal.c.student_id).where(
+                    bal.c.academic_year == year,
+                    bal.c.student_id.in_(student_ids)
+                )
+            ).scalars())
+
+            if existing:
+                connection.execute(
+                    update(bal).where(
+                        bal.c.academic_year == year,
+                        bal.c.student_id.in_(existing)
+                    ).values(
+                        total_fee=correlated_sum(sf.c.total_fee),
+                        paid_amount=correlated_sum(sf.c.paid_amount),
+                        due_amount=correlated_sum(sf.c.due_amount),
+                        concession=correlated_sum(sf.c.concession),
+                        updated_at=get_now()
+                    )
+                )
+
+            if missing := [sid for sid in student_ids if sid not in existing]:
+                connection.execute(
+                    insert(bal).from_select(BALANCE_COLUMNS, FeeBalanceService._aggregate_select(year, missing))
+                )
+
+    @staticmethod
+    def rebuild(academic_year=None):
+        """
+        Full reconciliation: drops and re-derives balance rows for one year
+        (or every year when academic_year is None). Archived years are read
+        from studentfees plus studentfees_archive. Caller commits.
+        """
+        from services.year_archive_service import YearArchiveService
+
+        bal = StudentFeeBalance.__table__
+
+        if academic_year:
+            years = [academic_year]
+        else:
+            years = sorted(
+                {y for (y,) in db.session.query(StudentFee.academic_year).distinct() if y}
+                | YearArchiveService.archived_years()
+            )
+
+        conn = db.session.connection()
+        for year in years:
+            sf = YearArchiveService.table_source(StudentFee.__table__, year)
+            conn.execute(delete(bal).where(bal.c.academic_year == year))
+            conn.execute(insert(bal).from_select(BALANCE_COLUMNS, FeeBalanceService._aggregate_select(year, sf=sf)))
+        return len(years)
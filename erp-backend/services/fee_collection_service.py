@@ -0,0 +1,265 @@
+from extensions import db, get_now
+from models import FeePayment, FeeCollectionDaily
+from sqlalchemy import select, insert, delete, func, literal, case, inspect, tuple_
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+# Keep IN (...) lists well below driver/DB parameter limits
+CHUNK_SIZE = 500
+
+ROLLUP_KEY = [
+    "collection_date", "branch", "academic_year", "class_name", "section",
+    "fee_type", "installment_name", "payment_mode", "collected_by_name",
+]
+ROLLUP_MEASURES = ["line_count", "receipt_count", "gross_amount", "concession_amount", "amount_paid"]
+ROLLUP_COLUMNS = ROLLUP_KEY + ROLLUP_MEASURES + ["updated_at"]
+
+# FeePayment attributes a line's rollup row is derived from; the first nine map onto ROLLUP_KEY
+LINE_ATTRS = (
+    "payment_date", "branch", "academic_year", "class_name", "section",
+    "fee_type", "installment_name", "payment_mode", "collected_by_name",
+    "gross_amount", "concession_amount", "amount_paid", "status", "receipt_no",
+)
+
+
+class FeeCollectionService:
+
+    @staticmethod
+    def _lines(connection, *conditions):
+        """payment_id -> LINE_ATTRS values of the fee_payments rows matching the conditions."""
+        fp = FeePayment.__table__
+        columns = [FeePayment.__mapper__.attrs[name].columns[0] for name in LINE_ATTRS]
+        return {
+            payment_id: dict(zip(LINE_ATTRS, values))
+            for payment_id, *values in connection.execute(select(fp.c.payment_id, *columns).where(*conditions))
+        }
+
+    @staticmethod
+    def stored_lines(session):
+        """
+        payment_id -> values as currently stored, for every FeePayment the pending
+        flush edits or deletes. Read from the table in before_flush: an attribute
+        set on an expired instance (e.g. after a commit) keeps no history of the
+        value it replaces.
+        """
+        ids = sorted(
+            inspect(obj).identity[0]
+            for obj in list(session.dirty) + list(session.deleted)
+            if isinstance(obj, FeePayment)
+            and (obj in session.deleted or session.is_modified(obj, include_collections=False))
+        )
+        stored = {}
+        connection = session.connection() if ids else None
+        for i in range(0, len(ids), CHUNK_SIZE):
+            stored.update(FeeCollectionService._lines(
+                connection, FeePayment.__table__.c.payment_id.in_(ids[i:i + CHUNK_SIZE])
+            ))
+        return stored
+
+    @staticmethod
+    def changed_lines(session, stored):
+        """
+        payment_id -> (old, new) values for every FeePayment posted, cancelled,
+        edited or deleted by the flush in progress; old is None for inserts and
+        new is None for deletes. Called from after_flush, where new lines already
+        have their ids; old values come from stored_lines().
+        """
+        lines = {}
+        for obj in session.new:
+            if isinstance(obj, FeePayment):
+                lines[obj.id] = (None, {name: getattr(obj, name) for name in LINE_ATTRS})
+        for obj in session.dirty:
+            payment_id = inspect(obj).identity[0] if isinstance(obj, FeePayment) else None
+            if payment_id in stored:
+                lines[payment_id] = (stored[payment_id], {name: getattr(obj, name) for name in LINE_ATTRS})
+        for obj in session.deleted:
+            payment_id = inspect(obj).identity[0] if isinstance(obj, FeePayment) else None
+            if payment_id in stored:
+                lines[payment_id] = (stored[payment_id], None)
+        return lines
+
+    @staticmethod
+    def _receipt(values):
+        return values["academic_year"], values["branch"], values["receipt_no"]
+
+    @staticmethod
+    def _row_key(values):
+        """Rollup key of a payment line, or None for lines the rollup skips (no date)."""
+        if values["payment_date"] is None:
+            return None
+        key = [values[name] for name in LINE_ATTRS[:len(ROLLUP_KEY)]]
+        # Optional dimensions are stored as '' (see _aggregate_select)
+        return tuple(key[:4] + ["" if v is None else v for v in key[4:]])
+
+    @staticmethod
+    def apply(connection, lines):
+        """
+        Adds signed per-line deltas for the changed lines to their rollup rows.
+        A receipt stays credited to its lowest active line id, so when the flush
+        moves that first line (by posting, cancelling or editing lines) the credit
+        moves with it, including onto lines the flush did not touch.
+        Runs on the caller's connection so the rollup commits with the payment
+        lines; each upsert locks only its own row, never the whole branch-day.
+        Rows that drop to zero stay until the next rebuild().
+        """
+        fp = FeePayment.__table__
+        receipt = FeeCollectionService._receipt
+
+        receipts = {
+            receipt(values)
+            for old, new in lines.values()
+            for values in (old, new)
+            if values and values["status"] == "A"
+        }
+        if not receipts:
+            return
+
+        # Active lines of the touched receipts as the flush left them
+        current = {}
+        receipts = sorted(receipts)
+        for i in range(0, len(receipts), CHUNK_SIZE):
+            current.update(FeeCollectionService._lines(
+                connection,
+                fp.c.status == 'A',
+                tuple_(fp.c.academic_year, fp.c.branch, fp.c.receipt_no).in_(receipts[i:i + CHUNK_SIZE])
+            ))
+
+        # First active line of each receipt before and after the flush
+        before, after = {}, {}
+        for payment_id, values in current.items():
+            r = receipt(values)
+            after[r] = min(after.get(r, payment_id), payment_id)
+            if payment_id not in lines:
+                before[r] = min(before.get(r, payment_id), payment_id)
+        for payment_id, (old, new) in lines.items():
+            if old and old["status"] == "A":
+                r = receipt(old)
+                before[r] = min(before.get(r, payment_id), payment_id)
+
+        deltas = {}
+
+        def add(values, sign, first, whole_line=True):
+            key = FeeCollectionService._row_key(values)
+            if key is None:
+                return
+            delta = deltas.setdefault(key, [0, 0, 0, 0, 0])
+            delta[1] += sign if first else 0
+            if whole_line:
+                delta[0] += sign
+                delta[2] += sign * (values["gross_amount"] or 0)
+                delta[3] += sign * (values["concession_amount"] or 0)
+                delta[4] += sign * (values["amount_paid"] or 0)
+
+        for payment_id, (old, new) in lines.items():
+            if old and old["status"] == "A":
+                add(old, -1, before.get(receipt(old)) == payment_id)
+
+        for payment_id, values in current.items():
+            r = receipt(values)
+            if payment_id in lines:
+                add(values, 1, after.get(r) == payment_id)
+            elif before.get(r) != after.get(r):
+                # Untouched line that gained or lost its receipt's credit
+                if before.get(r) == payment_id:
+                    add(values, -1, True, whole_line=False)
+                if after.get(r) == payment_id:
+                    add(values, 1, True, whole_line=False)
+
+        now = get_now()
+        rows = [
+            {**dict(zip(ROLLUP_KEY, key)), **dict(zip(ROLLUP_MEASURES, delta)), "updated_at": now}
+            for key, delta in sorted(deltas.items())
+            if any(delta)
+        ]
+        if rows:
+            # Sorted keys: concurrent cashiers take row locks in the same order
+            connection.execute(FeeCollectionService._upsert(connection.dialect.name), rows)
+
+    @staticmethod
+    def _upsert(dialect_name):
+        """INSERT that adds the measures onto an existing row with the same rollup key."""
+        daily = FeeCollectionDaily.__table__
+        if dialect_name in ("mysql", "mariadb"):
+            stmt = mysql.insert(daily)
+            return stmt.on_duplicate_key_update(
+                {name: daily.c[name] + stmt.inserted[name] for name in ROLLUP_MEASURES}
+                | {"updated_at": stmt.inserted.updated_at}
+            )
+
+        stmt = (postgresql if dialect_name == "postgresql" else sqlite).insert(daily)
+        return stmt.on_conflict_do_update(
+            index_elements=ROLLUP_KEY,
+            set_={name: daily.c[name] + stmt.excluded[name] for name in ROLLUP_MEASURES}
+            | {"updated_at": stmt.excluded.updated_at}
+        )
+
+    @staticmethod
+    def _aggregate_select(*conditions, fp=None):
+        """
+        INSERT..SELECT source grouping active payment lines by the rollup key.
+        receipt_count credits each receipt to the group holding its first
+        (lowest id) line, so summing it over any dimension counts receipts once.
+        fp defaults to fee_payments; rebuild() passes the archive-aware source.
+        """
+        fp = FeePayment.__table__ if fp is None else fp
+        active = (fp.c.status == 'A',) + conditions
+
+        first_lines = select(func.min(fp.c.payment_id)).where(
+            *active
+        ).group_by(fp.c.branch, fp.c.academic_year, fp.c.receipt_no)
+
+        dims = [
+            fp.c.payment_date,
+            fp.c.branch,
+            fp.c.academic_year,
+            fp.c["class"],
+            func.coalesce(fp.c.section, ""),
+            func.coalesce(fp.c.fee_type, ""),
+            func.coalesce(fp.c.installment_name, ""),
+            func.coalesce(fp.c.payment_mode, ""),
+            func.coalesce(fp.c.collected_by_name, ""),
+        ]
+
+        # IN (subquery) is probed through a temporary index; an outer join to the
+        # derived table was rescanned once per payment line on SQLite
+        return select(
+            *dims,
+            func.count(fp.c.payment_id),
+            func.sum(case((fp.c.payment_id.in_(first_lines), 1), else_=0)),
+            func.coalesce(func.sum(fp.c.gross_amount), 0),
+            func.coalesce(func.sum(fp.c.concession_amount), 0),
+            func.coalesce(func.sum(fp.c.amount_paid), 0),
+            literal(get_now()),
+        ).where(*active).group_by(*dims)
+
+    @staticmethod
+    def rebuild(academic_year=None):
+        """
+        Full reconciliation: drops and re-derives the rollup for one year
+        (or every year when academic_year is None). Archived years are read
+        from fee_payments plus fee_payments_archive. Caller commits.
+        """
+        from services.year_archive_service import YearArchiveService
+
+        daily = FeeCollectionDaily.__table__
+
+        if academic_year:
+            years = [academic_year]
+        else:
+            years = sorted(
+                {y for (y,) in db.session.query(FeePayment.academic_year).distinct() if y}
+                | YearArchiveService.archived_years()
+            )
+
+        conn = db.session.connection()
+        for year in years:
+            fp = YearArchiveService.table_source(FeePayment.__table__, year)
+            conn.execute(delete(daily).where(daily.c.academic_year == year))
+            conn.execute(insert(daily).from_select(
+                ROLLUP_COLUMNS,
+                FeeCollectionService._aggregate_select(
+                    fp.c.academic_year == year,
+                    fp.c.payment_date.isnot(None),
+                    fp=fp
+                )
+            ))
+        return len(years)
@@ -0,0 +1,221 @@
+import hmac
+import os
+import threading
+import time
+
+from flask import g, request, request_started, request_finished, has_request_context, Response, jsonify
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+from extensions import db, limiter
+
+try:
+    # Reads PROMETHEUS_MULTIPROC_DIR on import; gunicorn.conf.py sets it before the app loads
+    import prometheus_client
+    from prometheus_client import Counter, Gauge, Histogram, CollectorRegistry, CONTENT_TYPE_LATEST, generate_latest
+    from prometheus_client import multiprocess
+except ImportError:  # pragma: no cover
+    prometheus_client = None
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+DB_TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 10.0)
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+
+class _Metrics:
+    """The metric objects; created once per process, on first init_app."""
+
+    def __init__(self):
+        self.request_latency = Histogram(
+            "erp_http_request_duration_seconds", "Request latency by Flask endpoint",
+            ["method", "endpoint", "status"], buckets=LATENCY_BUCKETS
+        )
+        self.request_db_time = Histogram(
+            "erp_http_request_db_seconds", "Time spent executing SQL per request",
+            ["endpoint"], buckets=DB_TIME_BUCKETS
+        )
+        self.request_queries = Counter(
+            "erp_http_request_queries_total", "SQL statements executed on behalf of requests", ["endpoint"]
+        )
+        self.pool_checked_out = Gauge(
+            "erp_db_pool_checked_out", "Connections currently checked out of the pool", multiprocess_mode="livesum"
+        )
+        self.pool_overflow = Gauge(
+            "erp_db_pool_overflow", "Connections open beyond pool_size", multiprocess_mode="livesum"
+        )
+        self.pool_size = Gauge(
+            "erp_db_pool_size", "Configured pool_size per worker", multiprocess_mode="livemax"
+        )
+        self.pool_wait = Histogram(
+            "erp_db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection", buckets=POOL_WAIT_BUCKETS
+        )
+        self.pool_timeouts = Counter(
+            "erp_db_pool_checkout_timeouts_total", "Checkouts that gave up after pool_timeout"
+        )
+        self.cache_requests = Counter(
+            "erp_cache_requests_total", "Cache lookups by cache and result (hit/miss)", ["cache", "result"]
+        )
+        self.sequence_wait = Counter(
+            "erp_sequence_lock_wait_seconds_total", "Time spent acquiring receipt/admission sequence rows", ["kind"]
+        )
+        self.sequence_hold = Counter(
+            "erp_sequence_lock_hold_seconds_total", "Time gapless sequence locks stayed open", ["kind"]
+        )
+        self.sequence_allocations = Counter(
+            "erp_sequence_allocations_total", "Receipt/admission numbers allocated", ["kind"]
+        )
+        self.job_queue_depth = Gauge(
+            "erp_job_queue_depth", "Items waiting in background queues", ["queue"], multiprocess_mode="livesum"
+        )
+
+
+_metrics = None
+_init_lock = threading.Lock()
+# Last SequenceService.lock_wait_stats() totals folded into the counters (this process)
+_sequence_seen = {}
+_sequence_lock = threading.Lock()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that reports how long each checkout waited for a free connection."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            if _metrics is not None:
+                _metrics.pool_timeouts.inc()
+            raise
+        finally:
+            if _metrics is not None:
+                _metrics.pool_wait.observe(time.perf_counter() - started)
+
+
+class MetricsService:
+    """
+    Prometheus metrics served at /metrics (METRICS_ENABLED, off by default),
+    behind the METRICS_TOKEN bearer token when one is set.
+
+    Under gunicorn every worker writes its samples to PROMETHEUS_MULTIPROC_DIR
+    and /metrics merges them, so a scrape sees the whole server no matter
+    which worker answers it. Per-process readings (pool, queue depth,
+    sequence timings) are refreshed at the end of every request.
+    """
+
+    @staticmethod
+    def init_app(app):
+        global _metrics
+        if not app.config.get("METRICS_ENABLED"):
+            return
+        if prometheus_client is None:
+            app.logger.warning("METRICS_ENABLED is set but prometheus_client is not installed; /metrics is disabled")
+            return
+
+        with _init_lock:
+            if _metrics is None:
+                _metrics = _Metrics()
+                event.listen(Engine, "before_cursor_execute", MetricsService._before_cursor_execute)
+                event.listen(Engine, "after_cursor_execute", MetricsService._after_cursor_execute)
+
+        request_started.connect(MetricsService._request_started, app, weak=False)
+        request_finished.connect(MetricsService._request_finished, app, weak=False)
+        # Scrapes arrive every few seconds from one address; keep them out of the rate limit
+        app.add_url_rule("/metrics", "metrics", limiter.exempt(MetricsService.metrics_view))
+
+    @staticmethod
+    def enabled():
+        return _metrics is not None
+
+    @staticmethod
+    def multiprocess_dir():
+        return os.environ.get("PROMETHEUS_MULTIPROC_DIR") or os.environ.get("prometheus_multiproc_dir")
+
+    # ---------------------------------------------------------
+    # RECORDING
+    # ---------------------------------------------------------
+    @staticmethod
+    def record_cache(cache_name, hit):
+        if _metrics is not None:
+            _metrics.cache_requests.labels(cache_name, "hit" if hit else "miss").inc()
+
+    @staticmethod
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_start", []).append(time.perf_counter())
+
+    @staticmethod
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("metrics_start")
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        if has_request_context() and "metrics_started" in g:
+            g.metrics_db_time = g.get("metrics_db_time", 0.0) + elapsed
+            g.metrics_queries = g.get("metrics_queries", 0) + 1
+
+    @staticmethod
+    def _request_started(sender, **extra):
+        g.metrics_started = time.perf_counter()
+
+    @staticmethod
+    def _request_finished(sender, response, **extra):
+        started = g.pop("metrics_started", None)
+        if started is None:
+            return
+        # Endpoint names keep the label set bounded; unmatched URLs share one series
+        endpoint = request.endpoint or "unmatched"
+        _metrics.request_latency.labels(request.method, endpoint, str(response.status_code)).observe(time.perf_counter() - started)
+        _metrics.request_db_time.labels(endpoint).observe(g.pop("metrics_db_time", 0.0))
+        if queries := g.pop("metrics_queries", 0):
+            _metrics.request_queries.labels(endpoint).inc(queries)
+        MetricsService.refresh_process_gauges()
+
+    @staticmethod
+    def refresh_process_gauges():
+        """Copies this worker's pool, queue and sequence readings into the metrics."""
+        from services.audit_service import AuditService
+        from services.sequence_service import SequenceService
+        from services.slow_query_service import SlowQueryService
+
+        pool = db.engine.pool
+        if isinstance(pool, QueuePool):
+            _metrics.pool_checked_out.set(pool.checkedout())
+            _metrics.pool_overflow.set(max(pool.overflow(), 0))
+            _metrics.pool_size.set(pool.size())
+
+        _metrics.job_queue_depth.labels("audit").set(AuditService.queue_depth())
+        _metrics.job_queue_depth.labels("slow_query_explain").set(SlowQueryService.queue_depth())
+
+        # lock_wait_stats() holds running totals; add only what changed since the last request
+        with _sequence_lock:
+            for kind, fields in SequenceService.lock_wait_stats().items():
+                for field, stats in fields.items():
+                    last_count, last_ms = _sequence_seen.get((kind, field), (0, 0.0))
+                    if stats["count"] == last_count:
+                        continue
+                    seconds = max(stats["total_ms"] - last_ms, 0.0) / 1000.0
+                    _sequence_seen[(kind, field)] = (stats["count"], stats["total_ms"])
+                    if field == "wait":
+                        _metrics.sequence_wait.labels(kind).inc(seconds)
+                        _metrics.sequence_allocations.labels(kind).inc(stats["count"] - last_count)
+                    elif field == "hold":
+                        _metrics.sequence_hold.labels(kind).inc(seconds)
+
+    # ---------------------------------------------------------
+    # EXPOSITION
+    # ---------------------------------------------------------
+    @staticmethod
+    def metrics_view():
+        from flask import current_app
+
+        token = current_app.config.get("METRICS_TOKEN")
+        if token and not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+            return jsonify({"error": "Unauthorized"}), 401
+
+        if MetricsService.multiprocess_dir():
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = prometheus_client.REGISTRY
+        return Response(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
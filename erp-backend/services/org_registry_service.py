@@ -0,0 +1,167 @@
+import threading
+from collections import namedtuple
+
+from flask import g, has_request_context, has_app_context
+from sqlalchemy import select
+from extensions import db
+from models import Branch, OrgMaster, ClassMaster
+from services.cache_service import CacheService
+from services.metrics_service import MetricsService
+
+# cache_versions resource bumped by every Branch / OrgMaster / ClassMaster write
+REGISTRY_RESOURCE = "org_registry"
+
+BranchRef = namedtuple("BranchRef", "id code name location_code is_active")
+OrgRef = namedtuple("OrgRef", "id master_type code name is_active")
+ClassRef = namedtuple("ClassRef", "id name location branch")
+
+
+class OrgRegistry:
+    """
+    Immutable snapshot of branches, org_master rows and classes, indexed by
+    every identifier the code uses for them (integer id, code, name).
+    Class names are often digits, so numeric strings are never keys.
+    """
+
+    def __init__(self, version, branches, masters, classes):
+        self.version = version
+        self.branches = {}
+        for b in branches:
+            for key in (b.id, b.code, b.name):
+                self.branches.setdefault(key, b)
+
+        self.masters = {"LOCATION": {}, "ACADEMIC_YEAR": {}}
+        for m in masters:
+            index = self.masters.setdefault(m.master_type, {})
+            for key in (m.code, m.name):
+                index.setdefault(key, m)
+
+        # First active location in table order, as the old .first() returned
+        self.default_location = next((m for m in masters if m.master_type == "LOCATION" and m.is_active), None)
+
+        self.classes = {}
+        for c in classes:
+            for key in (c.id, c.name):
+                self.classes.setdefault(key, c)
+
+    @staticmethod
+    def load(version):
+        branches = [BranchRef(*r) for r in db.session.execute(select(
+            Branch.id, Branch.branch_code, Branch.branch_name, Branch.location_code, Branch.is_active
+        ).order_by(Branch.id)).all()]
+        masters = [OrgRef(*r) for r in db.session.execute(select(
+            OrgMaster.id, OrgMaster.master_type, OrgMaster.code, OrgMaster.display_name, OrgMaster.is_active
+        ).order_by(OrgMaster.id)).all()]
+        classes = [ClassRef(*r) for r in db.session.execute(select(
+            ClassMaster.id, ClassMaster.class_name, ClassMaster.location, ClassMaster.branch
+        ).order_by(ClassMaster.id)).all()]
+        return OrgRegistry(version, branches, masters, classes)
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+class OrgRegistryService:
+    """
+    Process-wide lookups for the small organisation tables.
+
+    The snapshot is checked against the shared cache_versions row once per
+    request and rebuilt when any worker has committed a change. A miss falls
+    back to the database, so rows created earlier in the same transaction
+    still resolve.
+    """
+
+    @staticmethod
+    def registry():
+        global _registry
+        if has_request_context() and "org_registry" in g:
+            return g.org_registry
+
+        version = CacheService.version(REGISTRY_RESOURCE)
+        registry = _registry
+        MetricsService.record_cache("org_registry", registry is not None and registry.version == version)
+        if registry is None or registry.version != version:
+            with _registry_lock:
+                if _registry is None or _registry.version != version:
+                    _registry = OrgRegistry.load(version)
+                registry = _registry
+
+        if has_request_context():
+            g.org_registry = registry
+        return registry
+
+    @staticmethod
+    def forget():
+        if has_app_context():
+            g.pop("org_registry", None)
+
+    @staticmethod
+    def _lookup(index, identifier):
+        """Exact key first, then a numeric string as an integer id."""
+        if (hit := index.get(identifier)) is not None:
+            return hit
+        if isinstance(identifier, str) and identifier.isdigit():
+            return index.get(int(identifier))
+        return None
+
+    # ---------------------------------------------------------
+    # LOOKUPS
+    # ---------------------------------------------------------
+    @staticmethod
+    def branch(identifier):
+        """Branch by code, name or id (int or numeric string)."""
+        if identifier is None or identifier == "":
+            return None
+        if (b := OrgRegistryService._lookup(OrgRegistryService.registry().branches, identifier)) is not None:
+            return b
+
+        if isinstance(identifier, int):
+            row = db.session.get(Branch, identifier)
+        else:
+            row = Branch.query.filter((Branch.branch_code == identifier) | (Branch.branch_name == identifier)).first()
+            if row is None and identifier.isdigit():
+                row = db.session.get(Branch, int(identifier))
+        return BranchRef(row.id, row.branch_code, row.branch_name, row.location_code, row.is_active) if row else None
+
+    @staticmethod
+    def org_master(master_type, identifier):
+        """LOCATION / ACADEMIC_YEAR row by code or display name."""
+        if not identifier:
+            return None
+        if (m := OrgRegistryService.registry().masters.get(master_type, {}).get(identifier)) is not None:
+            return m
+
+        row = OrgMaster.query.filter(
+            OrgMaster.master_type == master_type,
+            (OrgMaster.code == identifier) | (OrgMaster.display_name == identifier)
+        ).first()
+        return OrgRef(row.id, row.master_type, row.code, row.display_name, row.is_active) if row else None
+
+    @staticmethod
+    def location(identifier):
+        return OrgRegistryService.org_master("LOCATION", identifier)
+
+    @staticmethod
+    def academic_year(identifier):
+        return OrgRegistryService.org_master("ACADEMIC_YEAR", identifier)
+
+    @staticmethod
+    def default_location():
+        return OrgRegistryService.registry().default_location
+
+    @staticmethod
+    def class_(identifier):
+        """Class by id or class name; a numeric string is tried as a name first."""
+        if identifier is None or identifier == "":
+            return None
+        if (c := OrgRegistryService._lookup(OrgRegistryService.registry().classes, identifier)) is not None:
+            return c
+
+        if isinstance(identifier, int):
+            row = db.session.get(ClassMaster, identifier)
+        else:
+            row = ClassMaster.query.filter_by(class_name=identifier).first()
+            if row is None and identifier.isdigit():
+                row = db.session.get(ClassMaster, int(identifier))
+        return ClassRef(row.id, row.class_name, row.location, row.branch) if row else None
@@ -0,0 +1,189 @@
+import json
+import logging
+import re
+import threading
+import time
+
+from flask import g, request, request_started, request_finished, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Collapses expanded IN lists / VALUES rows so one loop's statements share a shape
+_PARAM_LIST = re.compile(r"\((?:\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*,)+\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*\)")
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+_SPACES = re.compile(r"\s+")
+
+STATEMENT_PREVIEW = 300
+
+
+def statement_shape(statement):
+    shape = _PARAM_LIST.sub("(?...)", statement)
+    shape = _LITERALS.sub("?", shape)
+    return _SPACES.sub(" ", shape).strip()
+
+
+class RequestProfile:
+    """Queries issued while serving one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.count = 0
+        self.db_time = 0.0
+        self.statements = []  # (elapsed, statement)
+        self.shapes = {}      # shape -> [count, total elapsed]
+
+    def record(self, statement, elapsed):
+        self.count += 1
+        self.db_time += elapsed
+        self.statements.append((elapsed, statement))
+        entry = self.shapes.setdefault(statement_shape(statement), [0, 0.0])
+        entry[0] += 1
+        entry[1] += elapsed
+
+    def summary(self, slowest, n_plus_one):
+        top = sorted(self.statements, key=lambda s: s[0], reverse=True)[:slowest]
+        repeated = sorted(
+            ((shape, c, t) for shape, (c, t) in self.shapes.items() if c >= n_plus_one),
+            key=lambda r: r[1], reverse=True
+        )
+        return {
+            "queries": self.count,
+            "db_ms": round(self.db_time * 1000, 2),
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 2),
+            "slowest": [{"ms": round(e * 1000, 2), "sql": s[:STATEMENT_PREVIEW]} for e, s in top],
+            "n_plus_one": [{"count": c, "ms": round(t * 1000, 2), "sql": shape[:STATEMENT_PREVIEW]} for shape, c, t in repeated],
+        }
+
+
+class SqlProfiler:
+    """
+    Opt-in (SQL_PROFILING=true) per-request SQL instrumentation.
+
+    Cursor events time every statement executed on behalf of a request;
+    request signals open and close the profile. Each request is logged as
+    one JSON line, optionally summarised in X-SQL-* response headers, and
+    folded into per-endpoint totals for /api/admin/perf. Totals are per
+    worker process.
+    """
+
+    _lock = threading.Lock()
+    _endpoints = {}
+    _installed = False
+
+    @staticmethod
+    def init_app(app):
+        if not app.config.get("SQL_PROFILING"):
+            return
+
+        if not SqlProfiler._installed:
+            event.listen(Engine, "before_cursor_execute", SqlProfiler._before_cursor_execute)
+            event.listen(Engine, "after_cursor_execute", SqlProfiler._after_cursor_execute)
+            SqlProfiler._installed = True
+
+        request_started.connect(SqlProfiler._request_started, app, weak=False)
+        request_finished.connect(SqlProfiler._request_finished, app, weak=False)
+
+    @staticmethod
+    def enabled(app):
+        return bool(app.config.get("SQL_PROFILING"))
+
+    # ---------------------------------------------------------
+    # SQLALCHEMY EVENTS
+    # ---------------------------------------------------------
+    @staticmethod
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("profile_start", []).append(time.perf_counter())
+
+    @staticmethod
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("profile_start")
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        if has_request_context() and (profile := g.get("sql_profile")) is not None:
+            profile.record(statement, elapsed)
+
+    # ---------------------------------------------------------
+    # REQUEST SIGNALS
+    # ---------------------------------------------------------
+    @staticmethod
+    def _request_started(sender, **extra):
+        g.sql_profile = RequestProfile()
+
+    @staticmethod
+    def _request_finished(sender, response, **extra):
+        if (profile := g.pop("sql_profile", None)) is None:
+            return
+
+        config = sender.config
+        summary = profile.summary(
+            slowest=config.get("SQL_PROFILE_SLOWEST", 5),
+            n_plus_one=config.get("SQL_PROFILE_N_PLUS_ONE", 5)
+        )
+
+        if config.get("SQL_PROFILE_HEADERS"):
+            response.headers["X-SQL-Queries"] = str(summary["queries"])
+            response.headers["X-SQL-Time-ms"] = str(summary["db_ms"])
+            response.headers["X-SQL-N-Plus-One"] = str(len(summary["n_plus_one"]))
+
+        logger.info(json.dumps({
+            "event": "sql_profile",
+            "method": request.method,
+            "path": request.path,
+            "endpoint": request.endpoint,
+            "status": response.status_code,
+            **summary
+        }))
+
+        SqlProfiler._aggregate(request.blueprint or "-", request.endpoint or request.path, summary)
+
+    # ---------------------------------------------------------
+    # AGGREGATES
+    # ---------------------------------------------------------
+    @staticmethod
+    def _aggregate(blueprint, endpoint, summary):
+        with SqlProfiler._lock:
+            stats = SqlProfiler._endpoints.setdefault((blueprint, endpoint), {
+                "requests": 0, "queries": 0, "db_ms": 0.0, "total_ms": 0.0,
+                "max_queries": 0, "n_plus_one_requests": 0, "slowest": None
+            })
+            stats["requests"] += 1
+            stats["queries"] += summary["queries"]
+            stats["db_ms"] += summary["db_ms"]
+            stats["total_ms"] += summary["total_ms"]
+            stats["max_queries"] = max(stats["max_queries"], summary["queries"])
+            if summary["n_plus_one"]:
+                stats["n_plus_one_requests"] += 1
+                stats["n_plus_one"] = summary["n_plus_one"][0]
+            if summary["slowest"] and (stats["slowest"] is None or summary["slowest"][0]["ms"] > stats["slowest"]["ms"]):
+                stats["slowest"] = summary["slowest"][0]
+
+    @staticmethod
+    def snapshot():
+        """Per blueprint, endpoints sorted by total DB time."""
+        with SqlProfiler._lock:
+            items = [(key, dict(stats)) for key, stats in SqlProfiler._endpoints.items()]
+
+        result = {}
+        for (blueprint, endpoint), stats in sorted(items, key=lambda i: i[1]["db_ms"], reverse=True):
+            n = stats["requests"]
+            result.setdefault(blueprint, []).append({
+                "endpoint": endpoint,
+                "requests": n,
+                "avg_queries": round(stats["queries"] / n, 1),
+                "max_queries": stats["max_queries"],
+                "avg_db_ms": round(stats["db_ms"] / n, 2),
+                "avg_total_ms": round(stats["total_ms"] / n, 2),
+                "total_db_ms": round(stats["db_ms"], 2),
+                "n_plus_one_requests": stats["n_plus_one_requests"],
+                "last_n_plus_one": stats.get("n_plus_one"),
+                "slowest": stats["slowest"]
+            })
+        return result
+
+    @staticmethod
+    def reset():
+        with SqlProfiler._lock:
+            SqlProfiler._endpoints.clear()
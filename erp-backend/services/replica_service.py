@@ -0,0 +1,193 @@
+import logging
+import threading
+import time
+
+from flask import g, request, request_finished, has_request_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.sql import Select
+
+logger = logging.getLogger(__name__)
+
+REPLICA_BIND = "replica"
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+class RoutingSession(Session):
+    """
+    Session that sends SELECTs issued by @read_replica endpoints to the
+    replica bind. Flushes, locking reads, raw SQL and every read after this
+    session has written stay on the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._reads_from_replica(clause):
+            return self._db.engines[REPLICA_BIND]
+        return super().get_bind(mapper, clause=clause, bind=bind, **kwargs)
+
+    def _reads_from_replica(self, clause):
+        if not (has_request_context() and g.get("db_read_replica")):
+            return False
+        if self._flushing or self.info.get("replica_wrote") or not isinstance(clause, Select):
+            return False
+        if clause._for_update_arg is not None:
+            return False
+        return ReplicaService.available()
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _mark_session_wrote(session, flush_context):
+    session.info["replica_wrote"] = True
+
+
+_state = {"checked": 0.0, "healthy": False, "lag": None, "error": None}
+_probe_lock = threading.Lock()
+
+
+class ReplicaService:
+    """
+    Read-replica routing for report and listing endpoints.
+
+    Set REPLICA_DATABASE_URL (or REPLICA_DB_HOST for a MySQL replica that
+    shares the primary's credentials) to register the "replica" bind;
+    endpoints decorated with @read_replica then read from it while it is
+    reachable and no more than REPLICA_MAX_LAG_SECONDS behind. Health and
+    lag are probed at most every REPLICA_CHECK_INTERVAL seconds per worker;
+    anything else falls back to the primary.
+
+    After a user's successful POST/PUT/PATCH/DELETE their reads stay on the
+    primary for REPLICA_STICKY_SECONDS. The marker lives in the app cache,
+    so with several workers use a shared CACHE_TYPE (FileSystemCache/Redis).
+
+    Locally, point REPLICA_DATABASE_URL at a second SQLite file and refresh
+    it with scripts/sync_sqlite_replica.py. Only MySQL reports replication
+    lag; other dialects are treated as current.
+    """
+
+    @staticmethod
+    def init_app(app):
+        if not ReplicaService.configured(app):
+            return
+        request_finished.connect(ReplicaService._request_finished, app, weak=False)
+        with app.app_context():
+            from extensions import db
+            # A dropped replica connection fails over without waiting for the next probe
+            event.listen(db.engines[REPLICA_BIND], "handle_error", ReplicaService._handle_error)
+
+    @staticmethod
+    def configured(app):
+        return REPLICA_BIND in (app.config.get("SQLALCHEMY_BINDS") or {})
+
+    @staticmethod
+    def enabled():
+        from flask import current_app
+        return ReplicaService.configured(current_app)
+
+    # ---------------------------------------------------------
+    # HEALTH
+    # ---------------------------------------------------------
+    @staticmethod
+    def available():
+        """True when the replica is reachable and within the staleness limit."""
+        from flask import current_app
+
+        interval = current_app.config.get("REPLICA_CHECK_INTERVAL", 5)
+        if time.monotonic() - _state["checked"] >= interval and _probe_lock.acquire(blocking=False):
+            # One thread probes; the others keep using the last result meanwhile
+            try:
+                ReplicaService.probe()
+            finally:
+                _probe_lock.release()
+        return _state["healthy"]
+
+    @staticmethod
+    def probe():
+        from flask import current_app
+        from extensions import db
+
+        config = current_app.config
+        max_lag = config.get("REPLICA_MAX_LAG_SECONDS", 5)
+        try:
+            with db.engines[REPLICA_BIND].connect() as conn:
+                lag = ReplicaService._replication_lag(conn) if config.get("REPLICA_LAG_CHECK", True) else 0
+            if lag is None:
+                healthy, error = False, "replication is not running"
+            elif lag > max_lag:
+                healthy, error = False, f"replica is {lag}s behind (limit {max_lag}s)"
+            else:
+                healthy, error = True, None
+        except Exception as e:
+            lag, healthy, error = None, False, str(e)
+
+        if _state["healthy"] != healthy:
+            if healthy:
+                logger.info("Read replica available again (lag %ss)", lag)
+            else:
+                logger.warning("Read replica unavailable, reading from primary: %s", error)
+        _state.update(checked=time.monotonic(), healthy=healthy, lag=lag, error=error)
+        return dict(_state)
+
+    @staticmethod
+    def _replication_lag(conn):
+        """Seconds behind the source; None if the server isn't replicating."""
+        if conn.dialect.name != "mysql":
+            return 0
+        # SHOW REPLICA STATUS is 8.0.22+; older servers only know the SLAVE spelling
+        for statement, column in (("SHOW REPLICA STATUS", "Seconds_Behind_Source"),
+                                  ("SHOW SLAVE STATUS", "Seconds_Behind_Master")):
+            try:
+                row = conn.exec_driver_sql(statement).mappings().first()
+            except DBAPIError:
+                continue
+            return row.get(column) if row is not None else None
+        return None
+
+    @staticmethod
+    def _handle_error(context):
+        if context.is_disconnect:
+            _state.update(checked=time.monotonic(), healthy=False, error=str(context.original_exception))
+            logger.warning("Read replica connection lost, reading from primary")
+
+    @staticmethod
+    def status():
+        state = dict(_state)
+        state["checked_ago"] = round(time.monotonic() - state.pop("checked"), 1) if _state["checked"] else None
+        return state
+
+    # ---------------------------------------------------------
+    # READ-YOUR-WRITES
+    # ---------------------------------------------------------
+    @staticmethod
+    def _sticky_key(user_id):
+        return f"replica_sticky:{user_id}"
+
+    @staticmethod
+    def is_sticky(user_id):
+        from extensions import cache
+        return user_id is not None and cache.get(ReplicaService._sticky_key(user_id)) is not None
+
+    @staticmethod
+    def _request_finished(sender, response, **extra):
+        user_id = g.get("user_id")
+        if user_id is None or request.method not in WRITE_METHODS or response.status_code >= 400:
+            return
+        from extensions import cache
+        cache.set(ReplicaService._sticky_key(user_id), 1, timeout=sender.config.get("REPLICA_STICKY_SECONDS", 30))
+
+    # ---------------------------------------------------------
+    # ROUTING
+    # ---------------------------------------------------------
+    @staticmethod
+    def route_reads():
+        """Called by @read_replica once the user is known."""
+        if ReplicaService.enabled() and not ReplicaService.is_sticky(g.get("user_id")):
+            g.db_read_replica = True
+
+    @staticmethod
+    def replica_url():
+        """Replica URL for code that opens its own connections, when this request may use it."""
+        if not (has_request_context() and g.get("db_read_replica")) or not ReplicaService.available():
+            return None
+        from extensions import db
+        return db.engines[REPLICA_BIND].url
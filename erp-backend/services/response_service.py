@@ -0,0 +1,284 @@
+import dataclasses
+import gzip
+import logging
+import uuid
+import zlib
+from datetime import date, time
+from decimal import Decimal
+
+from flask import request, has_request_context, current_app, Response, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+API_VERSION_HEADER = "X-API-Version"
+API_V2_PREFIX = "/api/v2/"
+
+# Duplicate keys kept for older screens -> the canonical key they copy.
+# v2 drops the duplicate only when the canonical key carries the same value.
+ALIAS_KEYS = {
+    "admNo": "admission_no",
+    "rollNo": "Roll_Number",
+    "father": "Fatherfirstname",
+    "fatherMobile": "FatherPhone",
+    "smsNo": "SmsNo",
+    "amount": "amount_paid",
+}
+
+COMPRESSIBLE_TYPES = {"application/json", "application/javascript", "text/csv", "text/html", "text/plain"}
+
+# Items encoded (and flushed to the client) together by stream_json()
+JSON_STREAM_CHUNK = 500
+
+
+def _compact(value):
+    """Canonical keys only, None-valued keys removed; list positions are kept."""
+    if isinstance(value, dict):
+        compact = {}
+        for key, item in value.items():
+            if item is None:
+                continue
+            canonical = ALIAS_KEYS.get(key)
+            if canonical is not None and canonical in value and value[canonical] == item:
+                continue
+            if key == "photos" and item == {"student": value.get("photo")}:
+                continue
+            compact[key] = _compact(item)
+        return compact
+    if isinstance(value, (list, tuple)):
+        return [_compact(item) for item in value]
+    return value
+
+
+def _json_default(o):
+    """Types the encoders don't know natively; dates as ISO 8601, like the routes' isoformat() calls."""
+    if isinstance(o, (date, time)):
+        return o.isoformat()
+    if isinstance(o, (Decimal, uuid.UUID)):
+        return str(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class CompactJSONProvider(DefaultJSONProvider):
+    """
+    Standard-library provider. jsonify() serializes the v2 (compact) shape
+    when the request asked for it; date, datetime and Decimal values can be
+    returned as they are.
+    """
+
+    default = staticmethod(_json_default)
+
+    def _pretty(self):
+        return (self.compact is None and self._app.debug) or self.compact is False
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if ResponseService.is_v2():
+            obj = _compact(obj)
+        return self._app.response_class(self._encode(obj), mimetype=self.mimetype)
+
+    def _encode(self, obj):
+        dump_args = {"indent": 2} if self._pretty() else {}
+        return f"{self.dumps(obj, **dump_args)}\n"
+
+    def dumps_items(self, items):
+        """Items of a list, comma separated, without the brackets (for stream_json)."""
+        return self.dumps(items)[1:-1]
+
+
+class OrjsonProvider(CompactJSONProvider):
+    """orjson-backed provider; encodes dates/datetimes natively and writes bytes straight into the response."""
+
+    def _options(self, sort_keys=None, indent=None):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys if sort_keys is None else sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        if set(kwargs) - {"sort_keys", "indent"}:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=_json_default, option=self._options(**kwargs)).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def _encode(self, obj):
+        return orjson.dumps(obj, default=_json_default, option=self._options(indent=self._pretty()) | orjson.OPT_APPEND_NEWLINE)
+
+    def dumps_items(self, items):
+        return orjson.dumps(items, default=_json_default, option=self._options())[1:-1]
+
+
+JSON_PROVIDERS = {"std": CompactJSONProvider, "orjson": OrjsonProvider}
+
+
+class _ApiPrefixMiddleware:
+    """Serves /api/v2/<path> from the /api/<path> routes, marking the request as v2."""
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ, start_response):
+        path = environ.get("PATH_INFO", "")
+        if path.startswith(API_V2_PREFIX):
+            environ["PATH_INFO"] = "/api/" + path[len(API_V2_PREFIX):]
+            environ["erp.api_version"] = 2
+        return self.wsgi_app(environ, start_response)
+
+
+class ResponseService:
+    """
+    Response shape and transfer encoding.
+
+    v2 responses (X-API-Version: 2, or the /api/v2/ prefix on any /api route)
+    drop the duplicated compatibility keys listed in ALIAS_KEYS and every
+    null-valued key; v1 stays byte for byte what it was.
+
+    JSON/text bodies of at least COMPRESS_MIN_SIZE bytes are compressed with
+    brotli (when the brotli package is installed) or gzip, whichever the
+    client's Accept-Encoding prefers.
+
+    JSON_PROVIDER picks the encoder: "orjson", "std", or "auto" (orjson
+    when it is installed). stream_json() sends long lists in chunks as they
+    are produced.
+    """
+
+    @staticmethod
+    def init_app(app):
+        name = app.config.get("JSON_PROVIDER", "auto")
+        if name == "auto":
+            name = "orjson" if orjson is not None else "std"
+        elif name == "orjson" and orjson is None:
+            logger.warning("JSON_PROVIDER=orjson but orjson is not installed; using the standard library")
+            name = "std"
+        app.json = JSON_PROVIDERS[name](app)
+        app.json.sort_keys = app.config.get("JSON_SORT_KEYS", True)
+        app.wsgi_app = _ApiPrefixMiddleware(app.wsgi_app)
+        app.after_request(ResponseService._after_request)
+
+    # ---------------------------------------------------------
+    # API VERSION
+    # ---------------------------------------------------------
+    @staticmethod
+    def is_v2():
+        if not has_request_context():
+            return False
+        if request.environ.get("erp.api_version") == 2:
+            return True
+        return request.headers.get(API_VERSION_HEADER, "").strip() == "2"
+
+    # ---------------------------------------------------------
+    # STREAMING
+    # ---------------------------------------------------------
+    @staticmethod
+    def stream_json(items, key, tail=None, chunk_size=JSON_STREAM_CHUNK):
+        """
+        Streams {key: [...items], **tail()} while items is consumed, chunk_size
+        items per encoder call. tail is called once the items are exhausted
+        (counts, cursors). The body is gzipped on the fly when the client
+        accepts it.
+        """
+        provider = current_app.json
+        v2 = ResponseService.is_v2()
+        gzipped = (
+            current_app.config.get("COMPRESS_RESPONSES", True)
+            and request.accept_encodings.best_match(("gzip",)) is not None
+        )
+        level = current_app.config.get("COMPRESS_GZIP_LEVEL", 6)
+
+        def encode(text):
+            return text if isinstance(text, bytes) else text.encode()
+
+        def generate():
+            yield encode(provider.dumps({key: []})[:-2])
+            first = True
+            batch = []
+
+            def flush():
+                chunk = provider.dumps_items([_compact(i) for i in batch] if v2 else batch)
+                return (b"" if first else b",") + encode(chunk)
+
+            for item in items:
+                batch.append(item)
+                if len(batch) == chunk_size:
+                    yield flush()
+                    first = False
+                    batch.clear()
+            if batch:
+                yield flush()
+            extra = tail() if tail else {}
+            yield b"]" + (b"," + encode(provider.dumps(_compact(extra) if v2 else extra))[1:] if extra else b"}")
+
+        def compress(chunks):
+            z = zlib.compressobj(level, zlib.DEFLATED, 31)
+            for chunk in chunks:
+                # Sync flush so each chunk reaches the client as soon as it is encoded
+                yield z.compress(chunk) + z.flush(zlib.Z_SYNC_FLUSH)
+            yield z.flush()
+
+        body = stream_with_context(generate())
+        response = Response(compress(body) if gzipped else body, mimetype="application/json")
+        response.vary.add("Accept-Encoding")
+        if gzipped:
+            response.headers["Content-Encoding"] = "gzip"
+        return response
+
+    # ---------------------------------------------------------
+    # COMPRESSION
+    # ---------------------------------------------------------
+    @staticmethod
+    def encodings():
+        return ("br", "gzip") if brotli is not None else ("gzip",)
+
+    @staticmethod
+    def _after_request(response):
+        if response.mimetype == "application/json" and "erp.api_version" not in request.environ:
+            # The header picks the shape; /api/v2/ URLs are already distinct
+            response.vary.add(API_VERSION_HEADER)
+        if not current_app.config.get("COMPRESS_RESPONSES", True):
+            return response
+        if response.direct_passthrough or response.is_streamed or "Content-Encoding" in response.headers:
+            return response
+        if response.status_code < 200 or response.status_code in (204, 304):
+            return response
+        if response.mimetype not in COMPRESSIBLE_TYPES:
+            return response
+
+        response.vary.add("Accept-Encoding")
+        body = response.get_data()
+        if len(body) < current_app.config.get("COMPRESS_MIN_SIZE", 1024):
+            return response
+        encoding = request.accept_encodings.best_match(ResponseService.encodings())
+        if encoding is None:
+            return response
+
+        if encoding == "br":
+            body = brotli.compress(body, quality=current_app.config.get("COMPRESS_BROTLI_QUALITY", 5))
+        else:
+            body = gzip.compress(body, compresslevel=current_app.config.get("COMPRESS_GZIP_LEVEL", 6))
+        response.set_data(body)
+        response.headers["Content-Encoding"] = encoding
+        etag, weak = response.get_etag()
+        if etag:
+            # Each encoding is a different representation, so it needs its own strong tag
+            response.set_etag(f"{etag}-{encoding}", weak)
+        return response
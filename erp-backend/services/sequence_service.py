@@ -1,6 +1,42 @@
-from extensions import db
-from models import BranchYearSequence, Branch, OrgMaster
+from extensions import db, get_now
+from models import BranchYearSequence, Branch
+from services.org_registry_service import OrgRegistryService
 from datetime import datetime
+from flask import current_app
+from sqlalchemy import event, select, update, insert
+from sqlalchemy.exc import IntegrityError
+import threading
+import time
+
+# Allocation modes (SEQUENCE_ALLOCATION_MODE config)
+# gapless      -> row is locked with SELECT ... FOR UPDATE in the caller's transaction.
+#                 A rolled back payment/admission gives its number back. Lock is held until commit.
+# gap_tolerant -> row is incremented in its own short transaction and released immediately.
+#                 A rolled back caller leaves a gap in the series, but nobody waits on it.
+MODE_GAPLESS = "gapless"
+MODE_GAP_TOLERANT = "gap_tolerant"
+
+_stats_lock = threading.Lock()
+_lock_stats = {}
+
+
+def _record_stat(kind, field, seconds):
+    ms = seconds * 1000.0
+    with _stats_lock:
+        s = _lock_stats.setdefault(kind, {})
+        entry = s.setdefault(field, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+        entry["count"] += 1
+        entry["total_ms"] += ms
+        entry["max_ms"] = max(entry["max_ms"], ms)
+
+
+@event.listens_for(db.session, "after_commit")
+@event.listens_for(db.session, "after_rollback")
+def _record_gapless_hold(session):
+    """Gapless locks live until the caller's transaction ends; measure that span."""
+    for kind, started in session.info.pop("sequence_locks", {}).items():
+        _record_stat(kind, "hold", time.perf_counter() - started)
+
 
 class SequenceService:
     
@@ -13,11 +49,7 @@ class SequenceService:
         if isinstance(branch_identifier, int):
             return branch_identifier
             
-        branch = Branch.query.filter(
-            (Branch.branch_code == branch_identifier) | 
-            (Branch.branch_name == branch_identifier)
-        ).first()
-        
+        branch = OrgRegistryService.branch(branch_identifier)
         return branch.id if branch else None
 
     @staticmethod
@@ -29,11 +61,7 @@ class SequenceService:
         if isinstance(year_code, int):
             return year_code
             
-        ay = OrgMaster.query.filter_by(
-            master_type='ACADEMIC_YEAR',
-            code=year_code
-        ).first()
-        
+        ay = OrgRegistryService.academic_year(year_code)
         return ay.id if ay else None
 
     @staticmethod
@@ -103,22 +131,113 @@ class SequenceService:
         return seq
 
     @staticmethod
-    def _get_locked_sequence(branch_id, academic_year_id):
+    def allocation_mode():
+        mode = current_app.config.get("SEQUENCE_ALLOCATION_MODE", MODE_GAPLESS)
+        if mode != MODE_GAP_TOLERANT:
+            return MODE_GAPLESS
+        # SQLite has a single writer lock per database: a second connection cannot commit while
+        # the request transaction is writing, and there is no row lock to shorten anyway.
+        if db.engine.dialect.name == "sqlite":
+            return MODE_GAPLESS
+        return MODE_GAP_TOLERANT
+
+    @staticmethod
+    def lock_wait_stats():
+        """
+        Snapshot of allocation timings for this process, per sequence kind:
+        wait = time spent acquiring/incrementing the row, hold = how long a
+        gapless lock stayed open in the caller's transaction.
+        """
+        with _stats_lock:
+            out = {}
+            for kind, fields in _lock_stats.items():
+                out[kind] = {
+                    field: {
+                        "count": e["count"],
+                        "total_ms": round(e["total_ms"], 3),
+                        "avg_ms": round(e["total_ms"] / e["count"], 3) if e["count"] else 0.0,
+                        "max_ms": round(e["max_ms"], 3),
+                    }
+                    for field, e in fields.items()
+                }
+            return out
+
+    @staticmethod
+    def _get_locked_sequence(branch_id, academic_year_id, kind=None):
         """
         Fetches the sequence row with ROW-LEVEL LOCKING.
         Must be called inside an active transaction.
         """
-        return db.session.query(BranchYearSequence).with_for_update().filter_by(
+        started = time.perf_counter()
+        seq = db.session.query(BranchYearSequence).with_for_update().filter_by(
             branch_id=branch_id, 
             academic_year_id=academic_year_id
         ).first()
+        if kind:
+            _record_stat(kind, "wait", time.perf_counter() - started)
+            db.session.info.setdefault("sequence_locks", {}).setdefault(kind, time.perf_counter())
+        return seq
+
+    @staticmethod
+    def _allocate_isolated(branch_id, academic_year_id, kind, count=1):
+        """
+        Increments the counter in a short transaction of its own and commits
+        straight away, so the row lock is released before the caller does any
+        other work. Returns (prefix, first_no, last_no).
+        """
+        table = BranchYearSequence.__table__
+        counter = table.c.last_admission_no if kind == "admission" else table.c.last_receipt_no
+        prefix_col = table.c.admission_prefix if kind == "admission" else table.c.receipt_prefix
+        key = (table.c.branch_id == branch_id) & (table.c.academic_year_id == academic_year_id)
+
+        for _ in range(2):
+            started = time.perf_counter()
+            with db.engine.begin() as conn:
+                res = conn.execute(
+                    update(table).where(key).values({counter.name: counter + count, "updated_at": get_now()})
+                )
+                if res.rowcount:
+                    prefix, last_no = conn.execute(select(prefix_col, counter).where(key)).one()
+                    _record_stat(kind, "wait", time.perf_counter() - started)
+                    return prefix, last_no - count + 1, last_no
+
+            # No row yet: create it (another worker may win the race; then just retry the update)
+            SequenceService._create_sequence_isolated(branch_id, academic_year_id)
+
+        raise RuntimeError(f"Could not allocate {kind} number for branch {branch_id}, year {academic_year_id}")
+
+    @staticmethod
+    def _create_sequence_isolated(branch_id, academic_year_id):
+        table = BranchYearSequence.__table__
+        try:
+            with db.engine.begin() as conn:
+                code = conn.execute(
+                    select(Branch.__table__.c.branch_code).where(Branch.__table__.c.id == branch_id)
+                ).scalar()
+                now = get_now()
+                conn.execute(insert(table).values(
+                    branch_id=branch_id,
+                    academic_year_id=academic_year_id,
+                    admission_prefix=code or "GEN",
+                    receipt_prefix=code or "REC",
+                    last_admission_no=0,
+                    last_receipt_no=0,
+                    created_at=now,
+                    updated_at=now
+                ))
+        except IntegrityError:
+            pass
 
     @staticmethod
     def generate_admission_number(branch_id, academic_year_id):
         """
         Generates next Admission Number: {Prefix}{0000} (e.g. HATC0152)
         """
-        seq = SequenceService._get_locked_sequence(branch_id, academic_year_id)
+        if SequenceService.allocation_mode() == MODE_GAP_TOLERANT:
+            prefix, _, number = SequenceService._allocate_isolated(branch_id, academic_year_id, "admission")
+            return f"{prefix}{number:04d}"
+
+        seq = SequenceService._get_locked_sequence(branch_id, academic_year_id, kind="admission")
         
         if not seq:
             # Fallback: Create if not exists (though ideally should exist)
@@ -131,14 +250,33 @@ class SequenceService:
         seq.last_admission_no += 1
         return f"{seq.admission_prefix}{seq.last_admission_no:04d}"
 
+    @staticmethod
+    def reserve_admission_numbers(branch_id, academic_year_id, count):
+        """
+        Reserves a contiguous block of admission numbers for bulk imports in one
+        short transaction. Gap-tolerant mode only: numbers belonging to rows that
+        later fail to import are not reused, and on SQLite the isolated
+        transaction would contend with the caller's open session.
+        """
+        if count <= 0:
+            return []
+        prefix, first_no, last_no = SequenceService._allocate_isolated(branch_id, academic_year_id, "admission", count)
+        return [f"{prefix}{n:04d}" for n in range(first_no, last_no + 1)]
+
     @staticmethod
     def generate_receipt_number(branch_id, academic_year_id, include_prefix=False):
         """
         Generates next Fee Receipt Number.
         If include_prefix=True: {Prefix}{00} (e.g. TC01)
         If include_prefix=False: {00} (e.g. 01, 02, 03...)
+        In gapless mode call this as late as possible in the transaction;
+        the sequence row stays locked until commit.
         """
-        seq = SequenceService._get_locked_sequence(branch_id, academic_year_id)
+        if SequenceService.allocation_mode() == MODE_GAP_TOLERANT:
+            prefix, _, number = SequenceService._allocate_isolated(branch_id, academic_year_id, "receipt")
+            return f"{prefix}{number:02d}" if include_prefix else f"{number:02d}"
+
+        seq = SequenceService._get_locked_sequence(branch_id, academic_year_id, kind="receipt")
         
         if not seq:
             seq = SequenceService.get_or_create_sequence(branch_id, academic_year_id)
@@ -148,4 +286,4 @@ class SequenceService:
         if include_prefix:
             return f"{seq.receipt_prefix}{seq.last_receipt_no:02d}"
         else:
-            return f"{seq.last_receipt_no:02d}"  # Just the number 
\ No newline at end of file
+            return f"{seq.last_receipt_no:02d}"  # Just the number 
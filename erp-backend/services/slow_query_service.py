@@ -0,0 +1,317 @@
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+
+from flask import request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from services.profiling_service import statement_shape, STATEMENT_PREVIEW
+
+logger = logging.getLogger(__name__)
+
+# Only these are EXPLAINed; EXPLAIN never executes them on either dialect
+_EXPLAINABLE = re.compile(r"^\s*(SELECT|WITH|UPDATE|DELETE)\b", re.IGNORECASE)
+# Bound values of statements touching these columns are never recorded
+_SENSITIVE = re.compile(r"password|otp|token|secret", re.IGNORECASE)
+# SQLite plan details: "SCAN students", "SCAN s", "SCAN students USING INDEX ix" ...
+_SQLITE_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS (\w+))?(.*)$")
+_SQLITE_ALIAS = r"\b(\w+)\s+(?:AS\s+)?{alias}\b"
+
+PARAM_PREVIEW = 80
+# A plan is reused for repeats of the same statement shape for this long
+PLAN_TTL_SECONDS = 600
+# Table sizes used to decide whether a scan matters
+TABLE_ROWS_TTL_SECONDS = 600
+
+
+def _preview_params(statement, parameters, executemany):
+    if executemany and parameters:
+        parameters = parameters[0]
+    if not parameters:
+        return None
+    if _SENSITIVE.search(statement):
+        return "[redacted]"
+    if isinstance(parameters, dict):
+        return {k: repr(v)[:PARAM_PREVIEW] for k, v in parameters.items()}
+    return [repr(v)[:PARAM_PREVIEW] for v in parameters]
+
+
+class PlanExplainer:
+    """
+    Daemon thread that runs EXPLAIN for captured statements on its own
+    pooled connection, so the request that hit the slow query never waits
+    for the plan.
+    """
+
+    def __init__(self, maxsize, large_table_rows):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.large_table_rows = large_table_rows
+        self.table_rows = {}  # (engine url, table) -> (rows, read at)
+        self.local = threading.local()
+        self.thread = threading.Thread(target=self._run, name="slow-query-explain", daemon=True)
+        self.thread.start()
+
+    def submit(self, engine, shape, statement, parameters):
+        try:
+            self.queue.put_nowait((engine, shape, statement, parameters))
+            return True
+        except queue.Full:
+            return False
+
+    def depth(self):
+        return self.queue.qsize()
+
+    def is_explaining(self):
+        return getattr(self.local, "active", False)
+
+    def _run(self):
+        self.local.active = True
+        while True:
+            engine, shape, statement, parameters = self.queue.get()
+            try:
+                plan = self.explain(engine, statement, parameters)
+            except Exception as e:
+                plan = {"error": str(e)[:STATEMENT_PREVIEW], "rows": [], "full_scans": []}
+            plan["explained_at"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+            SlowQueryService._store_plan(shape, plan)
+            if plan["full_scans"]:
+                logger.warning(json.dumps({
+                    "event": "slow_query_full_scan",
+                    "full_scans": plan["full_scans"],
+                    "sql": shape[:STATEMENT_PREVIEW]
+                }))
+
+    def explain(self, engine, statement, parameters):
+        with engine.connect() as conn:
+            if engine.dialect.name == "sqlite":
+                rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+                plan = [row[-1] for row in rows]
+                scans = self._sqlite_full_scans(conn, engine, statement, plan)
+            else:
+                result = conn.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+                plan = [dict(row._mapping) for row in result]
+                # type=ALL is a table scan; rows is the optimizer's estimate of rows read
+                scans = [
+                    {"table": row.get("table"), "rows": row.get("rows")}
+                    for row in plan
+                    if row.get("type") == "ALL" and (row.get("rows") or 0) >= self.large_table_rows
+                ]
+        return {"rows": plan, "full_scans": scans}
+
+    def _sqlite_full_scans(self, conn, engine, statement, plan):
+        scans = []
+        for detail in plan:
+            match = _SQLITE_SCAN.match(detail)
+            # "USING COVERING INDEX" reads the index only and is usually fine
+            if not match or "COVERING INDEX" in match.group(3):
+                continue
+            table = self._sqlite_table(match.group(1), statement)
+            if table is None:
+                continue
+            rows = self._table_rows(conn, engine, table)
+            if rows >= self.large_table_rows:
+                scans.append({"table": table, "rows": rows})
+        return scans
+
+    @staticmethod
+    def _sqlite_table(name, statement):
+        """Plan details may name an alias (FROM students AS s -> "SCAN s")."""
+        if re.search(rf"\b(?:FROM|JOIN)\s+\"?{re.escape(name)}\"?(?:\s|$|,|\))", statement, re.IGNORECASE):
+            return name
+        match = re.search(_SQLITE_ALIAS.format(alias=re.escape(name)), statement, re.IGNORECASE)
+        return match.group(1) if match else None
+
+    def _table_rows(self, conn, engine, table):
+        key = (str(engine.url), table)
+        cached = self.table_rows.get(key)
+        if cached and time.monotonic() - cached[1] < TABLE_ROWS_TTL_SECONDS:
+            return cached[0]
+        try:
+            # MAX(rowid) is an index seek; close enough to COUNT(*) without the full read
+            rows = conn.exec_driver_sql(f'SELECT MAX(rowid) FROM "{table}"').scalar() or 0
+        except Exception:
+            rows = 0
+        self.table_rows[key] = (rows, time.monotonic())
+        return rows
+
+
+class SlowQueryService:
+    """
+    Records statements slower than SLOW_QUERY_MS (0 disables) with their
+    bound parameters and the request that issued them. Each new statement
+    shape is EXPLAINed in the background (EXPLAIN QUERY PLAN on SQLite) and
+    plans reading a whole table of SLOW_QUERY_LARGE_TABLE_ROWS or more rows
+    are flagged. The last SLOW_QUERY_BUFFER captures are kept in memory per
+    worker process and served at /api/admin/slow-queries.
+
+    Timings are taken around cursor.execute; on SQLite rows are produced
+    while fetching, so a slow scan may show up shorter than it really is.
+    """
+
+    _lock = threading.Lock()
+    _captures = deque(maxlen=200)
+    _plans = OrderedDict()  # shape -> plan
+    _settings = {}
+    _explainer = None
+    _explainer_pid = None
+    _installed = False
+
+    @staticmethod
+    def init_app(app):
+        threshold_ms = app.config.get("SLOW_QUERY_MS", 0)
+        if threshold_ms <= 0:
+            return
+
+        with SlowQueryService._lock:
+            SlowQueryService._settings = {
+                "threshold": threshold_ms / 1000.0,
+                "explain": app.config.get("SLOW_QUERY_EXPLAIN", True),
+                "buffer": app.config.get("SLOW_QUERY_BUFFER", 200),
+                "large_table_rows": app.config.get("SLOW_QUERY_LARGE_TABLE_ROWS", 10000),
+            }
+            SlowQueryService._captures = deque(SlowQueryService._captures, maxlen=SlowQueryService._settings["buffer"])
+            if not SlowQueryService._installed:
+                event.listen(Engine, "before_cursor_execute", SlowQueryService._before_cursor_execute)
+                event.listen(Engine, "after_cursor_execute", SlowQueryService._after_cursor_execute)
+                SlowQueryService._installed = True
+
+    @staticmethod
+    def enabled():
+        return SlowQueryService._installed
+
+    @staticmethod
+    def _get_explainer():
+        # Threads don't survive a fork; each gunicorn worker starts its own
+        if not SlowQueryService._settings.get("explain"):
+            return None
+        if SlowQueryService._explainer is None or SlowQueryService._explainer_pid != os.getpid():
+            with SlowQueryService._lock:
+                if SlowQueryService._explainer is None or SlowQueryService._explainer_pid != os.getpid():
+                    SlowQueryService._explainer = PlanExplainer(
+                        maxsize=100, large_table_rows=SlowQueryService._settings["large_table_rows"]
+                    )
+                    SlowQueryService._explainer_pid = os.getpid()
+        return SlowQueryService._explainer
+
+    # ---------------------------------------------------------
+    # SQLALCHEMY EVENTS
+    # ---------------------------------------------------------
+    @staticmethod
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("slow_query_start", []).append(time.perf_counter())
+
+    @staticmethod
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("slow_query_start")
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        if elapsed < SlowQueryService._settings["threshold"]:
+            return
+        explainer = SlowQueryService._get_explainer()
+        if explainer is not None and explainer.is_explaining():
+            return
+        SlowQueryService._capture(conn.engine, statement, parameters, executemany, elapsed, explainer)
+
+    @staticmethod
+    def _capture(engine, statement, parameters, executemany, elapsed, explainer):
+        shape = statement_shape(statement)
+        capture = {
+            "at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "ms": round(elapsed * 1000, 2),
+            "sql": statement[:STATEMENT_PREVIEW * 4],
+            "params": _preview_params(statement, parameters, executemany),
+            "shape": shape,
+        }
+        if has_request_context():
+            capture.update(method=request.method, path=request.path, endpoint=request.endpoint)
+
+        explain = explainer is not None and not executemany and _EXPLAINABLE.match(statement)
+        with SlowQueryService._lock:
+            SlowQueryService._captures.append(capture)
+            plan = SlowQueryService._plans.get(shape)
+            explain = explain and (plan is None or time.monotonic() - plan["_at"] > PLAN_TTL_SECONDS)
+            if explain:
+                # Placeholder so concurrent repeats of this shape don't queue more EXPLAINs
+                SlowQueryService._plans[shape] = {"_at": time.monotonic(), "pending": True, "rows": [], "full_scans": []}
+
+        if explain:
+            args = tuple(parameters) if isinstance(parameters, (list, tuple)) else dict(parameters or {})
+            if not explainer.submit(engine, shape, statement, args):
+                with SlowQueryService._lock:
+                    SlowQueryService._plans.pop(shape, None)
+
+        logger.warning(json.dumps({
+            "event": "slow_query",
+            "ms": capture["ms"],
+            "endpoint": capture.get("endpoint"),
+            "sql": statement[:STATEMENT_PREVIEW]
+        }))
+
+    @staticmethod
+    def _store_plan(shape, plan):
+        with SlowQueryService._lock:
+            plan["_at"] = time.monotonic()
+            SlowQueryService._plans[shape] = plan
+            SlowQueryService._plans.move_to_end(shape)
+            while len(SlowQueryService._plans) > SlowQueryService._settings.get("buffer", 200):
+                SlowQueryService._plans.popitem(last=False)
+
+    # ---------------------------------------------------------
+    # READING
+    # ---------------------------------------------------------
+    @staticmethod
+    def snapshot():
+        """Statement shapes sorted by total captured time, plus the latest captures."""
+        with SlowQueryService._lock:
+            captures = list(SlowQueryService._captures)
+            plans = {shape: dict(plan) for shape, plan in SlowQueryService._plans.items()}
+
+        grouped = {}
+        for c in captures:
+            stats = grouped.setdefault(c["shape"], {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "last": None})
+            stats["count"] += 1
+            stats["total_ms"] += c["ms"]
+            if c["ms"] >= stats["max_ms"]:
+                stats["max_ms"] = c["ms"]
+                stats["slowest"] = c
+            stats["last"] = c["at"]
+
+        statements = []
+        for shape, stats in sorted(grouped.items(), key=lambda i: i[1]["total_ms"], reverse=True):
+            plan = plans.get(shape, {})
+            slowest = stats["slowest"]
+            statements.append({
+                "sql": shape[:STATEMENT_PREVIEW * 4],
+                "count": stats["count"],
+                "total_ms": round(stats["total_ms"], 2),
+                "max_ms": stats["max_ms"],
+                "last_seen": stats["last"],
+                "endpoint": slowest.get("endpoint"),
+                "params": slowest["params"],
+                "plan": plan.get("rows", []),
+                "plan_pending": plan.get("pending", False),
+                "plan_error": plan.get("error"),
+                "full_scans": plan.get("full_scans", []),
+            })
+
+        recent = [{k: v for k, v in c.items() if k != "shape"} for c in reversed(captures)]
+        return {"statements": statements, "recent": recent}
+
+    @staticmethod
+    def queue_depth():
+        explainer = SlowQueryService._explainer
+        return explainer.depth() if explainer is not None and SlowQueryService._explainer_pid == os.getpid() else 0
+
+    @staticmethod
+    def reset():
+        with SlowQueryService._lock:
+            SlowQueryService._captures.clear()
+            SlowQueryService._plans.clear()
@@ -0,0 +1,73 @@
+import uuid
+
+from flask import current_app
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+from extensions import db, cache
+from models import User
+from services.metrics_service import MetricsService
+
+DEFAULT_TIMEOUT = 60
+
+# Never copied into the cache; loaded on first access by the few views that check it
+UNCACHED_ATTRS = ("password",)
+
+
+class UserCacheService:
+    """
+    Authenticated-user lookups for token_required.
+
+    Entries live under user:<id>:<version> for a short TTL, and so does the
+    version itself, so a warm request never touches the database. Committing
+    a change to a User or their branch grants moves the version (see the
+    listeners in models.py): renames, password resets, role changes and
+    deactivations take effect on the next request wherever the cache is
+    shared (FileSystemCache, RedisCache), and within AUTH_USER_CACHE_TIMEOUT
+    on per-process caches.
+    """
+
+    @staticmethod
+    def version_key(user_id):
+        return f"user_version:{user_id}"
+
+    @staticmethod
+    def _timeout():
+        return current_app.config.get("AUTH_USER_CACHE_TIMEOUT", DEFAULT_TIMEOUT)
+
+    @staticmethod
+    def version(user_id):
+        return cache.get(UserCacheService.version_key(user_id)) or "0"
+
+    @staticmethod
+    def _attrs():
+        return [prop.key for prop in inspect(User).column_attrs if prop.key not in UNCACHED_ATTRS]
+
+    @staticmethod
+    def get(user_id):
+        """The User for user_id attached to the current session, or None."""
+        version = UserCacheService.version(user_id)
+        key = f"user:{user_id}:{version}"
+
+        values = cache.get(key)
+        MetricsService.record_cache("auth_user", values is not None)
+        if values is None:
+            user = db.session.get(User, user_id)
+            if user is None:
+                return None
+            values = {attr: getattr(user, attr) for attr in UserCacheService._attrs()}
+            cache.set(key, values, timeout=UserCacheService._timeout())
+            return user
+
+        # Rebuild as a detached, already-persisted row and attach it without a SELECT.
+        # Views can still modify and commit it; skipped attributes load lazily.
+        user = User(**values)
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+
+    @staticmethod
+    def bump(*user_ids):
+        """New versions for user_ids; entries under the old ones are never read again."""
+        cache.set_many(
+            {UserCacheService.version_key(user_id): uuid.uuid4().hex[:12] for user_id in user_ids},
+            timeout=0
+        )
@@ -0,0 +1,278 @@
+import json
+import threading
+
+from flask import g, has_request_context, has_app_context
+from sqlalchemy import select, insert, delete, func, union_all, literal, case
+from sqlalchemy.orm import aliased
+from extensions import db, get_now
+from models import (
+    AcademicYearArchive, ARCHIVE_TABLES, Student, StudentAcademicRecord, Attendance,
+    StudentFee, FeePayment, StudentMarks
+)
+from services.cache_service import CacheService
+
+# cache_versions resource bumped whenever academic_year_archives changes
+ARCHIVE_RESOURCE = "year_archives"
+
+# Children first: fee_payments.student_fee_id points at studentfees
+ARCHIVE_ORDER = (FeePayment, StudentMarks, Attendance, StudentFee, StudentAcademicRecord)
+
+# Rows per INSERT ... SELECT / DELETE transaction while moving a table
+ARCHIVE_BATCH_SIZE = 5000
+
+_archived = None  # (version, frozenset of academic years)
+_archived_lock = threading.Lock()
+
+
+def _pk(table):
+    return table.primary_key.columns[0]
+
+
+class YearArchiveService:
+    """
+    Moves closed academic years (every student_academic_records row locked)
+    out of the year-scoped tables into their *_archive copies, so day to day
+    queries only see open years.
+
+    Rows move table by table in id-ordered batches; each batch is copied and
+    deleted in one transaction, so an interrupted run can simply be repeated.
+    Reads of an archived year go through source(), which unions the hot and
+    archive rows of that year. Derived tables (student_fee_balance,
+    fee_collection_daily) keep their rows for archived years, and their
+    rebuild() reads those years through table_source().
+    """
+
+    # ---------------------------------------------------------
+    # ARCHIVED YEARS
+    # ---------------------------------------------------------
+    @staticmethod
+    def archived_years():
+        """Years with rows in the archive tables, checked against cache_versions once per request."""
+        global _archived
+        if has_request_context() and "archived_years" in g:
+            return g.archived_years
+
+        version = CacheService.version(ARCHIVE_RESOURCE)
+        snapshot = _archived
+        if snapshot is None or snapshot[0] != version:
+            with _archived_lock:
+                if _archived is None or _archived[0] != version:
+                    years = db.session.execute(select(AcademicYearArchive.academic_year)).scalars().all()
+                    _archived = (version, frozenset(years))
+                snapshot = _archived
+
+        if has_request_context():
+            g.archived_years = snapshot[1]
+        return snapshot[1]
+
+    @staticmethod
+    def forget():
+        if has_app_context():
+            g.pop("archived_years", None)
+
+    @staticmethod
+    def is_archived(academic_year):
+        return bool(academic_year) and academic_year in YearArchiveService.archived_years()
+
+    @staticmethod
+    def year_summary():
+        """Per academic year: academic records, how many are locked, and archive state."""
+        sar = StudentAcademicRecord.__table__
+        archive = ARCHIVE_TABLES[sar.name]
+        counts = {}
+        for table in (sar, archive):
+            for year, total, locked in db.session.execute(
+                select(
+                    table.c.academic_year, func.count(),
+                    func.sum(case((table.c.is_locked.is_(True), 1), else_=0))
+                ).group_by(table.c.academic_year)
+            ).all():
+                entry = counts.setdefault(year, [0, 0])
+                entry[0] += total
+                entry[1] += int(locked or 0)
+
+        registry = {a.academic_year: a for a in AcademicYearArchive.query.all()}
+        result = []
+        for year in sorted(set(counts) | set(registry)):
+            total, locked = counts.get(year, (0, 0))
+            entry = registry.get(year)
+            result.append({
+                "academic_year": year,
+                "records": total,
+                "locked": locked,
+                "closed": total > 0 and locked == total,
+                "status": entry.status if entry else "open",
+                "row_counts": json.loads(entry.row_counts) if entry and entry.row_counts else None,
+                "archived_at": entry.archived_at.isoformat() if entry and entry.archived_at else None,
+            })
+        return result
+
+    # ---------------------------------------------------------
+    # HISTORICAL READS
+    # ---------------------------------------------------------
+    @staticmethod
+    def source(model, academic_year=None):
+        """
+        The model itself, or a read-only alias over hot + archive rows when
+        academic_year is archived. With academic_year=None (a student's whole
+        history) the alias covers every year once anything is archived.
+        """
+        history = YearArchiveService.table_source(model.__table__, academic_year)
+        if history is model.__table__:
+            return model
+        return aliased(model, history, adapt_on_names=True)
+
+    @staticmethod
+    def table_source(table, academic_year=None):
+        """source() for Core statements: the hot table, or a subquery over hot + archive rows."""
+        archived = YearArchiveService.archived_years()
+        if academic_year is None and not archived:
+            return table
+        if academic_year is not None and academic_year not in archived:
+            return table
+
+        archive = ARCHIVE_TABLES[table.name]
+        parts = [select(table), select(*[archive.c[c.name] for c in table.columns])]
+        if academic_year is not None:
+            parts = [
+                part.where(t.c.academic_year == academic_year)
+                for part, t in zip(parts, (table, archive))
+            ]
+        return union_all(*parts).subquery(f"{table.name}_history")
+
+    @staticmethod
+    def sql_source(table_name, academic_year=None, alias=None):
+        """source() for hand-written SQL: "table alias", or a derived table over hot + archive rows."""
+        alias = alias or table_name
+        archived = YearArchiveService.archived_years()
+        if academic_year is None and not archived:
+            return f"{table_name} {alias}"
+        if academic_year is not None and academic_year not in archived:
+            return f"{table_name} {alias}"
+
+        quote = db.engine.dialect.identifier_preparer.quote
+        columns = ", ".join(quote(c.name) for c in db.metadata.tables[table_name].columns)
+        where = ""
+        if academic_year is not None:
+            # Only years already recorded in academic_year_archives get here, never raw input
+            where = " WHERE academic_year = '%s'" % academic_year.replace("'", "''")
+        return (
+            f"(SELECT {columns} FROM {table_name}{where} "
+            f"UNION ALL SELECT {columns} FROM {table_name}_archive{where}) {alias}"
+        )
+
+    # ---------------------------------------------------------
+    # MOVING ROWS
+    # ---------------------------------------------------------
+    @staticmethod
+    def check_closed(academic_year):
+        """Raises ValueError unless every academic record of the year is locked and no student is still in it."""
+        total, locked = db.session.execute(
+            select(
+                func.count(),
+                func.sum(case((StudentAcademicRecord.is_locked.is_(True), 1), else_=0))
+            ).where(StudentAcademicRecord.academic_year == academic_year)
+        ).one()
+        if not total:
+            raise ValueError(f"No academic records for {academic_year}")
+        if int(locked or 0) != total:
+            raise ValueError(f"{academic_year} is not closed: {total - int(locked or 0)} of {total} academic records are unlocked")
+        current = db.session.query(func.count(Student.student_id)).filter(Student.academic_year == academic_year).scalar()
+        if current:
+            raise ValueError(f"{current} students still have {academic_year} as their current year")
+        # A payment booked in another year against this year's fees would lose its studentfees row
+        crossing = db.session.query(func.count(FeePayment.id)).join(
+            StudentFee, FeePayment.student_fee_id == StudentFee.id
+        ).filter(
+            StudentFee.academic_year == academic_year,
+            FeePayment.academic_year != academic_year
+        ).scalar()
+        if crossing:
+            raise ValueError(f"{crossing} payments from other years point at {academic_year} fees")
+
+    @staticmethod
+    def pending_rows(academic_year, archived=False):
+        """Rows of the year per table, in the hot tables or (archived=True) the archive tables."""
+        counts = {}
+        for model in ARCHIVE_ORDER:
+            table = ARCHIVE_TABLES[model.__tablename__] if archived else model.__table__
+            counts[model.__tablename__] = db.session.execute(
+                select(func.count()).select_from(table).where(table.c.academic_year == academic_year)
+            ).scalar()
+        return counts
+
+    @staticmethod
+    def _move(source, target, academic_year, batch_size, extra=None, log=None):
+        """Copies then deletes the year's rows in id order, one transaction per batch."""
+        pk = _pk(source)
+        columns = [c.name for c in source.columns if c.name in target.c]
+        moved = 0
+        while True:
+            ids = select(pk).where(source.c.academic_year == academic_year).order_by(pk).limit(batch_size).subquery()
+            last_id = db.session.execute(select(func.max(ids.c[pk.name]))).scalar()
+            if last_id is None:
+                return moved
+
+            batch = (source.c.academic_year == academic_year, pk <= last_id)
+            values = [source.c[c] for c in columns] + [literal(v) for v in (extra or {}).values()]
+            conn = db.session.connection()
+            conn.execute(insert(target).from_select(columns + list(extra or {}), select(*values).where(*batch)))
+            moved += conn.execute(delete(source).where(*batch)).rowcount
+            db.session.commit()
+            if log:
+                log(f"  {source.name}: {moved} rows")
+
+    @staticmethod
+    def archive_year(academic_year, archived_by=None, batch_size=ARCHIVE_BATCH_SIZE, log=None):
+        """
+        Moves every year-scoped row of a closed year into the archive tables.
+        Re-running after an interruption resumes where the last batch ended.
+        Commits per batch. Returns rows moved per table.
+        """
+        entry = AcademicYearArchive.query.filter_by(academic_year=academic_year).first()
+        if entry and entry.status == "archived":
+            raise ValueError(f"{academic_year} is already archived")
+        if entry is None:
+            YearArchiveService.check_closed(academic_year)
+            # Registered before any row moves, so reads union both sides from the first batch on
+            entry = AcademicYearArchive(academic_year=academic_year, status="archiving", archived_by=archived_by)
+            db.session.add(entry)
+            db.session.commit()
+
+        counts = json.loads(entry.row_counts) if entry.row_counts else {}
+        archived_at = get_now()
+        for model in ARCHIVE_ORDER:
+            name = model.__tablename__
+            moved = YearArchiveService._move(
+                model.__table__, ARCHIVE_TABLES[name], academic_year, batch_size,
+                extra={"archived_at": archived_at}, log=log
+            )
+            counts[name] = counts.get(name, 0) + moved
+
+        entry.status = "archived"
+        entry.row_counts = json.dumps(counts)
+        entry.archived_at = get_now()
+        db.session.commit()
+        return counts
+
+    @staticmethod
+    def restore_year(academic_year, batch_size=ARCHIVE_BATCH_SIZE, log=None):
+        """Moves an archived year back into the hot tables and forgets it. Commits per batch."""
+        entry = AcademicYearArchive.query.filter_by(academic_year=academic_year).first()
+        if entry is None:
+            raise ValueError(f"{academic_year} is not archived")
+
+        entry.status = "restoring"
+        db.session.commit()
+
+        counts = {}
+        # Parents first so the fee_payments -> studentfees key holds on the way back
+        for model in reversed(ARCHIVE_ORDER):
+            name = model.__tablename__
+            counts[name] = YearArchiveService._move(
+                ARCHIVE_TABLES[name], model.__table__, academic_year, batch_size, log=log
+            )
+
+        db.session.delete(entry)
+        db.session.commit()
+        return counts
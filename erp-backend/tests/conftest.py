@@ -0,0 +1,41 @@
+import os
+import sys
+
+import jwt
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SLOW_QUERY_MS", "0")
+
+from app import create_app
+from extensions import db, cache
+from models import User
+
+
+@pytest.fixture
+def app():
+    app = create_app()
+    app.config["TESTING"] = True
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+        cache.clear()
+
+
+@pytest.fixture
+def admin(app):
+    user = User(username="admin", password="x", role="Admin", branch="All")
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def client(app, admin):
+    token = jwt.encode({"user_id": admin.user_id}, app.config["SECRET_KEY"], algorithm="HS256")
+    client = app.test_client()
+    client.environ_base["HTTP_AUTHORIZATION"] = f"Bearer {token}"
+    return client
@@ -0,0 +1,42 @@
+from sqlalchemy.orm import load_only
+
+from extensions import db
+from models import AuditLog, FeeType
+
+
+def add_fee_type():
+    fee_type = FeeType(feetype="Transport", description="Bus route 4")
+    db.session.add(fee_type)
+    db.session.commit()
+    return fee_type.id
+
+
+def deleted_snapshot(fee_type_id):
+    log = AuditLog.query.filter_by(table_name="feetypes", action="DELETE", record_id=str(fee_type_id)).one()
+    return log.old_data
+
+
+def test_delete_of_expired_instance_keeps_stored_values(app):
+    with app.test_request_context():
+        fee_type_id = add_fee_type()
+        fee_type = db.session.get(FeeType, fee_type_id)
+        db.session.expire(fee_type)
+
+        db.session.delete(fee_type)
+        db.session.commit()
+
+        old_data = deleted_snapshot(fee_type_id)
+        assert old_data["feetype"] == "Transport"
+        assert old_data["description"] == "Bus route 4"
+
+
+def test_delete_of_partially_loaded_instance_keeps_stored_values(app):
+    with app.test_request_context():
+        fee_type_id = add_fee_type()
+        db.session.expunge_all()
+        fee_type = FeeType.query.options(load_only(FeeType.id)).filter_by(id=fee_type_id).one()
+
+        db.session.delete(fee_type)
+        db.session.commit()
+
+        assert deleted_snapshot(fee_type_id)["description"] == "Bus route 4"
@@ -0,0 +1,73 @@
+from datetime import date, datetime
+
+from extensions import db
+from models import Student, StudentAcademicRecord, StudentFee
+from services.cache_service import CacheService
+
+
+def add_student():
+    student = Student(first_name="Asha", admission_no="A1", branch="North", academic_year="2025-26")
+    db.session.add(student)
+    db.session.flush()
+    db.session.add(StudentAcademicRecord(
+        student_id=student.student_id, academic_year="2025-26", class_name="1", section="A"
+    ))
+    db.session.commit()
+    return student.student_id
+
+
+def test_table_stamp_filters_on_model_column(app):
+    student_id = add_student()
+    db.session.add(StudentFee(student_id=student_id, academic_year="2025-26", total_fee=100))
+    db.session.commit()
+
+    assert CacheService.table_stamp(StudentFee, student_id=student_id).startswith("studentfees:1:")
+    assert CacheService.table_stamp(StudentFee, student_id=student_id + 1) == "studentfees:0:-"
+
+
+def test_history_answers_304_until_a_write(client):
+    student_id = add_student()
+    url = f"/api/students/{student_id}/history"
+
+    first = client.get(url)
+    assert first.status_code == 200
+    assert first.headers.get("ETag")
+
+    again = client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
+
+    record = StudentAcademicRecord.query.filter_by(student_id=student_id).one()
+    record.section = "B"
+    db.session.commit()
+
+    changed = client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != first.headers["ETag"]
+
+
+def test_same_second_edits_change_the_etag(client):
+    student_id = add_student()
+    url = f"/api/students/{student_id}/history"
+    # Whole-second updated_at, as MySQL DATETIME stores it
+    same_second = datetime(2026, 1, 1, 9, 0, 0)
+
+    records = StudentAcademicRecord.query.filter_by(student_id=student_id)
+    records.update({"section": "B", "updated_at": same_second})
+    db.session.commit()
+    first = client.get(url)
+
+    records.update({"section": "C", "updated_at": same_second})
+    db.session.commit()
+    second = client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 200
+
+
+def test_payment_writes_bump_resources_after_commit(app):
+    student_id = add_student()
+    before = dict(CacheService.versions())
+
+    db.session.add(StudentFee(student_id=student_id, academic_year="2025-26", total_fee=100, due_date=date(2026, 1, 1)))
+    db.session.commit()
+
+    after = CacheService.versions()
+    assert after["fee_balances"] != before.get("fee_balances")
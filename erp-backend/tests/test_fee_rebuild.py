@@ -0,0 +1,55 @@
+from datetime import date
+
+from sqlalchemy import func
+
+from extensions import db
+from models import FeeCollectionDaily, FeePayment, Student, StudentAcademicRecord, StudentFee, StudentFeeBalance
+from services.fee_balance_service import FeeBalanceService
+from services.fee_collection_service import FeeCollectionService
+from services.year_archive_service import YearArchiveService
+
+
+def totals():
+    balance = db.session.query(
+        StudentFeeBalance.academic_year, func.sum(StudentFeeBalance.total_fee), func.sum(StudentFeeBalance.paid_amount)
+    ).group_by(StudentFeeBalance.academic_year).order_by(StudentFeeBalance.academic_year).all()
+    daily = db.session.query(
+        FeeCollectionDaily.academic_year, func.sum(FeeCollectionDaily.amount_paid), func.sum(FeeCollectionDaily.receipt_count)
+    ).group_by(FeeCollectionDaily.academic_year).order_by(FeeCollectionDaily.academic_year).all()
+    return [tuple(r) for r in balance], [tuple(r) for r in daily]
+
+
+def add_year(student_id, year, paid, receipt_no):
+    fee = StudentFee(student_id=student_id, academic_year=year, total_fee=100, paid_amount=paid, due_amount=100 - paid)
+    db.session.add(fee)
+    db.session.flush()
+    db.session.add(FeePayment(
+        receipt_no=receipt_no, branch="North", location="Hyderabad", academic_year=year,
+        student_id=student_id, class_name="1", student_fee_id=fee.id, gross_amount=100,
+        concession_amount=0, amount_paid=paid, payment_date=date(2025, 7, 1), status="A"
+    ))
+
+
+def test_rebuild_keeps_archived_years(app):
+    student = Student(first_name="Asha", admission_no="A1", branch="North", academic_year="2026-27")
+    db.session.add(student)
+    db.session.flush()
+    db.session.add(StudentAcademicRecord(
+        student_id=student.student_id, academic_year="2025-26", class_name="1", section="A", is_locked=True
+    ))
+    add_year(student.student_id, "2025-26", 40, "R1")
+    add_year(student.student_id, "2026-27", 25, "R2")
+    db.session.commit()
+
+    YearArchiveService.archive_year("2025-26")
+    assert YearArchiveService.pending_rows("2025-26")["fee_payments"] == 0
+    before = totals()
+    assert [year for year, *_ in before[0]] == ["2025-26", "2026-27"]
+
+    FeeBalanceService.rebuild()
+    FeeCollectionService.rebuild()
+    FeeBalanceService.rebuild("2025-26")
+    FeeCollectionService.rebuild("2025-26")
+    db.session.commit()
+
+    assert totals() == before
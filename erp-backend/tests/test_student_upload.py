@@ -0,0 +1,37 @@
+import io
+
+from extensions import db
+from models import Branch, OrgMaster, Student
+
+
+CSV_HEADER = "first_name,last_name,gender,dob,branch,academic_year\n"
+
+
+def upload(client, rows, **headers):
+    body = CSV_HEADER + "".join(rows)
+    return client.post(
+        "/api/students/upload_csv",
+        data={"file": (io.BytesIO(body.encode()), "students.csv")},
+        content_type="multipart/form-data",
+        headers=headers,
+    )
+
+
+def test_rows_are_numbered_from_their_own_branch_series(client):
+    db.session.add_all([
+        Branch(branch_code="NTH", branch_name="North"),
+        Branch(branch_code="STH", branch_name="South"),
+        OrgMaster(master_type="ACADEMIC_YEAR", code="2025-26", display_name="2025-26"),
+    ])
+    db.session.commit()
+
+    res = upload(client, [
+        "Asha,K,Female,01/02/2015,North,2025-26\n",
+        "Ravi,M,Male,31/31/2015,North,2025-26\n",  # bad dob: must not take a number
+        "Meera,S,Female,03/04/2015,South,2025-26\n",
+        "Kiran,P,Male,05/06/2015,,\n",  # falls back to the request headers
+    ], **{"X-Branch": "North", "X-Academic-Year": "2025-26"})
+
+    assert res.status_code in (200, 201), res.get_json()
+    numbers = {s.first_name: s.admission_no for s in Student.query.all()}
+    assert numbers == {"Asha": "NTH0001", "Meera": "STH0001", "Kiran": "NTH0002"}